@@ -4,11 +4,8 @@ Amazon Clothes Scraper with Selenium
 Uses Selenium with undetected-chromedriver to bypass anti-bot detection.
 """
 
-import json
 import time
 import random
-import csv
-from datetime import datetime
 
 def install_packages():
     """Install required packages"""
@@ -19,21 +16,24 @@ def install_packages():
         subprocess.check_call([sys.executable, '-m', 'pip', 'install', package, '-q'])
 
 try:
-    from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
-    from selenium.webdriver.chrome.service import Service
-    from webdriver_manager.chrome import ChromeDriverManager
 except ImportError:
     print("[*] Installing required packages...")
     install_packages()
-    from selenium import webdriver
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
-    from selenium.webdriver.chrome.service import Service
-    from webdriver_manager.chrome import ChromeDriverManager
+
+from driver_pool import get_pool
+import rate_limiter
+import resource_blocking
+from extraction import SITES, extract_tiles
+from readiness import wait_for_page, report as report_readiness
+from scrolling import scroll_page, report as report_scrolling
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
 
 # Try to use undetected-chromedriver for better anti-bot bypass
 try:
@@ -50,7 +50,9 @@ class AmazonScraper:
         Initialize the scraper
         headless=False shows the browser (helps avoid detection)
         """
-        self.products = []
+        # Written to disk as they are found; exports read them back
+        self.products = JsonlSink(stream_path('amazon_clothes'))
+        self.pool = None
         
         if USE_UNDETECTED:
             # Use undetected-chromedriver (best anti-detection)
@@ -64,26 +66,9 @@ class AmazonScraper:
             
             self.driver = uc.Chrome(options=options)
         else:
-            # Standard Chrome with anti-detection measures
-            options = webdriver.ChromeOptions()
-            if headless:
-                options.add_argument('--headless=new')
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_argument('--disable-extensions')
-            options.add_experimental_option('excludeSwitches', ['enable-automation'])
-            options.add_experimental_option('useAutomationExtension', False)
-            options.add_argument('--window-size=1920,1080')
-            options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            self.driver = webdriver.Chrome(
-                service=Service(ChromeDriverManager().install()),
-                options=options
-            )
-            
-            # Remove webdriver flag
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+            # Standard Chrome from the shared pool (anti-detection built in)
+            self.pool = get_pool(headless)
+            self.driver = self.pool.acquire()
         
         print("[+] Browser initialized successfully!")
     
@@ -92,23 +77,26 @@ class AmazonScraper:
         delay = random.uniform(min_delay, max_delay)
         time.sleep(delay)
     
+    def navigate(self, url):
+        """Load a URL, paced by the per-domain rate limiter"""
+        if not self.pool:
+            # pooled drivers get pacing and resource blocking from driver_pool
+            resource_blocking.apply_for_url(self.driver, url)
+            rate_limiter.acquire(url)
+        self.driver.get(url)
+    
     def human_scroll(self):
-        """Scroll like a human"""
-        scroll_height = self.driver.execute_script("return document.body.scrollHeight")
-        current = 0
-        while current < scroll_height:
-            scroll_amount = random.randint(300, 700)
-            current += scroll_amount
-            self.driver.execute_script(f"window.scrollTo(0, {current});")
-            time.sleep(random.uniform(0.3, 0.8))
+        """Scroll like a human until no more results load (steps and pauses in scrolling.SITE_SCROLL)"""
+        # the old fixed walk down the page took about 0.55 s per 500 px
+        height = self.driver.execute_script("return document.body.scrollHeight") or 0
+        scroll_page(self.driver, 'amazon', replaces=height / 500 * 0.55)
     
     def scrape_amazon(self, search_query="men clothes", max_pages=2):
         """Scrape Amazon search results"""
         print(f"\n[*] Searching Amazon for: '{search_query}'")
         
         # Go to Amazon
-        self.driver.get("https://www.amazon.com")
-        self.random_delay(2, 4)
+        self.navigate("https://www.amazon.com")
         
         try:
             # Find search box and enter query
@@ -126,16 +114,17 @@ class AmazonScraper:
             
             # Click search button
             search_button = self.driver.find_element(By.ID, "nav-search-submit-button")
+            rate_limiter.acquire(self.driver.current_url)
             search_button.click()
             
-            self.random_delay(2, 4)
+            wait_for_page(self.driver, 'amazon', replaces=3)
             
         except Exception as e:
             print(f"[!] Error during search: {e}")
             # Try direct URL approach
             url = f"https://www.amazon.com/s?k={search_query.replace(' ', '+')}"
-            self.driver.get(url)
-            self.random_delay(2, 4)
+            self.navigate(url)
+            wait_for_page(self.driver, 'amazon', replaces=3)
         
         # Scrape multiple pages
         for page in range(max_pages):
@@ -145,20 +134,15 @@ class AmazonScraper:
             self.human_scroll()
             self.random_delay(1, 2)
             
-            # Find all products
+            # Extract all products in one pass
             try:
-                products = self.driver.find_elements(By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
+                products = self.extract_product_data()
                 print(f"[*] Found {len(products)} products on this page")
                 
-                for product in products:
-                    try:
-                        # Get product data
-                        product_data = self.extract_product_data(product)
-                        if product_data and product_data['name'] != 'N/A':
-                            self.products.append(product_data)
-                            print(f"  [+] {product_data['name'][:60]}... - {product_data['price']}")
-                    except Exception as e:
-                        continue
+                for product_data in products:
+                    if product_data['name'] != 'N/A':
+                        self.products.append(product_data)
+                        print(f"  [+] {product_data['name'][:60]}... - {product_data['price']}")
                 
             except Exception as e:
                 print(f"[!] Error finding products: {e}")
@@ -168,8 +152,10 @@ class AmazonScraper:
                 try:
                     next_button = self.driver.find_element(By.CSS_SELECTOR, '.s-pagination-next')
                     if 's-pagination-disabled' not in next_button.get_attribute('class'):
+                        tiles = self.driver.find_elements(By.CSS_SELECTOR, SITES['amazon']['tiles'][0])
+                        rate_limiter.acquire(self.driver.current_url)
                         next_button.click()
-                        self.random_delay(2, 4)
+                        wait_for_page(self.driver, 'amazon', replaces=3, after=tiles[0] if tiles else None)
                     else:
                         print("[*] No more pages available")
                         break
@@ -179,67 +165,27 @@ class AmazonScraper:
         
         return self.products
     
-    def extract_product_data(self, product_element):
-        """Extract data from a product element"""
-        try:
-            # Name
-            try:
-                name = product_element.find_element(By.CSS_SELECTOR, 'h2 a span').text
-            except:
-                name = 'N/A'
-            
-            # Price
-            try:
-                price = product_element.find_element(By.CSS_SELECTOR, '.a-price .a-offscreen').get_attribute('textContent')
-            except:
-                try:
-                    price = product_element.find_element(By.CSS_SELECTOR, '.a-price-whole').text
-                    price = f"${price}"
-                except:
-                    price = 'N/A'
-            
-            # Image
-            try:
-                image = product_element.find_element(By.CSS_SELECTOR, '.s-image').get_attribute('src')
-            except:
-                image = 'N/A'
-            
-            # URL
-            try:
-                url = product_element.find_element(By.CSS_SELECTOR, 'h2 a').get_attribute('href')
-            except:
-                url = 'N/A'
-            
-            # Rating
-            try:
-                rating = product_element.find_element(By.CSS_SELECTOR, '.a-icon-alt').get_attribute('textContent')
-            except:
-                rating = 'N/A'
-            
-            # Reviews count
-            try:
-                reviews = product_element.find_element(By.CSS_SELECTOR, '[aria-label*="stars"] + span').text
-            except:
-                reviews = 'N/A'
-            
-            return {
-                'source': 'Amazon',
-                'name': name,
-                'price': price,
-                'rating': rating,
-                'reviews': reviews,
-                'image': image,
-                'url': url,
-                'scraped_at': datetime.now().isoformat()
-            }
-        except Exception as e:
-            return None
+    def extract_product_data(self):
+        """Extract data from every product on the current page"""
+        rows = extract_tiles(self.driver, SITES['amazon'], defaults={
+            'name': 'N/A', 'price': 'N/A', 'rating': 'N/A', 'reviews': 'N/A', 'image': 'N/A', 'url': 'N/A'
+        })
+        scraped_at = stamp()
+        return [Product(
+            source='Amazon',
+            name=row['name'],
+            price=row['price'],
+            rating=row['rating'],
+            reviews=row['reviews'],
+            image=row['image'],
+            url=row['url'],
+            scraped_at=scraped_at
+        ) for row in rows]
     
     def export_to_json(self, filename='amazon_clothes.json'):
         """Export to JSON"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
-        print(f"\n[*] Exported {len(self.products)} products to {filename}")
+        count = self.products.export_json(filename)
+        print(f"\n[*] Exported {count} products to {filename}")
     
     def export_to_csv(self, filename='amazon_clothes.csv'):
         """Export to CSV"""
@@ -247,16 +193,16 @@ class AmazonScraper:
             print("[!] No products to export")
             return
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=self.products[0].keys())
-            writer.writeheader()
-            writer.writerows(self.products)
-        print(f"[*] Exported {len(self.products)} products to {filename}")
+        count = self.products.export_csv(filename)
+        print(f"[*] Exported {count} products to {filename}")
     
     def close(self):
         """Close the browser"""
         try:
-            self.driver.quit()
+            if self.pool:
+                self.pool.release(self.driver)
+            else:
+                self.driver.quit()
             print("[*] Browser closed")
         except:
             pass
@@ -299,6 +245,9 @@ if __name__ == "__main__":
             print("\n[!] No products found. Amazon might have blocked the request.")
             print("[*] Try running again or use a VPN.")
         
+        report_readiness()
+        report_scrolling()
+        
     except Exception as e:
         print(f"\n[!] Error: {e}")
     
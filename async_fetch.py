@@ -0,0 +1,87 @@
+"""
+Async HTTP Fetch Engine
+Fetches many pages concurrently over pooled keep-alive connections,
+with a cap on connections per host and the shared per-domain rate limiter
+Requires: pip install aiohttp
+"""
+
+import asyncio
+import random
+from urllib.parse import urlparse
+import rate_limiter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncFetcher:
+    """
+    async with AsyncFetcher(per_host=4) as fetcher:
+        async for index, url, html in fetcher.fetch_each(urls):
+            ...
+    """
+
+    def __init__(self, per_host=4, total=32, headers_fn=None, retries=3, timeout=30):
+        if aiohttp is None:
+            raise ImportError("AsyncFetcher needs aiohttp: pip install aiohttp")
+        self.per_host = per_host
+        self.total = total
+        self.headers_fn = headers_fn
+        self.retries = retries
+        self.timeout = timeout
+        self.session = None
+        self.pages = 0
+        self.bytes = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.total, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300, keepalive_timeout=30)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def fetch(self, url):
+        """GET a page with the same retry rules as ClothingScraper.make_request"""
+        host = urlparse(url).netloc
+        for attempt in range(self.retries):
+            try:
+                await rate_limiter.acquire_async(url)
+                headers = self.headers_fn() if self.headers_fn else None
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 200:
+                        body = await response.read()
+                        self.pages += 1
+                        self.bytes += len(body)
+                        return body.decode(response.charset or 'utf-8', errors='replace')
+                    elif response.status == 403:
+                        print(f"[!] {host}: access forbidden. Waiting and retrying... (attempt {attempt + 1})")
+                        await asyncio.sleep(random.uniform(10, 20))
+                    elif response.status == 429:
+                        print(f"[!] {host}: rate limited. Waiting longer... (attempt {attempt + 1})")
+                        await asyncio.sleep(random.uniform(30, 60))
+                    else:
+                        print(f"[!] {host}: got status code {response.status}")
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"[!] Request error: {e}")
+                await asyncio.sleep(5)
+
+        return None
+
+    async def fetch_each(self, urls):
+        """Yield (index, url, html) for every URL as soon as it arrives"""
+        async def indexed(index, url):
+            return index, url, await self.fetch(url)
+
+        tasks = [asyncio.ensure_future(indexed(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
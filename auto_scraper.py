@@ -3,33 +3,20 @@ Auto Scraper - No user input required
 Scrapes from ASOS and eBay automatically
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-import json
-import time
-import random
+from site_runner import run_sites
+from page_archive import open_archive
+from extraction import SITES, extract_tiles
+from readiness import wait_for_page, report as report_readiness
+from scrolling import scroll_page, report as report_scrolling
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
+from product_store import ProductStore
 from datetime import datetime
 import os
-import sys
+import argparse
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def create_driver():
-    options = Options()
-    options.add_argument('--headless=new')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=options)
-
 def scrape_asos(driver, query, max_items=25):
     """Scrape ASOS - Works well"""
     print(f"\n[ASOS] Searching for: {query}")
@@ -38,53 +25,25 @@ def scrape_asos(driver, query, max_items=25):
     try:
         url = f"https://www.asos.com/us/search/?q={query.replace(' ', '+')}"
         driver.get(url)
-        time.sleep(random.uniform(3, 5))
-        
-        # Scroll
-        for i in range(3):
-            driver.execute_script(f"window.scrollTo(0, {(i+1) * 600});")
-            time.sleep(0.4)
-        
-        items = driver.find_elements(By.CSS_SELECTOR, 'article[data-auto-id="productTile"]')
-        if not items:
-            items = driver.find_elements(By.CSS_SELECTOR, '[class*="productTile"]')
+        wait_for_page(driver, 'asos', replaces=4)
+        scroll_page(driver, 'asos', max_items, replaces=1.2)
         
+        items = extract_tiles(driver, SITES['asos'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[ASOS] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, '[class*="productDescription"], h2, p').text
-                except:
-                    name = ""
-                
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                except:
-                    price = "N/A"
-                
-                try:
-                    image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                except:
-                    image = ""
-                
-                try:
-                    link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                except:
-                    link = ""
-                
-                if name and len(name) > 3:
-                    products.append({
-                        'source': 'ASOS',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 3:
+                products.append(Product(
+                    source='ASOS',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[ASOS] Error: {e}")
@@ -99,52 +58,25 @@ def scrape_hm(driver, query, max_items=20):
     try:
         url = f"https://www2.hm.com/en_us/search-results.html?q={query.replace(' ', '+')}"
         driver.get(url)
-        time.sleep(random.uniform(4, 6))
-        
-        for i in range(3):
-            driver.execute_script(f"window.scrollTo(0, {(i+1) * 500});")
-            time.sleep(0.5)
-        
-        items = driver.find_elements(By.CSS_SELECTOR, '[data-item-type="product"], article.product-item')
-        if not items:
-            items = driver.find_elements(By.CSS_SELECTOR, '.product-item, [class*="ProductItem"]')
+        wait_for_page(driver, 'hm', replaces=5)
+        scroll_page(driver, 'hm', max_items, replaces=1.5)
         
+        items = extract_tiles(driver, SITES['hm'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[H&M] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, 'a.link, [class*="ProductName"], h2').text
-                except:
-                    name = ""
-                
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, '[class*="price"], span.price').text
-                except:
-                    price = "N/A"
-                
-                try:
-                    image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                except:
-                    image = ""
-                
-                try:
-                    link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                except:
-                    link = ""
-                
-                if name and len(name) > 3:
-                    products.append({
-                        'source': 'H&M',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 3:
+                products.append(Product(
+                    source='H&M',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[H&M] Error: {e}")
@@ -159,52 +91,25 @@ def scrape_nordstrom(driver, query, max_items=20):
     try:
         url = f"https://www.nordstrom.com/sr?keyword={query.replace(' ', '+')}"
         driver.get(url)
-        time.sleep(random.uniform(3, 5))
-        
-        for i in range(3):
-            driver.execute_script(f"window.scrollTo(0, {(i+1) * 500});")
-            time.sleep(0.4)
-        
-        items = driver.find_elements(By.CSS_SELECTOR, 'article[data-element]')
-        if not items:
-            items = driver.find_elements(By.CSS_SELECTOR, '[class*="ProductCard"]')
+        wait_for_page(driver, 'nordstrom', replaces=4)
+        scroll_page(driver, 'nordstrom', max_items, replaces=1.2)
         
+        items = extract_tiles(driver, SITES['nordstrom'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[Nordstrom] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, 'h2, [class*="ProductName"]').text
-                except:
-                    name = ""
-                
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, '[class*="Price"]').text
-                except:
-                    price = "N/A"
-                
-                try:
-                    image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                except:
-                    image = ""
-                
-                try:
-                    link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                except:
-                    link = ""
-                
-                if name and len(name) > 3:
-                    products.append({
-                        'source': 'Nordstrom',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 3:
+                products.append(Product(
+                    source='Nordstrom',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[Nordstrom] Error: {e}")
@@ -219,49 +124,25 @@ def scrape_forever21(driver, query, max_items=20):
     try:
         url = f"https://www.forever21.com/us/shop/search/{query.replace(' ', '%20')}"
         driver.get(url)
-        time.sleep(random.uniform(3, 5))
-        
-        for i in range(3):
-            driver.execute_script(f"window.scrollTo(0, {(i+1) * 500});")
-            time.sleep(0.4)
+        wait_for_page(driver, 'forever21', replaces=4)
+        scroll_page(driver, 'forever21', max_items, replaces=1.2)
         
-        items = driver.find_elements(By.CSS_SELECTOR, '.product-tile, [class*="ProductCard"]')
+        items = extract_tiles(driver, SITES['forever21'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[Forever21] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, '[class*="product-name"], [class*="title"], h3').text
-                except:
-                    name = ""
-                
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                except:
-                    price = "N/A"
-                
-                try:
-                    image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                except:
-                    image = ""
-                
-                try:
-                    link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                except:
-                    link = ""
-                
-                if name and len(name) > 3:
-                    products.append({
-                        'source': 'Forever21',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 3:
+                products.append(Product(
+                    source='Forever21',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[Forever21] Error: {e}")
@@ -270,36 +151,52 @@ def scrape_forever21(driver, query, max_items=20):
 
 def main():
     # Get query from command line or use default
-    query = sys.argv[1] if len(sys.argv) > 1 else "shirts"
+    parser = argparse.ArgumentParser(description="Auto scraper")
+    parser.add_argument('query', nargs='?', default="shirts")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="sites to scrape at once, each in its own browser")
+    archiving = parser.add_mutually_exclusive_group()
+    archiving.add_argument('--record', metavar='ARCHIVE',
+                           help="save every page to this page archive while scraping")
+    archiving.add_argument('--replay', metavar='ARCHIVE',
+                           help="re-run extraction on a page archive, with no browser or network")
+    args = parser.parse_args()
+    query = args.query
+    archive = open_archive(args.record or args.replay, record=bool(args.record))
     
     print("=" * 60)
     print(f"  Auto Scraper - Query: {query}")
     print("=" * 60)
     
-    print("\n[*] Starting Chrome...")
-    driver = create_driver()
-    
-    all_products = []
-    
-    try:
-        # Scrape multiple sites
-        all_products.extend(scrape_asos(driver, query, 25))
-        all_products.extend(scrape_hm(driver, query, 15))
-        all_products.extend(scrape_nordstrom(driver, query, 15))
-        all_products.extend(scrape_forever21(driver, query, 15))
-        
-    finally:
-        driver.quit()
+    run_started = datetime.now().isoformat()
+    print("\n[*] Replaying archived pages..." if args.replay else "\n[*] Starting Chrome...")
+    all_products, _ = run_sites([
+        ('ASOS', scrape_asos, 25),
+        ('H&M', scrape_hm, 15),
+        ('Nordstrom', scrape_nordstrom, 15),
+        ('Forever21', scrape_forever21, 15),
+    ], query, workers=args.workers, sink=JsonlSink(stream_path('clothes_data')),
+        archive=archive, replay=bool(args.replay))
     
-    # Save results
-    if all_products:
+    # Save results: merge into the product store, export this run from it.
+    # Archived pages are not new sightings, so a replay stays out of the
+    # store, its price history and clothes_data.json
+    if all_products and args.replay:
+        print(f"\n[+] Replayed {len(all_products)} products, written only to {all_products.path}")
+    elif all_products:
+        store = ProductStore()
+        store.upsert(all_products)
+        duplicates = store.cluster()
         json_path = os.path.join(SCRIPT_DIR, 'clothes_data.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(all_products, f, indent=2, ensure_ascii=False)
-        print(f"\n[+] Saved {len(all_products)} products to clothes_data.json")
+        saved = store.export_json(json_path, since=run_started)
+        store.close()
+        print(f"\n[+] Saved {saved} products to clothes_data.json")
+        print(f"[+] {duplicates} products have near-duplicates across listings")
     else:
         print("\n[!] No products found")
     
+    report_readiness()
+    report_scrolling()
     print(f"\n[*] Done! Total: {len(all_products)} products")
 
 
@@ -0,0 +1,98 @@
+"""
+Resource Blocking Benchmark
+Loads the saved eBay page from a local fixture server, with its images,
+a web font, a video and a tracker script, with blocking on and off,
+and reports bytes transferred and page-load time. Needs Chrome.
+
+Usage: python benchmarks/bench_blocking.py [runs]
+"""
+
+import os
+import sys
+import re
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from driver_pool import create_driver
+from resource_blocking import blocked_patterns, set_blocking
+from fixture_server import FixtureServer
+
+FIXTURE = os.path.join(SCRIPT_DIR, 'fixtures', 'ebay_search.html')
+
+# Synthetic assets, sized like the real ones
+ASSETS = {
+    '/img.jpg': os.urandom(45 * 1024),
+    '/font/proxima.woff2': os.urandom(90 * 1024),
+    '/media/promo.mp4': os.urandom(2 * 1024 * 1024),
+    '/tracker/collect.js': b'(function(){var i=new Image();i.src="/tracker/pixel.gif";})();' + b' ' * 30000,
+}
+
+EXTRA_HEAD = '''
+  <style>@font-face { font-family: Proxima; src: url(/font/proxima.woff2) format("woff2"); }
+  body { font-family: Proxima, sans-serif; }</style>
+  <script src="/tracker/collect.js"></script>
+</head>'''
+
+EXTRA_BODY = '''
+  <video src="/media/promo.mp4" preload="auto" muted autoplay></video>
+</body>'''
+
+
+def build_page():
+    with open(FIXTURE, encoding='utf-8') as f:
+        html = f.read()
+    # Point every product image at the local server (unique URL per tile)
+    counter = iter(range(10000))
+    html = re.sub(r'src="https://i\.ebayimg\.com[^"]+"', lambda m: f'src="/img.jpg?n={next(counter)}"', html)
+    html = html.replace('</head>', EXTRA_HEAD, 1).replace('</body>', EXTRA_BODY, 1)
+    return html.encode('utf-8')
+
+
+def load(driver, server):
+    server.reset_counters()
+    start = time.perf_counter()
+    driver.get(server.url('/page.html'))
+    while driver.execute_script("return document.readyState") != 'complete':
+        time.sleep(0.02)
+    elapsed = time.perf_counter() - start
+    time.sleep(0.5)  # let late requests (video buffering, pixels) land
+    return server.bytes_sent, server.requests, elapsed
+
+
+def measure(driver, server, patterns, runs):
+    set_blocking(driver, patterns)
+    results = [load(driver, server) for _ in range(runs)]
+    return (sum(r[0] for r in results) / runs,
+            sum(r[1] for r in results) / runs,
+            sum(r[2] for r in results) / runs)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    routes = dict(ASSETS)
+    routes['/page.html'] = build_page()
+    routes['/tracker/pixel.gif'] = b'GIF89a' + b'\x00' * 40
+
+    print("[*] Starting Chrome...")
+    driver = create_driver()
+    try:
+        driver.execute_cdp_cmd('Network.setCacheDisabled', {'cacheDisabled': True})
+        with FixtureServer(routes) as server:
+            off = measure(driver, server, [], runs)
+            on = measure(driver, server, blocked_patterns(extra=['*/tracker/*']), runs)
+    finally:
+        driver.quit()
+
+    print(f"\n{'=' * 56}")
+    print(f"  {'':<14}{'bytes':>14}{'requests':>12}{'load time':>14}")
+    print(f"  {'blocking off':<14}{off[0] / 1024:>11.0f} KB{off[1]:>12.0f}{off[2] * 1000:>11.0f} ms")
+    print(f"  {'blocking on':<14}{on[0] / 1024:>11.0f} KB{on[1]:>12.0f}{on[2] * 1000:>11.0f} ms")
+    print(f"  Saved: {(1 - on[0] / off[0]) * 100:.0f}% of bytes, {(off[2] - on[2]) * 1000:.0f} ms per page")
+    print(f"{'=' * 56}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Near-Duplicate Benchmark
+Generates synthetic product names where each garment is listed several
+times with the edits marketplaces make (case, punctuation, an extra or
+missing word, a seller prefix), clusters them with dedup.cluster_ids() and
+reports time per stage plus how well the clusters match the truth.
+
+Usage: python benchmarks/bench_dedup.py [products] [listings_per_garment]
+"""
+
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+import dedup
+
+GENDERS = ["Men's", "Women's", "Mens", "Womens", "Unisex", "Boys", "Girls"]
+ADJECTIVES = ['Casual', 'Slim Fit', 'Regular Fit', 'Oversized', 'Vintage', 'Summer', 'Winter', 'Cotton',
+              'Linen', 'Denim', 'Floral', 'Striped', 'Plaid', 'Knitted', 'Waterproof', 'Lightweight']
+ITEMS = ['Shirt', 'T-Shirt', 'Hoodie', 'Jacket', 'Dress', 'Jeans', 'Chinos', 'Shorts', 'Sweater',
+         'Blazer', 'Coat', 'Polo', 'Cardigan', 'Skirt', 'Joggers', 'Vest']
+DETAILS = ['Long Sleeve', 'Short Sleeve', 'Button Down', 'Crew Neck', 'V Neck', 'Hooded', 'Zip Up',
+           'High Waist', 'Stretch', 'Pockets', 'Plus Size', 'S-XXL', 'Breathable', 'Loose']
+COLORS = ['Black', 'White', 'Navy', 'Khaki', 'Burgundy', 'Olive', 'Grey', 'Beige', 'Pink', 'Sky Blue',
+          'Mustard', 'Charcoal']
+BRANDS = ['Goodthreads', 'Amazon Essentials', 'Levis', 'Dickies', 'Carhartt', 'Gildan', 'Hanes', 'Uniqlo',
+          'Zaful', 'Romwe', 'Cider', 'Shein', 'Jack & Jones', 'Only', 'Vero Moda', 'Superdry']
+PREFIXES = ['NEW', '2024', 'Hot Sale', 'Free Shipping', 'Fashion']
+
+
+def garment(rnd, number):
+    words = ([rnd.choice(BRANDS), rnd.choice(GENDERS), rnd.choice(COLORS)] + rnd.sample(ADJECTIVES, 2)
+             + [rnd.choice(ITEMS)] + rnd.sample(DETAILS, 2))
+    return words + [f'Style {number}']   # a model number keeps unrelated garments apart
+
+
+def listing(rnd, words):
+    words = list(words)
+    edit = rnd.random()
+    if edit < 0.25:
+        words.insert(rnd.randrange(len(words)), rnd.choice(DETAILS))
+    elif edit < 0.4:
+        words.pop(rnd.randrange(1, len(words) - 1))
+    elif edit < 0.55:
+        words.insert(0, rnd.choice(PREFIXES))
+    name = ' '.join(words)
+    if rnd.random() < 0.3:
+        name = name.upper() if rnd.random() < 0.5 else name.lower()
+    if rnd.random() < 0.3:
+        name = name.replace(' ', rnd.choice([', ', ' - ', '  ']), 1)
+    return name
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    per_garment = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rnd = random.Random(5)
+    names, truth = [], []
+    number = 0
+    while len(names) < count:
+        words = garment(rnd, number)
+        for _ in range(min(rnd.randint(1, 2 * per_garment - 1), count - len(names))):
+            names.append(listing(rnd, words))
+            truth.append(number)
+        number += 1
+    truth = np.array(truth)
+
+    print(f"\n{'=' * 64}")
+    print(f"  {count:,} names, {number:,} garments")
+    start = time.perf_counter()
+    sigs = dedup.signatures(names)
+    signed = time.perf_counter()
+    left, right = dedup.candidate_pairs(sigs)
+    paired = time.perf_counter()
+    labels = dedup.components(count, left, right)
+    done = time.perf_counter()
+    print(f"  {'minhash signatures':<34}{signed - start:>8.2f}s {count / (signed - start):>12,.0f} names/s")
+    print(f"  {'lsh buckets + verify':<34}{paired - signed:>8.2f}s {len(left):>12,} pairs")
+    print(f"  {'connected components':<34}{done - paired:>8.2f}s")
+    print(f"  {'total':<34}{done - start:>8.2f}s {count / (done - start):>12,.0f} names/s")
+
+    # Pair-level quality on the found pairs and on every true pair
+    precision = (truth[left] == truth[right]).mean() if len(left) else 1.0
+    _, true_sizes = np.unique(truth, return_counts=True)
+    true_pairs = int((true_sizes * (true_sizes - 1) // 2).sum())
+    keys = labels.astype(np.int64) * (number + 1) + truth
+    _, together = np.unique(keys, return_counts=True)
+    found_pairs = int((together * (together - 1) // 2).sum())
+    clusters = len(np.unique(labels))
+    print(f"  {clusters:,} clusters; pair precision {precision:.3f}, "
+          f"recall {found_pairs / max(true_pairs, 1):.3f}")
+    print(f"{'=' * 64}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Extraction Benchmark
+Compares batched (one execute_script) vs per-element extraction
+on a saved eBay results page. Needs Chrome, runs fully offline.
+
+Usage: python benchmarks/bench_extraction.py [runs]
+"""
+
+import os
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from driver_pool import create_driver
+from extraction import SITES, extract_tiles_batched, extract_tiles_slow
+
+FIXTURE = os.path.join(SCRIPT_DIR, 'fixtures', 'ebay_search.html')
+
+
+def count_round_trips(driver):
+    """Wrap driver.execute so every WebDriver HTTP command is counted"""
+    counter = {'calls': 0}
+    original = driver.execute
+
+    def execute(*args, **kwargs):
+        counter['calls'] += 1
+        return original(*args, **kwargs)
+
+    driver.execute = execute
+    return counter
+
+
+def time_extractor(driver, counter, extractor, runs):
+    timings = []
+    rows = []
+    counter['calls'] = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        rows = extractor(driver, SITES['ebay'])
+        timings.append(time.perf_counter() - start)
+    return rows, sum(timings) / runs, counter['calls'] // runs
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    print("[*] Starting Chrome...")
+    driver = create_driver()
+    try:
+        driver.get('file://' + FIXTURE)
+        counter = count_round_trips(driver)
+
+        slow_rows, slow_time, slow_calls = time_extractor(driver, counter, extract_tiles_slow, runs)
+        fast_rows, fast_time, fast_calls = time_extractor(driver, counter, extract_tiles_batched, runs)
+    finally:
+        driver.quit()
+
+    print(f"\n{'=' * 50}")
+    print(f"  Tiles extracted:   {len(fast_rows)} (per-element: {len(slow_rows)})")
+    print(f"  Per-element path:  {slow_time * 1000:8.1f} ms  {slow_calls:5d} round-trips")
+    print(f"  Batched path:      {fast_time * 1000:8.1f} ms  {fast_calls:5d} round-trips")
+    print(f"  Speedup:           {slow_time / fast_time:8.1f}x")
+    print(f"  Same output:       {slow_rows == fast_rows}")
+    print(f"{'=' * 50}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Fetch Engine Benchmark
+Scrapes synthetic H&M category pages from a local stand-in server with
+the blocking requests engine and the async aiohttp engine, and reports
+pages/sec for each. Needs requests, beautifulsoup4, aiohttp.
+
+Usage: python benchmarks/bench_fetch.py [pages] [latency_ms]
+"""
+
+import asyncio
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from clothes_scraper import ClothingScraper
+from rate_limiter import get_limiter
+from fixture_server import FixtureServer
+
+
+def hm_page(tiles=36):
+    items = []
+    for i in range(tiles):
+        items.append(f'''
+      <article class="hm-product-item" data-articlecode="{1000000 + i}">
+        <div class="image-container"><a href="/en_us/productpage.{1000000 + i}.html" class="item-link">
+          <img class="item-image" src="//lp2.hm.com/hmgoepprod?set=source[/{i}.jpg]&amp;call=url[file:/product/main]" alt=""></a></div>
+        <div class="item-details">
+          <h3 class="item-heading"><a class="link" href="/en_us/productpage.{1000000 + i}.html">Regular Fit Oxford Shirt {i}</a></h3>
+          <strong class="item-price"><span class="price regular">$ {19 + i % 20}.99</span></strong>
+        </div>
+      </article>''')
+    return f'<html><body><ul class="products-listing small">{"".join(items)}</ul></body></html>'.encode('utf-8')
+
+
+def run_engine(scraper, url, pages, use_async):
+    scraper.clear_products()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        if use_async:
+            asyncio.run(scraper.scrape_hm_async(url, max_pages=pages))
+        else:
+            scraper.scrape_hm(url, max_pages=pages)
+    return time.perf_counter() - start, len(scraper.products)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 150) / 1000
+
+    # The stand-in server is local: lift the politeness limit for it
+    get_limiter().configure('127.0.0.1', rate=1000, burst=1000)
+
+    scraper = ClothingScraper(use_cache=False)
+    with FixtureServer({'/hm/category': hm_page()}, latency=latency) as server:
+        url = server.url('/hm/category')
+        sync_time, sync_count = run_engine(scraper, url, pages, use_async=False)
+        async_time, async_count = run_engine(scraper, url, pages, use_async=True)
+
+    print(f"\n{'=' * 50}")
+    print(f"  {pages} pages, {latency * 1000:.0f} ms server latency")
+    print(f"  requests engine: {pages / sync_time:7.1f} pages/s  ({sync_count} products)")
+    print(f"  aiohttp engine:  {pages / async_time:7.1f} pages/s  ({async_count} products)")
+    print(f"  Speedup:         {sync_time / async_time:7.1f}x")
+    print(f"{'=' * 50}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Price Normalization Benchmark
+Parses synthetic price strings in the shapes the scrapers collect (Amazon
+.a-offscreen and "$" + .a-price-whole, eBay ranges, H&M/Zara symbols,
+AliExpress localized formats, "N/A") with parse_price() in a loop and with
+normalize_prices(), and checks both agree.
+
+Usage: python benchmarks/bench_normalize.py [strings] [distinct_prices]
+"""
+
+import os
+import random
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from prices import normalize_prices, parse_price
+
+
+def price_strings(count, distinct, seed=11):
+    """count strings drawn from distinct base prices, the way a catalogue repeats price points"""
+    rnd = random.Random(seed)
+    bases = [(rnd.randint(1, 2999), rnd.randint(0, 99)) for _ in range(distinct)]
+    shapes = [
+        lambda w, c: f"${w}.{c:02d}",                                   # Amazon .a-offscreen
+        lambda w, c: f"${w:,}",                                         # Amazon "$" + .a-price-whole
+        lambda w, c: f"${w}.{c:02d} to ${w + 15}.{c:02d}",              # eBay range
+        lambda w, c: f"US ${w}.{c:02d}",                                # eBay international
+        lambda w, c: f"£{w}.{c:02d}",                                   # H&M UK
+        lambda w, c: f"{w:,}.{c:02d} EUR".replace(',', ' '),           # Zara EU
+        lambda w, c: f"€ {w:,}".replace(',', '.') + f",{c:02d}",        # AliExpress de/es
+        lambda w, c: f"{w:,}".replace(',', ' ') + f",{c:02d} zł",  # AliExpress pl
+        lambda w, c: f"{w} kr",                                         # H&M SE
+        lambda w, c: f"${w}.{c:02d} ({c % 60 + 10}% off)",              # discount badge
+        lambda w, c: "N/A",
+    ]
+    weights = [30, 10, 10, 5, 10, 10, 10, 5, 5, 5, 5]
+    picks = rnd.choices(range(len(shapes)), weights, k=count)
+    return [shapes[shape](*bases[rnd.randrange(distinct)]) for shape in picks]
+
+
+# Strings with a known parse, checked before timing
+KNOWN = [
+    ("$44.99", (4499, 4499, 'USD')),
+    ("US $12.50 to $19.99", (1250, 1999, 'USD')),
+    ("1.299,00 €", (129900, 129900, 'EUR')),
+    ("$19.99 (20% off)", (1999, 1999, 'USD')),
+    ("Save 15 % - £30", (3000, 3000, 'GBP')),
+    ("$21,474,836.47", (2147483647, 2147483647, 'USD')),
+    ("$25,000,000.00", None),
+    ("$19.99 SKU 123456789012", (1999, 1999, 'USD')),
+    ("N/A", None),
+]
+
+
+def check_known():
+    frame = normalize_prices([text for text, _ in KNOWN])
+    for i, (text, expected) in enumerate(KNOWN):
+        row = frame.iloc[i]
+        batch = None if row.isna()['min_cents'] else (int(row['min_cents']), int(row['max_cents']), row['currency'])
+        assert parse_price(text) == expected, (text, parse_price(text), expected)
+        assert batch == expected, (text, batch, expected)
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<34}{elapsed:>8.2f}s {count / elapsed:>12,.0f} strings/s")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    check_known()
+    texts = price_strings(count, distinct)
+
+    print(f"\n{'=' * 64}")
+    print(f"  {count:,} price strings, {len(set(texts)):,} distinct")
+    scalar = timed("parse_price loop", lambda: [parse_price(t) for t in texts], count)
+    frame = timed("normalize_prices", lambda: normalize_prices(texts), count)
+
+    low = frame['min_cents'].to_numpy(dtype='int64', na_value=-1)
+    high = frame['max_cents'].to_numpy(dtype='int64', na_value=-1)
+    currency = frame['currency'].tolist()
+    mismatches = sum(1 for i, p in enumerate(scalar)
+                     if (p or (-1, -1, None)) != (low[i], high[i], currency[i]))
+    print(f"  {frame['min_cents'].notna().sum():,} priced, {mismatches:,} mismatches with parse_price")
+    print(f"  currencies: {frame['currency'].value_counts().to_dict()}")
+    print(f"{'=' * 64}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Parquet Export Benchmark
+Writes synthetic products as JSON Lines and as the partitioned Parquet
+dataset, then compares size on disk, write time and the time to answer
+"eBay products under $20" from each.
+
+Usage: python benchmarks/bench_parquet.py [products]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+import pyarrow.dataset as ds
+
+from parquet_export import export_parquet, open_dataset
+from prices import parse_price
+from product import Product
+
+SOURCES = ['eBay', 'Etsy', 'ASOS', 'Zara', 'Shein', 'Amazon', 'H&M', 'AliExpress']
+DAYS = ['2026-10-16', '2026-10-17', '2026-10-18']
+PAGE = 60
+
+
+def products(count):
+    for start in range(0, count, PAGE):
+        source = SOURCES[start // PAGE % len(SOURCES)]
+        scraped_at = f"{DAYS[start // PAGE % len(DAYS)]}T12:00:{start % 60:02d}.000000"
+        for i in range(start, min(start + PAGE, count)):
+            extra = {'rating': f'{3 + i % 20 / 10} out of 5 stars', 'reviews': f'{i % 5000:,}'} \
+                if source == 'Amazon' else {}
+            yield Product(source, f'Regular Fit Oxford Shirt {i}', f'${5 + i % 90}.99',
+                          f'https://img.example.com/{i}.jpg', f'https://www.example.com/item/{i}',
+                          scraped_at, **extra)
+
+
+def size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def write_jsonl(path, count):
+    with open(path, 'w', encoding='utf-8') as f:
+        for product in products(count):
+            f.write(product.to_json() + '\n')
+
+
+def cheap_ebay_jsonl(path):
+    found = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            product = json.loads(line)
+            if product['source'] == 'eBay':
+                parsed = parse_price(product['price'])
+                if parsed and parsed[0] < 2000:
+                    found += 1
+    return found
+
+
+def cheap_ebay_parquet(path):
+    table = open_dataset(path).to_table(columns=['name', 'min_cents'],
+                                        filter=(ds.field('source') == 'eBay') & (ds.field('min_cents') < 2000))
+    return table.num_rows
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    workdir = tempfile.mkdtemp(prefix='bench_parquet_')
+    jsonl, parquet = os.path.join(workdir, 'products.jsonl'), os.path.join(workdir, 'products.parquet')
+    try:
+        _, jsonl_write = timed(lambda: write_jsonl(jsonl, count))
+        _, parquet_write = timed(lambda: export_parquet(products(count), parquet))
+        jsonl_found, jsonl_read = timed(lambda: cheap_ebay_jsonl(jsonl))
+        parquet_found, parquet_read = timed(lambda: cheap_ebay_parquet(parquet))
+        assert jsonl_found == parquet_found, (jsonl_found, parquet_found)
+
+        rows = [
+            ('size on disk (MB)', size(jsonl) / 1e6, size(parquet) / 1e6),
+            ('write (s)', jsonl_write, parquet_write),
+            ('eBay under $20 (s)', jsonl_read, parquet_read),
+        ]
+        print(f"\n{'=' * 64}")
+        print(f"  {count:,} products, {len(SOURCES)} sources, {len(DAYS)} days; {parquet_found:,} matches")
+        print(f"  {'':<24}{'JSONL':>12}{'Parquet':>12}{'ratio':>10}")
+        for label, old, new in rows:
+            print(f"  {label:<24}{old:>12.2f}{new:>12.2f}{old / new:>9.2f}x")
+        print(f"{'=' * 64}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
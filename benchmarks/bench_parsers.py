@@ -0,0 +1,179 @@
+"""
+Parser Backend Benchmark
+Parses multi-megabyte H&M, ASOS and Zara category pages (product grid plus
+the inline scripts, styles and SVG sprites real pages carry) with the old
+BeautifulSoup/html.parser code and each backend in html_parsers, and reports
+parse time and peak memory. Each case runs in its own process so peak RSS
+is per backend. Needs beautifulsoup4, lxml, cssselect; selectolax optional.
+
+Usage: python benchmarks/bench_parsers.py [tiles] [runs]
+"""
+
+from urllib.parse import urljoin
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+import html_parsers
+from html_parsers import PAGE_SITES, extract_page
+
+TILES = {
+    'hm': '''
+      <article class="hm-product-item" data-articlecode="{code}">
+        <div class="image-container"><a href="/en_us/productpage.{code}.html" class="item-link">
+          <img class="item-image" src="//lp2.hm.com/hmgoepprod?set=source[/{i}.jpg]" alt=""></a></div>
+        <div class="item-details">
+          <h3 class="item-heading"><a class="link" href="/en_us/productpage.{code}.html">Regular Fit Oxford Shirt {i}</a></h3>
+          <strong class="item-price"><span class="price regular">$ {dollars}.99</span></strong>
+          <ul class="list-swatches">{swatches}</ul>
+        </div>
+      </article>''',
+    'asos': '''
+      <article data-auto-id="productTile" class="productTile_U0clN" id="product-{code}">
+        <a class="productLink_KM4PI" href="/asos-design/asos-design-relaxed-shirt/prd/{code}">
+          <div class="productMediaContainer_kmkXR"><img src="https://images.asos-media.com/products/{code}-1" alt=""></div>
+          <p class="productDescription_sryaw">ASOS DESIGN relaxed shirt {i}</p>
+          <p class="container_s8SSI"><span class="price__B9LP">£{dollars}.00</span></p>
+          <ul class="swatches">{swatches}</ul>
+        </a>
+      </article>''',
+    'zara': '''
+      <li class="product-grid-product" data-productid="{code}">
+        <a class="product-link _item product-grid-product__link" href="/us/en/textured-shirt-p0{code}.html">
+          <img class="media-image__image" src="https://static.zara.net/photos/{code}.jpg" alt=""></a>
+        <div class="product-grid-product-info">
+          <a class="product-grid-product-info__name" href="/us/en/textured-shirt-p0{code}.html"><h2>TEXTURED SHIRT {i}</h2></a>
+          <span class="money-amount__main">{dollars}.90 USD</span>
+          <ul class="swatches">{swatches}</ul>
+        </div>
+      </li>''',
+}
+
+
+def category_page(site, tiles):
+    """Synthetic category page: product grid wrapped in the usual framework noise"""
+    rnd = random.Random(42)
+    swatch = '<li class="swatch"><span style="background:#%06x"></span></li>'
+    grid = ''.join(TILES[site].format(
+        i=i, code=1000000 + i, dollars=10 + i % 60,
+        swatches=''.join(swatch % rnd.randrange(0xffffff) for _ in range(4))) for i in range(tiles))
+    state = json.dumps({'products': [{'id': i, 'name': f'Item {i}', 'tracking': 'x' * 300,
+                                      'variants': list(range(20))} for i in range(tiles)]})
+    bundle = 'function a(){return 1}\n' * 40000
+    css = ''.join(f'.c{i}{{margin:{i % 9}px;color:#{i % 999:03d}}}\n' for i in range(20000))
+    sprite = ''.join(f'<symbol id="i{i}"><path d="M{i} 0L{i} 24Z"/></symbol>' for i in range(3000))
+    nav = ''.join(f'<li class="nav-item"><a href="/c/{i}">Category {i}</a><!-- menu {i} --></li>' for i in range(800))
+    return (f'<!DOCTYPE html><html><head><style>{css}</style><script>{bundle}</script></head><body>'
+            f'<svg style="display:none">{sprite}</svg><nav><ul>{nav}</ul></nav>'
+            f'<main><ul class="product-grid">{grid}</ul></main>'
+            f'<script id="__NEXT_DATA__" type="application/json">{state}</script></body></html>')
+
+
+# The parsers as they were before html_parsers: html.parser plus regex class_ scans
+def legacy_parse(site, html, url):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+    rules = {
+        'hm': (('article', r'product-item'), ('li', r'product'), ['h2', 'h3', 'a'], r'link|title|name',
+               ['span', 'div'], r'price', None),
+        'asos': (None, ('div', r'product'), ['h2', 'p', 'div'], r'title|name|description',
+                 ['span', 'p'], r'price', 'https://www.asos.com'),
+        'zara': (('li', r'product'), ('div', r'product-grid-product'), ['a', 'span', 'h2'], r'name|title|link',
+                 ['span', 'div'], r'price|money', 'https://www.zara.com'),
+    }[site]
+    first, second, name_tags, name_re, price_tags, price_re, base = rules
+    if site == 'asos':
+        products = soup.find_all('article', {'data-auto-id': 'productTile'})
+    else:
+        products = soup.find_all(first[0], class_=re.compile(first[1]))
+    if not products:
+        products = soup.find_all(second[0], class_=re.compile(second[1]))
+    results = []
+    for product in products:
+        name_elem = product.find(name_tags, class_=re.compile(name_re))
+        price_elem = product.find(price_tags, class_=re.compile(price_re))
+        image_elem = product.find('img')
+        link_elem = product.find('a', href=True)
+        if name_elem:
+            results.append({
+                'name': name_elem.get_text(strip=True),
+                'price': price_elem.get_text(strip=True) if price_elem else 'N/A',
+                'image': image_elem.get('src') or image_elem.get('data-src') if image_elem else 'N/A',
+                'url': urljoin(base or url, link_elem['href']) if link_elem else 'N/A',
+            })
+    return results
+
+
+def run_case(backend, prefilter, tiles, runs):
+    """One backend over every site page: mean parse time, tracemalloc peak, product count"""
+    pages = {site: category_page(site, tiles) for site in TILES}
+    url = 'https://www.example.com/category'
+    timings, peaks, counts = {}, {}, {}
+    for site, html in pages.items():
+        parse = ((lambda: legacy_parse(site, html, url)) if backend == 'legacy'
+                 else (lambda: extract_page(html, url, PAGE_SITES[site], backend, prefilter)))
+        parse()  # warm up: imports, compiled selectors
+        tracemalloc.start()
+        products = parse()
+        peaks[site] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            parse()
+        timings[site] = (time.perf_counter() - start) / runs
+        counts[site] = len(products)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    return {'timings': timings, 'peaks': peaks, 'counts': counts, 'rss_mb': rss,
+            'page_mb': {site: len(html.encode()) / 1e6 for site, html in pages.items()}}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--case':
+        backend, prefilter, tiles, runs = sys.argv[2], sys.argv[3] == '1', int(sys.argv[4]), int(sys.argv[5])
+        print(json.dumps(run_case(backend, prefilter, tiles, runs)))
+        return
+
+    tiles = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    cases = [('legacy', False), ('bs4', True)]
+    if html_parsers.CSSSelector is not None:
+        cases += [('lxml', False), ('lxml', True)]
+    if html_parsers.LexborHTMLParser is not None:
+        cases += [('selectolax', False), ('selectolax', True)]
+
+    results = []
+    for backend, prefilter in cases:
+        label = f"{backend}{' +prefilter' if prefilter else ''}"
+        print(f"[*] {label}...")
+        output = subprocess.run([sys.executable, __file__, '--case', backend, '1' if prefilter else '0',
+                                 str(tiles), str(runs)], capture_output=True, text=True, check=True).stdout
+        results.append((label, json.loads(output)))
+
+    sizes = results[0][1]['page_mb']
+    print(f"\n{'=' * 78}")
+    print(f"  {tiles} tiles per page, pages: " + ', '.join(f"{s} {mb:.1f} MB" for s, mb in sizes.items()))
+    print(f"  {'backend':<22}" + ''.join(f"{site + ' ms':>10}" for site in TILES)
+          + f"{'py peak':>11}{'max RSS':>11}{'products':>10}")
+    base = sum(results[0][1]['timings'].values())
+    for label, r in results:
+        peak = max(r['peaks'].values()) / 1e6
+        print(f"  {label:<22}" + ''.join(f"{r['timings'][site] * 1000:>10.0f}" for site in TILES)
+              + f"{peak:>8.1f} MB{r['rss_mb']:>8.0f} MB{sum(r['counts'].values()):>10}"
+              + f"   x{base / sum(r['timings'].values()):.1f}")
+    print("  py peak is tracemalloc (Python heap only; lxml/lexbor trees live in C, see max RSS)")
+    print(f"{'=' * 78}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Price History Benchmark
+Fills a temporary product store with synthetic price observations spread
+over the last 60 days, then times the "dropped >20% this week" query before
+and after old observations are downsampled to daily min/max. Checks first
+that an oversized price is skipped rather than failing the save.
+
+Usage: python benchmarks/bench_prices.py [products] [observations_per_product]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from product_store import ProductStore, product_id
+from price_history import DAY
+
+
+def timed(label, fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<40}{elapsed * 1000:>10.1f} ms")
+    return result
+
+
+def check_oversized():
+    """A mis-scraped price too large for the int32 record must not abort the batch"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProductStore(os.path.join(tmp, 'check.db'))
+        store.upsert([
+            {'source': 'eBay', 'name': 'Shirt', 'price': '$25,000,000.00', 'url': 'https://www.ebay.com/itm/1'},
+            {'source': 'eBay', 'name': 'Tee', 'price': '$19.99', 'url': 'https://www.ebay.com/itm/2'},
+        ])
+        assert len(list(store.query())) == 2
+        assert [tuple(row)[2:4] for row in store.prices.load()] == [(1999, 1999)]
+        store.close()
+
+
+def main():
+    products = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    per_product = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    now = int(time.time())
+    rnd = random.Random(7)
+    check_oversized()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProductStore(os.path.join(tmp, 'bench.db'))
+        start = time.perf_counter()
+        rows, observations = [], []
+        for i in range(products):
+            url = f'https://www.ebay.com/itm/{i}'
+            pid = product_id(url)
+            rows.append((url, pid, 'eBay', f'Shirt {i}', None, None, None, None, None, None))
+            base = rnd.randint(500, 20000)
+            # ~5% of products get a >20% cut in the last few days
+            cut = rnd.random() < 0.05
+            for k in range(per_product):
+                ts = now - rnd.randint(0, 60 * DAY)
+                price = base if not (cut and ts > now - 3 * DAY) else int(base * 0.7)
+                observations.append((pid, ts, price, price, 0))
+        with store.db:
+            store.db.executemany("INSERT OR IGNORE INTO products (url, id, source, name, price, image, extra, "
+                                 "scraped_at, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        record_start = time.perf_counter()
+        store.prices.record(observations)
+        elapsed = time.perf_counter() - record_start
+        total = len(store.prices.load())
+
+        print(f"\n{'=' * 64}")
+        print(f"  {products:,} products, {total:,} observations over 60 days")
+        print(f"  {'record':<40}{elapsed * 1000:>10.1f} ms  ({total / elapsed:,.0f} rows/s)")
+        print(f"  {'(products setup)':<40}{(record_start - start) * 1000:>10.1f} ms")
+        hits = timed("drops >20% in 7 days (raw)", lambda: store.prices.drops(20, 7, now), repeat=5)
+        removed = timed("downsample older than 30 days", lambda: store.prices.downsample(30, now))
+        left = len(store.prices.load())
+        timed("drops >20% in 7 days (downsampled)", lambda: store.prices.drops(20, 7, now), repeat=5)
+        named = timed("price_drops with names", lambda: store.price_drops(20, 7, now))
+        store.close()
+        size = sum(os.path.getsize(path) for paths in store.prices.days().values() for path in paths)
+        print(f"  {len(hits):,} products dropped; {removed:,} raw rows folded, {left:,} rows left; "
+              f"segments {size / 1e6:.0f} MB")
+        if named:
+            print(f"  e.g. {named[0]['name']}: ${named[0]['was']:.2f} -> ${named[0]['now']:.2f} (-{named[0]['drop']}%)")
+        print(f"{'=' * 64}")
+
+
+if __name__ == "__main__":
+    main()
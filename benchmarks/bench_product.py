@@ -0,0 +1,121 @@
+"""
+Product Record Benchmark
+Builds 100k products the old way (a dict per item, datetime.now() per item)
+and as Product records (one timestamp per 60-item page), then compares
+memory held, build time and JSONL/CSV serialization time.
+
+Usage: python benchmarks/bench_product.py [products]
+"""
+
+from datetime import datetime
+import csv
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from product import FIELDS, Product, stamp
+
+SOURCES = ['eBay', 'Etsy', 'ASOS', 'Zara', 'Shein', 'Amazon', 'H&M', 'AliExpress']
+PAGE = 60
+
+
+def tiles(count):
+    """What extract_tiles hands the scrapers: fresh strings per item"""
+    return [{'name': f'Regular Fit Oxford Shirt {i}', 'price': f'${10 + i % 90}.99',
+             'image': f'https://img.example.com/{i}.jpg', 'url': f'https://www.example.com/item/{i}'}
+            for i in range(count)]
+
+
+def build_dicts(items):
+    products = []
+    for i, item in enumerate(items):
+        products.append({
+            'source': ''.join(SOURCES[i // PAGE % len(SOURCES)]),   # a new str, as read from a page
+            'name': item['name'],
+            'price': item['price'],
+            'image': item['image'],
+            'url': item['url'],
+            'scraped_at': datetime.now().isoformat()
+        })
+    return products
+
+
+def build_records(items):
+    products = []
+    for start in range(0, len(items), PAGE):
+        scraped_at = stamp()
+        for i, item in enumerate(items[start:start + PAGE], start):
+            products.append(Product(
+                source=''.join(SOURCES[i // PAGE % len(SOURCES)]),
+                name=item['name'],
+                price=item['price'],
+                image=item['image'],
+                url=item['url'],
+                scraped_at=scraped_at
+            ))
+    return products
+
+
+def measure(build, items):
+    """(products, seconds, bytes still allocated by the build); timed without tracemalloc running"""
+    start = time.perf_counter()
+    build(items)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    products = build(items)
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return products, elapsed, held
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def to_csv_dicts(products):
+    writer = csv.DictWriter(io.StringIO(), fieldnames=FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(products)
+
+
+def to_csv_records(products):
+    writer = csv.writer(io.StringIO())
+    writer.writerow(FIELDS)
+    writer.writerows(product.row(FIELDS) for product in products)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    items = tiles(count)
+
+    dicts, dict_build, dict_bytes = measure(build_dicts, items)
+    records, record_build, record_bytes = measure(build_records, items)
+    assert [json.loads(p.to_json()) for p in records[:100]] == [
+        {**d, 'scraped_at': r.scraped_at} for d, r in zip(dicts[:100], records[:100])]
+
+    rows = [
+        ('held in memory (MB)', dict_bytes / 1e6, record_bytes / 1e6),
+        ('build (ms)', dict_build * 1000, record_build * 1000),
+        ('JSONL lines (ms)', timed(lambda: [json.dumps(p, ensure_ascii=False) for p in dicts]) * 1000,
+         timed(lambda: [p.to_json() for p in records]) * 1000),
+        ('CSV rows (ms)', timed(lambda: to_csv_dicts(dicts)) * 1000,
+         timed(lambda: to_csv_records(records)) * 1000),
+    ]
+    print(f"\n{'=' * 64}")
+    print(f"  {count:,} products, {PAGE} per page")
+    print(f"  {'':<24}{'dict':>12}{'Product':>12}{'ratio':>10}")
+    for label, old, new in rows:
+        print(f"  {label:<24}{old:>12.1f}{new:>12.1f}{old / new:>9.2f}x")
+    print(f"{'=' * 64}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Product Store Benchmark
+Bulk-loads synthetic products into a fresh ProductStore, upserts the same
+products again (every row a conflict), and times the exports' queries.
+Uses a temporary database, never products.db.
+
+Usage: python benchmarks/bench_store.py [rows] [batch_size]
+"""
+
+from datetime import datetime, timedelta
+import os
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from product_store import ProductStore
+
+SOURCES = ['eBay', 'Etsy', 'ASOS', 'Zara', 'Shein', 'Amazon', 'H&M', 'AliExpress']
+
+
+def products(rows, start, step_seconds=1):
+    for i in range(rows):
+        source = SOURCES[i % len(SOURCES)]
+        yield {
+            'source': source,
+            'name': f'{source} Regular Fit Oxford Shirt {i}',
+            'price': f'${10 + i % 90}.99',
+            'image': f'https://img.example.com/{i}.jpg',
+            'url': f'https://www.{source.lower().replace("&", "")}.com/item/{i}?utm_source=x&hash=item{i}',
+            'scraped_at': (start + timedelta(seconds=i * step_seconds)).isoformat(),
+        }
+
+
+def timed(label, rows, fn):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    rate = f"{rows / elapsed:>12,.0f} rows/s" if rows else ''
+    print(f"  {label:<34}{elapsed:>8.2f}s {rate}")
+    return result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        store = ProductStore(path, batch_size=batch_size)
+        day = datetime(2026, 1, 1)
+
+        print(f"\n{'=' * 64}")
+        print(f"  {rows:,} products, batches of {batch_size}")
+        timed("insert (new rows)", rows, lambda: store.upsert(products(rows, day)))
+        timed("upsert (all conflicts)", rows, lambda: store.upsert(products(rows, day + timedelta(days=1))))
+        timed("count", 0, store.count)
+        timed("counts_by_source", 0, store.counts_by_source)
+        cutoff = (day + timedelta(days=1, seconds=rows - rows // 100)).isoformat()
+        recent = timed("query last 1% (since=)", 0, lambda: sum(1 for _ in store.query(since=cutoff)))
+        one = timed("query one source", 0, lambda: sum(1 for _ in store.query(source='Zara')))
+        json_path = os.path.join(tmp, 'out.json')
+        timed("export_json one source", one, lambda: store.export_json(json_path, source='Zara'))
+        store.close()
+        size = sum(os.path.getsize(os.path.join(tmp, f)) for f in os.listdir(tmp) if f.startswith('bench.db'))
+        print(f"  rows: {rows:,} stored, {recent:,} in last 1%, {one:,} Zara; db {size / 1e6:.0f} MB")
+        print(f"{'=' * 64}")
+
+
+if __name__ == "__main__":
+    main()
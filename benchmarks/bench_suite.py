@@ -0,0 +1,352 @@
+"""
+Offline Benchmark Suite
+Runs the site extractors of every scraper against recorded pages in
+benchmarks/fixtures/, served by a local fixture server: browser navigations
+to the live sites are redirected to the matching page and Chrome resolves no
+other host, so nothing leaves the machine. Pacing sleeps and rate limits are
+skipped (--keep-sleeps restores them). Reports pages/s, extraction time per
+product, WebDriver round-trips and peak RSS per case and saves them as JSON
+so runs can be compared. Browser cases need Chrome; the requests cases don't.
+
+Usage: python benchmarks/bench_suite.py [--only ebay,clothes_scraper] [--compare results/old.json]
+       python benchmarks/bench_suite.py --record ebay,hm   (save live pages over the fixtures)
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime
+from urllib.parse import urlsplit
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from fixture_server import FIXTURE_DIR, FixtureServer
+
+RESULTS_DIR = os.path.join(SCRIPT_DIR, 'results')
+QUERY = 'men shirts'
+
+# site: (host part of the live URL, fixture file, live page --record saves)
+FIXTURES = {
+    'ebay': ('ebay.com', 'ebay_search.html', 'https://www.ebay.com/sch/i.html?_nkw=men+shirts&_sacat=11450'),
+    'etsy': ('etsy.com', 'etsy_search.html', 'https://www.etsy.com/search?q=vintage+shirts&explicit=1'),
+    'depop': ('depop.com', 'depop_search.html', 'https://www.depop.com/search/?q=vintage'),
+    'shein': ('shein.com', 'shein_search.html', 'https://us.shein.com/pdsearch/dresses/'),
+    'asos': ('asos.com', 'asos_search.html', 'https://www.asos.com/us/search/?q=men+shirts'),
+    'zara': ('zara.com', 'zara_search.html', 'https://www.zara.com/us/en/search?searchTerm=shirts&section=MAN'),
+    'aliexpress': ('aliexpress.', 'aliexpress_search.html', 'https://www.aliexpress.com/w/wholesale-t-shirts.html'),
+    'hm': ('hm.com', 'hm_search.html', 'https://www2.hm.com/en_us/search-results.html?q=men+shirts'),
+    'nordstrom': ('nordstrom.com', 'nordstrom_search.html', 'https://www.nordstrom.com/sr?keyword=men+shirts'),
+    'forever21': ('forever21.com', 'forever21_search.html', 'https://www.forever21.com/us/shop/search/men%20shirts'),
+    'amazon': ('amazon.com', 'amazon_search.html', 'https://www.amazon.com/s?k=men+shirts'),
+}
+
+# case: (site, module, class or None for fn(driver, query, ...), method, kwargs)
+# clothes_scraper cases fetch the fixture over plain HTTP; the rest drive Chrome
+CASES = {
+    'clothes_scraper.hm': ('hm', 'clothes_scraper', 'ClothingScraper', 'scrape_hm', {'max_pages': 10}),
+    'clothes_scraper.asos': ('asos', 'clothes_scraper', 'ClothingScraper', 'scrape_asos', {'max_pages': 10}),
+    'clothes_scraper.zara': ('zara', 'clothes_scraper', 'ClothingScraper', 'scrape_zara', {}),
+    'multi_scraper.ebay': ('ebay', 'multi_scraper', 'MultiSiteScraper', 'scrape_ebay', {'max_items': 100}),
+    'multi_scraper.etsy': ('etsy', 'multi_scraper', 'MultiSiteScraper', 'scrape_etsy', {'max_items': 100}),
+    'multi_scraper.depop': ('depop', 'multi_scraper', 'MultiSiteScraper', 'scrape_depop', {'max_items': 100}),
+    'multi_scraper.shein': ('shein', 'multi_scraper', 'MultiSiteScraper', 'scrape_shein', {'max_items': 100}),
+    'multi_scraper.asos': ('asos', 'multi_scraper', 'MultiSiteScraper', 'scrape_asos', {'max_items': 100}),
+    'multi_scraper.zara': ('zara', 'multi_scraper', 'MultiSiteScraper', 'scrape_zara', {'max_items': 100}),
+    'combined_scraper.asos': ('asos', 'combined_scraper', None, 'scrape_asos', {'max_items': 100}),
+    'combined_scraper.aliexpress': ('aliexpress', 'combined_scraper', None, 'scrape_aliexpress', {'max_items': 100}),
+    'combined_scraper.ebay': ('ebay', 'combined_scraper', None, 'scrape_ebay', {'max_items': 100}),
+    'combined_scraper.shein': ('shein', 'combined_scraper', None, 'scrape_shein', {'max_items': 100}),
+    'auto_scraper.asos': ('asos', 'auto_scraper', None, 'scrape_asos', {'max_items': 100}),
+    'auto_scraper.hm': ('hm', 'auto_scraper', None, 'scrape_hm', {'max_items': 100}),
+    'auto_scraper.nordstrom': ('nordstrom', 'auto_scraper', None, 'scrape_nordstrom', {'max_items': 100}),
+    'auto_scraper.forever21': ('forever21', 'auto_scraper', None, 'scrape_forever21', {'max_items': 100}),
+    'smart_scraper.amazon': ('amazon', 'smart_scraper', 'SmartClothingScraper', 'scrape_amazon', {'max_pages': 2}),
+    'smart_scraper.ebay': ('ebay', 'smart_scraper', 'SmartClothingScraper', 'scrape_ebay', {'max_pages': 2}),
+    'smart_scraper.aliexpress': ('aliexpress', 'smart_scraper', 'SmartClothingScraper', 'scrape_aliexpress',
+                                 {'max_pages': 1}),
+    'amazon_scraper.amazon': ('amazon', 'amazon_scraper', 'AmazonScraper', 'scrape_amazon', {'max_pages': 2}),
+}
+HTTP_MODULES = {'clothes_scraper'}
+
+
+class SkippedSleeps:
+    """Stands in for the time module inside a scraper: sleep() only adds up what it would have slept"""
+
+    def __init__(self):
+        self.skipped = 0.0
+
+    def sleep(self, seconds):
+        self.skipped += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class Extractor:
+    """Wraps a scraper's extract function to time it and count the rows it returns"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.seconds = 0.0
+        self.rows = 0
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self.fn(*args, **kwargs)
+        self.seconds += time.perf_counter() - start
+        self.rows += len(rows)
+        return rows
+
+
+def fixture_url(server, url):
+    """The fixture server URL standing in for a live page, or None for hosts without a fixture"""
+    parts = urlsplit(url)
+    for host, fixture, _ in FIXTURES.values():
+        if host in (parts.hostname or ''):
+            return server.url('/' + fixture + ('?' + parts.query if parts.query else ''))
+    return None
+
+
+def replay_drivers(server, counter):
+    """
+    Make the driver pool start Chrome with every host but 127.0.0.1 unresolvable,
+    and wrap each driver's execute() to count WebDriver round-trips and send
+    navigations to the live sites to their fixtures instead
+    """
+    import driver_pool
+    from selenium.webdriver.remote.command import Command
+
+    build_options, create_driver = driver_pool.build_options, driver_pool.create_driver
+
+    def offline_options(headless=True):
+        options = build_options(headless)
+        options.add_argument('--host-resolver-rules=MAP * ~NOTFOUND, EXCLUDE 127.0.0.1')
+        return options
+
+    def replay_driver(headless=True):
+        driver = create_driver(headless)
+        execute = driver.execute
+
+        def counted(command, params=None):
+            counter['round_trips'] += 1
+            if command == Command.GET and params:
+                params = dict(params, url=fixture_url(server, params['url']) or params['url'])
+            return execute(command, params)
+
+        driver.execute = counted
+        return driver
+
+    driver_pool.build_options = offline_options
+    driver_pool.create_driver = replay_driver
+
+
+def run_case(name, keep_sleeps):
+    """One case in this process; returns its result dict"""
+    import importlib
+    import output_sink
+    import rate_limiter
+
+    site, module_name, class_name, method, kwargs = CASES[name]
+    http = module_name in HTTP_MODULES
+    result = {'case': name, 'site': site, 'kind': 'http' if http else 'browser'}
+    log = io.StringIO()
+    streams = tempfile.mkdtemp(prefix='bench_suite_')
+    output_sink.STREAM_DIR = streams
+
+    # Lift the politeness limits: every request goes to the local server
+    for _, _, live_url in FIXTURES.values():
+        rate_limiter.get_limiter().configure(rate_limiter.domain_of(live_url), rate=1000, burst=1000)
+    rate_limiter.get_limiter().configure('127.0.0.1', rate=1000, burst=1000)
+
+    counter = {'round_trips': 0}
+    with open(os.path.join(FIXTURE_DIR, FIXTURES['amazon'][1]), 'rb') as f:
+        amazon_page = f.read()
+    server = FixtureServer({'/s': amazon_page})   # where Amazon's search form and Next link go
+    try:
+        with server, redirect_stdout(log):
+            if not http:
+                replay_drivers(server, counter)
+            module = importlib.import_module(module_name)
+            if module_name == 'amazon_scraper':
+                module.USE_UNDETECTED = False   # stay on the pooled, replaying Chrome
+            sleeps = SkippedSleeps()
+            if not keep_sleeps:
+                module.time = sleeps
+            extractor = Extractor(getattr(module, 'extract_page' if http else 'extract_tiles'))
+            setattr(module, 'extract_page' if http else 'extract_tiles', extractor)
+
+            if not http:
+                from driver_pool import get_pool
+                pool = get_pool(True)
+                pool.release(pool.acquire())   # Chrome's cold start is not part of the case
+            counter['round_trips'] = 0
+            server.reset_counters()
+
+            instance = None
+            start = time.perf_counter()
+            if class_name is None:
+                with pool.lease() as driver:
+                    products = getattr(module, method)(driver, QUERY, **kwargs)
+            else:
+                if http:
+                    instance = getattr(module, class_name)(use_cache=False)
+                    products = getattr(instance, method)(server.url('/' + FIXTURES[site][1]), **kwargs)
+                else:
+                    instance = getattr(module, class_name)(headless=True)
+                    getattr(instance, method)(QUERY, **kwargs)
+                    products = instance.products
+            seconds = time.perf_counter() - start
+            count = len(products)
+            if instance is not None and hasattr(instance, 'close'):
+                instance.close()
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {str(e).splitlines()[0][:120] if str(e) else ''}"
+        return result
+    finally:
+        if not http:
+            import driver_pool
+            driver_pool.shutdown()
+        shutil.rmtree(streams, ignore_errors=True)
+
+    if not count:
+        lines = [line for line in log.getvalue().splitlines() if line.strip()]
+        result['error'] = 'no products: ' + (lines[-1].strip()[:120] if lines else 'nothing logged')
+        return result
+
+    result.update({
+        'pages': server.pages,
+        'products': count,
+        'seconds': seconds,
+        'pages_per_s': server.pages / seconds,
+        'extract_rows': extractor.rows,
+        'extract_ms_per_product': extractor.seconds * 1000 / max(extractor.rows, 1),
+        'round_trips': counter['round_trips'],
+        'round_trips_per_page': counter['round_trips'] / max(server.pages, 1),
+        'skipped_sleep_s': sleeps.skipped,
+        'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,          # KB on Linux
+        'browser_rss_mb': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+    })
+    return result
+
+
+def record(sites):
+    """Save the live pages for sites over their fixtures (needs Chrome and the network)"""
+    from driver_pool import create_driver
+    from hidden_state import STATE_SITES
+    from html_parsers import strip_noise
+    from readiness import wait_for_page
+
+    driver = create_driver()
+    try:
+        for site in sites:
+            _, fixture, url = FIXTURES[site]
+            driver.get(url)
+            ready = wait_for_page(driver, site)
+            # pages with embedded product JSON keep their scripts, the blob is in one
+            keep = site in STATE_SITES
+            html = driver.page_source if keep else strip_noise(driver.page_source)
+            comment = (f"<!-- Saved {site} page from {url} on {datetime.now():%Y-%m-%d}"
+                       f"{'' if keep else ', scripts and styles trimmed'} -->\n")
+            with open(os.path.join(FIXTURE_DIR, fixture), 'w', encoding='utf-8') as f:
+                f.write(comment + html)
+            print(f"[+] {site}: {len(html) / 1024:.0f} KB -> fixtures/{fixture}"
+                  + ('' if ready else ' (no product tiles found, check the page)'))
+    finally:
+        driver.quit()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def selected(only):
+    if not only:
+        return list(CASES)
+    wanted = only.split(',')
+    return [name for name in CASES
+            if any(w in (name, CASES[name][0], CASES[name][1]) for w in wanted)]
+
+
+def print_results(results, previous=None):
+    before = {r['case']: r for r in previous['cases'] if 'error' not in r} if previous else {}
+    print(f"\n{'=' * 100}")
+    print(f"  {'case':<30}{'pages/s':>9}{'ms/product':>12}{'trips/page':>12}{'RSS MB':>9}"
+          f"{'Chrome MB':>11}{'products':>10}{'vs before':>14}")
+    for r in results:
+        if 'error' in r:
+            print(f"  {r['case']:<30}  skipped - {r['error']}")
+            continue
+        change = ''
+        if r['case'] in before:
+            change = f"x{r['pages_per_s'] / before[r['case']]['pages_per_s']:.2f} pages/s"
+        print(f"  {r['case']:<30}{r['pages_per_s']:>9.1f}{r['extract_ms_per_product']:>12.3f}"
+              f"{r['round_trips_per_page']:>12.1f}{r['rss_mb']:>9.0f}{r['browser_rss_mb']:>11.0f}"
+              f"{r['products']:>10}{change:>14}")
+    print(f"{'=' * 100}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark suite for the site extractors')
+    parser.add_argument('--only', help='comma-separated case names, sites or modules')
+    parser.add_argument('--keep-sleeps', action='store_true', help='keep pacing sleeps and rate limits')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/suite-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare pages/s against')
+    parser.add_argument('--record', help='comma-separated sites to save live pages for, then exit')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        print(json.dumps(run_case(args.case, args.keep_sleeps)))
+        return
+    if args.record:
+        record(args.record.split(','))
+        return
+
+    results = []
+    for name in selected(args.only):
+        print(f"[*] {name}...")
+        command = [sys.executable, __file__, '--case', name] + (['--keep-sleeps'] if args.keep_sleeps else [])
+        done = subprocess.run(command, capture_output=True, text=True)
+        try:
+            results.append(json.loads(done.stdout.strip().splitlines()[-1]))
+        except (IndexError, ValueError):
+            error = (done.stderr.strip().splitlines() or ['no output'])[-1]
+            results.append({'case': name, 'site': CASES[name][0], 'error': error[:120]})
+
+    run = {
+        'started': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'keep_sleeps': args.keep_sleeps,
+        'cases': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"suite-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(run, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+    print_results(results, previous)
+    print(f"[*] Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
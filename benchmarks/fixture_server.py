@@ -0,0 +1,111 @@
+"""
+Local Fixture Server
+Serves recorded pages and synthetic assets on 127.0.0.1 for offline
+benchmarks, and counts the bytes and pages it sends
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import os
+import threading
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(SCRIPT_DIR, 'fixtures')
+
+CONTENT_TYPES = {
+    '.html': 'text/html; charset=utf-8',
+    '.json': 'application/json',
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+    '.jpg': 'image/jpeg',
+    '.webp': 'image/webp',
+    '.woff2': 'font/woff2',
+    '.mp4': 'video/mp4',
+}
+
+
+class FixtureServer:
+    """
+    server = FixtureServer(routes={'/page': b'<html>...'})
+    with server:
+        driver.get(server.url('/page'))
+    print(server.bytes_sent, server.pages)
+
+    Paths not in routes are served from benchmarks/fixtures/.
+    A route value may be bytes or a callable returning bytes.
+    """
+
+    def __init__(self, routes=None, latency=0.0):
+        self.routes = dict(routes or {})
+        self.latency = latency
+        self.bytes_sent = 0
+        self.requests = 0
+        self.pages = 0           # HTML responses, i.e. page loads rather than assets
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.port = self.httpd.server_address[1]
+        self.thread = None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True   # headers and body go out as separate writes
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                body = server.routes.get(path)
+                if callable(body):
+                    body = body()
+                if body is None:
+                    file_path = os.path.normpath(os.path.join(FIXTURE_DIR, path.lstrip('/')))
+                    if file_path.startswith(FIXTURE_DIR) and os.path.isfile(file_path):
+                        with open(file_path, 'rb') as f:
+                            body = f.read()
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                if server.latency:
+                    threading.Event().wait(server.latency)
+
+                content_type = CONTENT_TYPES.get(os.path.splitext(path)[1], 'text/html; charset=utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-store')
+                self.end_headers()
+                self.wfile.write(body)
+                with server.lock:
+                    server.bytes_sent += len(body)
+                    server.requests += 1
+                    server.pages += content_type.startswith('text/html')
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def url(self, path='/'):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def reset_counters(self):
+        with self.lock:
+            self.bytes_sent = 0
+            self.requests = 0
+            self.pages = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,157 @@
+"""
+Canonical Keys
+Stable keys for products and their images: per-site rules reduce a product
+URL to the site's own id (Amazon ASIN, eBay item id, Etsy listing id, ...)
+and strip the size/format suffixes image CDNs add, so the same product
+reached through different links or thumbnails gets the same key.
+"""
+
+import hashlib
+import re
+import threading
+
+# Query parameters that only track where a click came from
+TRACKING_PREFIXES = ('utm_', 'pf_rd_', 'pd_rd_', '_trk')
+TRACKING_PARAMS = {'ref', 'ref_', 'trk', 'hash', 'itmprp', 'amdata', 'qid', 'sr', 'crid', 'sprefix',
+                   'keywords', 'content-id', 'gclid', 'fbclid', 'spm', 'scm'}
+
+# Per-site product URL rules: host substring, pattern for the site's product id,
+# and the id-only URL it is rebuilt as (on the same host, so regional sites stay apart)
+PRODUCT_URLS = [
+    ('amazon.', re.compile(r'/(?:dp|gp/product|gp/aw/d|exec/obidos/ASIN)/([A-Z0-9]{10})(?:[/?]|$)'), '/dp/{}'),
+    ('ebay.', re.compile(r'/itm/(?:[^/?]+/)?(\d{9,15})(?:[/?]|$)'), '/itm/{}'),
+    ('etsy.', re.compile(r'/listing/(\d+)'), '/listing/{}'),
+    ('aliexpress.', re.compile(r'/item/(\d+)\.html'), '/item/{}.html'),
+    ('asos.', re.compile(r'/prd/(\d+)'), '/prd/{}'),
+]
+
+# Image URL rules: pattern -> replacement, applied in order to the path
+IMAGE_SUFFIXES = [
+    # AliExpress: ....jpg_480x480q75.jpg_.avif -> ....jpg
+    (re.compile(r'(\.(?:jpe?g|png|webp|gif))_\d+x\d+\w*\.\w+(?:_\.\w+)?$', re.I), r'\1'),
+    # Amazon: 71abc._AC_UL320_.jpg -> 71abc.jpg
+    (re.compile(r'\._[^/]*_(\.\w+)$'), r'\1'),
+    # eBay: s-l225.webp / s-l500.jpg -> s-l1600.jpg
+    (re.compile(r'/s-l\d+\.\w+$'), '/s-l1600.jpg'),
+    # Etsy: il_340x270.4455_abcd.jpg -> il_fullxfull.4455_abcd.jpg
+    (re.compile(r'/il_[^./]+\.'), '/il_fullxfull.'),
+    # Shein: ..._thumbnail_405x552.jpg -> ....jpg
+    (re.compile(r'_thumbnail_\d+x\d*'), ''),
+    # WordPress-style shops: shirt-300x400.jpg -> shirt.jpg
+    (re.compile(r'-\d{2,4}x\d{2,4}(\.\w+)$'), r'\1'),
+]
+# Query parameters image CDNs use for size and format (Scene7 ?$n_480w$&wid=476 and the like)
+IMAGE_PARAMS = {'wid', 'hei', 'fit', 'qlt', 'fmt', 'width', 'height', 'w', 'h', 'q', 'quality',
+                'format', 'auto', 'imwidth', 'resize', 'crop', 'dpr', 'size', 'sw', 'sh', 'sm'}
+# Images that are not the product: lazy-load placeholders and the like
+PLACEHOLDERS = ('data:', 'blank', 'placeholder', 'spacer', 'loading', 'transparent', 'grey.gif',
+                'no-image', 'no_image', 'noimage', 'coming-soon', 'coming_soon')
+
+
+def split_url(url):
+    """'HTTPS://Www.Site.com/a/b/?x=1#f' -> ('https', 'www.site.com', '/a/b', 'x=1')"""
+    url = url.strip().partition('#')[0]
+    base, _, query = url.partition('?')
+    scheme, sep, rest = base.partition('://')
+    if not sep:
+        scheme, rest = 'https', base.lstrip('/')
+    host, _, path = rest.partition('/')
+    return scheme.lower(), host.lower(), '/' + path.rstrip('/'), query
+
+
+def canonical_url(url):
+    """
+    The site's id-only product URL when a rule in PRODUCT_URLS matches;
+    otherwise lower-case scheme and host, no fragment, no tracking
+    parameters, sorted query. Plain string splitting rather than
+    urlsplit/parse_qsl: this runs once per product on every upsert, and
+    parameter values are kept exactly as sent.
+    """
+    scheme, host, path, query = split_url(url)
+    for site, pattern, template in PRODUCT_URLS:
+        if site in host:
+            match = pattern.search(path)
+            if match:
+                return f"https://{host}{template.format(match.group(1))}"
+    if query:
+        params = [p for p in query.split('&') if p and not is_tracking(p.partition('=')[0])]
+        query = '&'.join(sorted(params))
+    return f"{scheme}://{host}{path}{'?' + query if query else ''}"
+
+
+def is_tracking(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def product_key(product):
+    """Canonical URL, or source + name for tiles that had no link"""
+    url = product.get('url') or ''
+    if url.startswith(('http://', 'https://', '//')):
+        return canonical_url(url)
+    return f"nourl:{product.get('source', '')}:{product.get('name', '')}"
+
+
+def image_key(url):
+    """Host + path of an image with the CDN's size/format variations removed, or None"""
+    if not isinstance(url, str) or not url.startswith(('http://', 'https://', '//')):
+        return None   # '', 'N/A', data: URIs
+    if any(p in url.lower() for p in PLACEHOLDERS):
+        return None
+    _, host, path, query = split_url(url)
+    for pattern, replacement in IMAGE_SUFFIXES:
+        path = pattern.sub(replacement, path)
+    params = [p for p in query.split('&')
+              if p and not p.startswith('$') and p.partition('=')[0].lower() not in IMAGE_PARAMS]
+    return f"{host}{path}{'?' + '&'.join(sorted(params)) if params else ''}"
+
+
+def key_hash(key):
+    """64-bit digest of a key, what SeenIndex keeps instead of the string"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+
+
+class SeenIndex:
+    """
+    Hashes of every product key and (source, image key) seen so far. seen()
+    answers and records in one step, so the first copy of a product is kept
+    and every later one is reported as a duplicate. A shared image only makes
+    a duplicate when the record has no link of its own or carries the same
+    name as the first product with that image, so listings that reuse a stock
+    photo are kept.
+    """
+
+    def __init__(self):
+        self.products = set()
+        self.images = {}    # image hash -> name hash of the first product showing it
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def seen(self, product):
+        # Records with neither link nor name have no identity to compare
+        identified = product.get('url') or product.get('name')
+        key = product_key(product) if identified else None
+        linked = key is not None and not key.startswith('nourl:')
+        key = key_hash(key) if key is not None else None
+        image = image_key(product.get('image'))
+        image = key_hash(f"{product.get('source', '')}|{image}") if image else None
+        name = key_hash(' '.join(str(product.get('name') or '').lower().split()))
+        with self.lock:
+            same_image = image is not None and image in self.images and (not linked or self.images[image] == name)
+            if key in self.products or same_image:
+                self.dropped += 1
+                return True
+            if key is not None:
+                self.products.add(key)
+            if image is not None:
+                self.images.setdefault(image, name)
+        return False
+
+    def clear(self):
+        with self.lock:
+            self.products.clear()
+            self.images.clear()
+            self.dropped = 0
+
+    def __len__(self):
+        return len(self.products)
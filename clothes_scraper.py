@@ -9,21 +9,27 @@ Use responsibly and respect rate limits.
 """
 
 import requests
-from bs4 import BeautifulSoup
-import json
 import time
 import random
-import csv
-from datetime import datetime
 from fake_useragent import UserAgent
-from urllib.parse import urljoin, urlparse
-import re
+from urllib.parse import urlparse
+import rate_limiter
+from async_fetch import AsyncFetcher
+from http_cache import HttpCache, restamp
+from html_parsers import PAGE_SITES, extract_page, generic_spec
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
 
 class ClothingScraper:
-    def __init__(self):
+    def __init__(self, use_cache=True):
         self.session = requests.Session()
         self.ua = UserAgent()
-        self.products = []
+        # Written to disk as they are found; exports read them back
+        self.products = JsonlSink(stream_path('clothes_data'))
+        # Conditional-request cache: unchanged pages come back as 304 and skip parsing
+        self.cache = HttpCache() if use_cache else None
+        # HTTP-first fetcher for search pages, opened on first use
+        self.tiered = None
         
         # Rotate between different user agents
         self.user_agents = [
@@ -58,14 +64,25 @@ class ClothingScraper:
     
     def make_request(self, url, retries=3):
         """Make a request with retry logic and anti-bot measures"""
+        cached = self.cache.lookup(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            return self.cache.serve(cached, revalidated=False)
+        
         for attempt in range(retries):
             try:
-                self.random_delay()
+                rate_limiter.acquire(url)
                 headers = self.get_headers()
+                if cached:
+                    headers.update(self.cache.conditional_headers(cached))
                 
                 response = self.session.get(url, headers=headers, timeout=30)
                 
-                if response.status_code == 200:
+                if response.status_code == 304 and cached:
+                    return self.cache.serve(cached, revalidated=True)
+                elif response.status_code == 200:
+                    response.from_cache = False
+                    if self.cache:
+                        self.cache.store(url, response)
                     return response
                 elif response.status_code == 403:
                     print(f"[!] Access forbidden. Waiting and retrying... (attempt {attempt + 1})")
@@ -82,100 +99,100 @@ class ClothingScraper:
         
         return None
 
+    # ==================== Page Helpers ====================
+    def parse_page(self, response, url, parse, kind):
+        """Parse a fetched page, reusing the stored extraction when the page is unchanged"""
+        if self.cache and getattr(response, 'from_cache', False):
+            products = self.cache.get_extraction(url, kind)
+            if products is not None:
+                return restamp(products)
+        
+        products = parse(response.text, url)
+        if self.cache:
+            self.cache.store_extraction(url, kind, products)
+        return products
+    
+    def add_products(self, products):
+        """Append parsed products and log them"""
+        for product_data in products:
+            self.products.append(product_data)
+            print(f"  [+] Found: {product_data['name'][:50]}...")
+    
+    async def scrape_pages_async(self, urls, parse, per_host=4):
+        """Fetch pages concurrently, parse each one as it arrives, keep page order"""
+        results = [None] * len(urls)
+        async with AsyncFetcher(per_host=per_host, headers_fn=self.get_headers) as fetcher:
+            async for index, url, html in fetcher.fetch_each(urls):
+                if html:
+                    results[index] = parse(html, url)
+        
+        for products in results:
+            if products:
+                self.add_products(products)
+        return self.products
+
     # ==================== H&M Scraper ====================
+    def hm_page_urls(self, category_url, max_pages=3):
+        return [f"{category_url}?page={page + 1}" if page > 0 else category_url for page in range(max_pages)]
+    
+    def parse_hm(self, html, url):
+        """Extract H&M products from a category page"""
+        return extract_page(html, url, PAGE_SITES['hm'])
+    
     def scrape_hm(self, category_url, max_pages=3):
         """Scrape clothing from H&M"""
         print(f"\n[*] Scraping H&M: {category_url}")
         
-        for page in range(max_pages):
-            url = f"{category_url}?page={page + 1}" if page > 0 else category_url
+        for page, url in enumerate(self.hm_page_urls(category_url, max_pages)):
             print(f"[*] Fetching page {page + 1}...")
             
             response = self.make_request(url)
             if not response:
                 continue
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find product items
-            products = soup.find_all('article', class_=re.compile(r'product-item'))
-            
-            if not products:
-                products = soup.find_all('li', class_=re.compile(r'product'))
-            
-            for product in products:
-                try:
-                    # Extract product data
-                    name_elem = product.find(['h2', 'h3', 'a'], class_=re.compile(r'link|title|name'))
-                    price_elem = product.find(['span', 'div'], class_=re.compile(r'price'))
-                    image_elem = product.find('img')
-                    link_elem = product.find('a', href=True)
-                    
-                    product_data = {
-                        'source': 'H&M',
-                        'name': name_elem.get_text(strip=True) if name_elem else 'N/A',
-                        'price': price_elem.get_text(strip=True) if price_elem else 'N/A',
-                        'image': image_elem.get('src') or image_elem.get('data-src') if image_elem else 'N/A',
-                        'url': urljoin(url, link_elem['href']) if link_elem else 'N/A',
-                        'scraped_at': datetime.now().isoformat()
-                    }
-                    
-                    if product_data['name'] != 'N/A':
-                        self.products.append(product_data)
-                        print(f"  [+] Found: {product_data['name'][:50]}...")
-                        
-                except Exception as e:
-                    continue
+            self.add_products(self.parse_page(response, url, self.parse_hm, 'hm'))
         
         return self.products
+    
+    async def scrape_hm_async(self, category_url, max_pages=3):
+        """Async twin of scrape_hm: all pages fetched concurrently"""
+        print(f"\n[*] Scraping H&M (async): {category_url}")
+        return await self.scrape_pages_async(self.hm_page_urls(category_url, max_pages), self.parse_hm)
 
     # ==================== ASOS Scraper ====================
+    def asos_page_urls(self, category_url, max_pages=3):
+        return [f"{category_url}&page={page + 1}" if '?' in category_url else f"{category_url}?page={page + 1}"
+                for page in range(max_pages)]
+    
+    def parse_asos(self, html, url):
+        """Extract ASOS products from a category page"""
+        return extract_page(html, url, PAGE_SITES['asos'])
+    
     def scrape_asos(self, category_url, max_pages=3):
         """Scrape clothing from ASOS"""
         print(f"\n[*] Scraping ASOS: {category_url}")
         
-        for page in range(max_pages):
-            url = f"{category_url}&page={page + 1}" if '?' in category_url else f"{category_url}?page={page + 1}"
+        for page, url in enumerate(self.asos_page_urls(category_url, max_pages)):
             print(f"[*] Fetching page {page + 1}...")
             
             response = self.make_request(url)
             if not response:
                 continue
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find product items
-            products = soup.find_all('article', {'data-auto-id': 'productTile'})
-            
-            if not products:
-                products = soup.find_all('div', class_=re.compile(r'product'))
-            
-            for product in products:
-                try:
-                    name_elem = product.find(['h2', 'p', 'div'], class_=re.compile(r'title|name|description'))
-                    price_elem = product.find(['span', 'p'], class_=re.compile(r'price'))
-                    image_elem = product.find('img')
-                    link_elem = product.find('a', href=True)
-                    
-                    product_data = {
-                        'source': 'ASOS',
-                        'name': name_elem.get_text(strip=True) if name_elem else 'N/A',
-                        'price': price_elem.get_text(strip=True) if price_elem else 'N/A',
-                        'image': image_elem.get('src') or image_elem.get('data-src') if image_elem else 'N/A',
-                        'url': urljoin('https://www.asos.com', link_elem['href']) if link_elem else 'N/A',
-                        'scraped_at': datetime.now().isoformat()
-                    }
-                    
-                    if product_data['name'] != 'N/A':
-                        self.products.append(product_data)
-                        print(f"  [+] Found: {product_data['name'][:50]}...")
-                        
-                except Exception as e:
-                    continue
+            self.add_products(self.parse_page(response, url, self.parse_asos, 'asos'))
         
         return self.products
+    
+    async def scrape_asos_async(self, category_url, max_pages=3):
+        """Async twin of scrape_asos: all pages fetched concurrently"""
+        print(f"\n[*] Scraping ASOS (async): {category_url}")
+        return await self.scrape_pages_async(self.asos_page_urls(category_url, max_pages), self.parse_asos)
 
     # ==================== Zara Scraper ====================
+    def parse_zara(self, html, url):
+        """Extract Zara products from a category page"""
+        return extract_page(html, url, PAGE_SITES['zara'])
+    
     def scrape_zara(self, category_url, max_pages=3):
         """Scrape clothing from Zara"""
         print(f"\n[*] Scraping Zara: {category_url}")
@@ -184,40 +201,24 @@ class ClothingScraper:
         if not response:
             return self.products
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Zara uses dynamic content, try to find product containers
-        products = soup.find_all('li', class_=re.compile(r'product'))
-        
-        if not products:
-            products = soup.find_all('div', class_=re.compile(r'product-grid-product'))
-        
-        for product in products:
-            try:
-                name_elem = product.find(['a', 'span', 'h2'], class_=re.compile(r'name|title|link'))
-                price_elem = product.find(['span', 'div'], class_=re.compile(r'price|money'))
-                image_elem = product.find('img')
-                link_elem = product.find('a', href=True)
-                
-                product_data = {
-                    'source': 'Zara',
-                    'name': name_elem.get_text(strip=True) if name_elem else 'N/A',
-                    'price': price_elem.get_text(strip=True) if price_elem else 'N/A',
-                    'image': image_elem.get('src') or image_elem.get('data-src') if image_elem else 'N/A',
-                    'url': urljoin('https://www.zara.com', link_elem['href']) if link_elem else 'N/A',
-                    'scraped_at': datetime.now().isoformat()
-                }
-                
-                if product_data['name'] != 'N/A':
-                    self.products.append(product_data)
-                    print(f"  [+] Found: {product_data['name'][:50]}...")
-                    
-            except Exception as e:
-                continue
-        
+        self.add_products(self.parse_page(response, category_url, self.parse_zara, 'zara'))
         return self.products
+    
+    async def scrape_zara_async(self, category_url, max_pages=3):
+        """Async twin of scrape_zara"""
+        print(f"\n[*] Scraping Zara (async): {category_url}")
+        return await self.scrape_pages_async([category_url], self.parse_zara)
 
     # ==================== Generic Scraper ====================
+    def parse_generic(self, html, url, product_selector='article', name_selector='.product-name',
+                      price_selector='.price', image_selector='img', link_selector='a'):
+        """Extract products from any page using CSS selectors"""
+        spec = generic_spec(urlparse(url).netloc, product_selector, name_selector,
+                            price_selector, image_selector, link_selector)
+        results = extract_page(html, url, spec)
+        print(f"[*] Found {len(results)} products")
+        return results
+    
     def scrape_generic(self, url, product_selector='article', name_selector='.product-name', 
                        price_selector='.price', image_selector='img', link_selector='a'):
         """Generic scraper for any e-commerce site"""
@@ -227,42 +228,50 @@ class ClothingScraper:
         if not response:
             return self.products
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        def parse(html, url):
+            return self.parse_generic(html, url, product_selector, name_selector,
+                                      price_selector, image_selector, link_selector)
         
-        products = soup.select(product_selector)
-        print(f"[*] Found {len(products)} product containers")
+        kind = '|'.join(['generic', product_selector, name_selector, price_selector, image_selector, link_selector])
+        self.add_products(self.parse_page(response, url, parse, kind))
+        return self.products
+    
+    async def scrape_generic_async(self, urls, product_selector='article', name_selector='.product-name',
+                                   price_selector='.price', image_selector='img', link_selector='a'):
+        """Async twin of scrape_generic for a list of URLs"""
+        print(f"\n[*] Scraping {len(urls)} page(s) (async)")
         
-        for product in products:
-            try:
-                name_elem = product.select_one(name_selector)
-                price_elem = product.select_one(price_selector)
-                image_elem = product.select_one(image_selector)
-                link_elem = product.select_one(link_selector)
-                
-                product_data = {
-                    'source': urlparse(url).netloc,
-                    'name': name_elem.get_text(strip=True) if name_elem else 'N/A',
-                    'price': price_elem.get_text(strip=True) if price_elem else 'N/A',
-                    'image': image_elem.get('src') or image_elem.get('data-src') if image_elem else 'N/A',
-                    'url': urljoin(url, link_elem['href']) if link_elem and link_elem.get('href') else 'N/A',
-                    'scraped_at': datetime.now().isoformat()
-                }
-                
-                if product_data['name'] != 'N/A':
-                    self.products.append(product_data)
-                    print(f"  [+] Found: {product_data['name'][:50]}...")
-                    
-            except Exception as e:
-                continue
+        def parse(html, url):
+            return self.parse_generic(html, url, product_selector, name_selector,
+                                      price_selector, image_selector, link_selector)
         
+        return await self.scrape_pages_async(urls, parse)
+
+    # ==================== Search (HTTP first, Chrome if needed) ====================
+    def scrape_search(self, site, query, max_items=20):
+        """Scrape a site's search results, opening Chrome only when plain HTTP has no products"""
+        from tiered_fetch import TieredFetcher, search_url
+        
+        if self.tiered is None:
+            self.tiered = TieredFetcher()
+        url = search_url(site, query)
+        print(f"\n[*] Searching {site}: {url}")
+        
+        self.add_products(self.tiered.scrape(site, url, max_items))
         return self.products
+    
+    def close(self):
+        """Close the tiered fetcher, if one was opened"""
+        if self.tiered is not None:
+            self.tiered.report()
+            self.tiered.close()
+            self.tiered = None
 
     # ==================== Export Methods ====================
     def export_to_json(self, filename='clothes_data.json'):
         """Export scraped data to JSON file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
-        print(f"\n[*] Exported {len(self.products)} products to {filename}")
+        count = self.products.export_json(filename)
+        print(f"\n[*] Exported {count} products to {filename}")
     
     def export_to_csv(self, filename='clothes_data.csv'):
         """Export scraped data to CSV file"""
@@ -270,19 +279,21 @@ class ClothingScraper:
             print("[!] No products to export")
             return
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=self.products[0].keys())
-            writer.writeheader()
-            writer.writerows(self.products)
-        print(f"\n[*] Exported {len(self.products)} products to {filename}")
+        count = self.products.export_csv(filename)
+        print(f"\n[*] Exported {count} products to {filename}")
+
+    def export_to_parquet(self, directory='clothes_data.parquet'):
+        """Export scraped data to a Parquet dataset partitioned by date and source"""
+        count = self.products.export_parquet(directory)
+        print(f"\n[*] Exported {count} products to {directory}/")
     
     def get_products(self):
         """Return all scraped products"""
-        return self.products
+        return list(self.products)
     
     def clear_products(self):
         """Clear the products list"""
-        self.products = []
+        self.products.clear()
 
 
 # ==================== Selenium Version (for JavaScript-heavy sites) ====================
@@ -293,56 +304,41 @@ class SeleniumClothingScraper:
     """
     
     def __init__(self):
-        from selenium import webdriver
-        from selenium.webdriver.chrome.service import Service
-        from selenium.webdriver.chrome.options import Options
-        from webdriver_manager.chrome import ChromeDriverManager
-        
-        self.products = []
-        
-        # Chrome options to avoid detection
-        options = Options()
-        options.add_argument('--headless')  # Run in background
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-extensions')
-        options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument(f'user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
-        )
-        
-        # Execute script to remove webdriver flag
-        self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        from driver_pool import get_pool
+        
+        self.products = JsonlSink(stream_path('clothes_data'))
+        
+        # Headless Chrome from the shared pool (anti-detection options and
+        # webdriver flag removal are applied there)
+        self.pool = get_pool(headless=True)
+        self.driver = self.pool.acquire()
     
     def random_delay(self, min_delay=2, max_delay=5):
         delay = random.uniform(min_delay, max_delay)
         time.sleep(delay)
     
-    def scrape_amazon_clothes(self, search_query="men clothes", max_pages=3):
-        """Scrape Amazon clothing search results"""
+    def scrape_amazon_clothes(self, search_query="men clothes", max_pages=3, prefetch=1):
+        """Scrape Amazon clothing search results; the next prefetch pages load in tabs while one is extracted"""
         from selenium.webdriver.common.by import By
         from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
+        from extraction import SITES, extract_tiles
+        from readiness import wait_for_page
+        from scrolling import scroll_page
+        from pagination import PagePipeline
         
         print(f"\n[*] Scraping Amazon for: {search_query}")
         
-        for page in range(1, max_pages + 1):
-            url = f"https://www.amazon.com/s?k={search_query.replace(' ', '+')}&page={page}"
+        urls = [f"https://www.amazon.com/s?k={search_query.replace(' ', '+')}&page={page}"
+                for page in range(1, max_pages + 1)]
+        
+        for page, url in enumerate(PagePipeline(self.driver, urls, prefetch), 1):
             print(f"[*] Fetching page {page}...")
             
-            self.driver.get(url)
-            self.random_delay(3, 6)
+            wait_for_page(self.driver, 'amazon', replaces=4.5)
             
             # Scroll down to load lazy images
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-            self.random_delay(1, 2)
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            self.random_delay(1, 2)
+            scroll_page(self.driver, 'amazon', replaces=3.0)
             
             try:
                 # Wait for products to load
@@ -350,41 +346,24 @@ class SeleniumClothingScraper:
                     EC.presence_of_element_located((By.CSS_SELECTOR, '[data-component-type="s-search-result"]'))
                 )
                 
-                products = self.driver.find_elements(By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
+                products = extract_tiles(self.driver, SITES['amazon'], defaults={'name': '', 'price': 'N/A', 'image': 'N/A', 'url': 'N/A'})
                 
+                scraped_at = stamp()
                 for product in products:
-                    try:
-                        name = product.find_element(By.CSS_SELECTOR, 'h2 a span').text
-                        
-                        try:
-                            price = product.find_element(By.CSS_SELECTOR, '.a-price .a-offscreen').get_attribute('textContent')
-                        except:
-                            price = 'N/A'
-                        
-                        try:
-                            image = product.find_element(By.CSS_SELECTOR, '.s-image').get_attribute('src')
-                        except:
-                            image = 'N/A'
-                        
-                        try:
-                            link = product.find_element(By.CSS_SELECTOR, 'h2 a').get_attribute('href')
-                        except:
-                            link = 'N/A'
-                        
-                        product_data = {
-                            'source': 'Amazon',
-                            'name': name,
-                            'price': price,
-                            'image': image,
-                            'url': link,
-                            'scraped_at': datetime.now().isoformat()
-                        }
-                        
-                        self.products.append(product_data)
-                        print(f"  [+] Found: {name[:50]}...")
-                        
-                    except Exception as e:
+                    if not product['name']:
                         continue
+                    
+                    product_data = Product(
+                        source='Amazon',
+                        name=product['name'],
+                        price=product['price'],
+                        image=product['image'],
+                        url=product['url'],
+                        scraped_at=scraped_at
+                    )
+                    
+                    self.products.append(product_data)
+                    print(f"  [+] Found: {product['name'][:50]}...")
                         
             except Exception as e:
                 print(f"[!] Error on page {page}: {e}")
@@ -392,12 +371,11 @@ class SeleniumClothingScraper:
         return self.products
     
     def export_to_json(self, filename='clothes_data.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
-        print(f"\n[*] Exported {len(self.products)} products to {filename}")
+        count = self.products.export_json(filename)
+        print(f"\n[*] Exported {count} products to {filename}")
     
     def close(self):
-        self.driver.quit()
+        self.pool.release(self.driver)
 
 
 # ==================== Main ====================
@@ -408,11 +386,12 @@ if __name__ == "__main__":
     
     # Choose scraping method
     print("\nSelect scraping method:")
-    print("1. Basic scraper (requests + BeautifulSoup) - H&M, ASOS, Zara")
+    print("1. Basic scraper (requests + fast HTML parser) - H&M, ASOS, Zara")
     print("2. Advanced scraper (Selenium) - Amazon, JavaScript-heavy sites")
     print("3. Custom URL scraper")
+    print("4. Search any site (HTTP first, Chrome only when needed)")
     
-    choice = input("\nEnter choice (1/2/3): ").strip()
+    choice = input("\nEnter choice (1/2/3/4): ").strip()
     
     if choice == "1":
         scraper = ClothingScraper()
@@ -431,6 +410,7 @@ if __name__ == "__main__":
         elif site == "3":
             scraper.scrape_zara("https://www.zara.com/us/en/man-new-in-l1180.html", max_pages=2)
         
+        scraper.cache.report()
         if scraper.products:
             scraper.export_to_json()
             scraper.export_to_csv()
@@ -447,6 +427,8 @@ if __name__ == "__main__":
             if scraper.products:
                 scraper.export_to_json()
             
+            from pagination import report as report_pagination
+            report_pagination()
             scraper.close()
         except ImportError:
             print("\n[!] Please install required packages:")
@@ -463,6 +445,23 @@ if __name__ == "__main__":
         
         scraper.scrape_generic(url, product_sel, name_sel, price_sel)
         
+        scraper.cache.report()
+        if scraper.products:
+            scraper.export_to_json()
+            scraper.export_to_csv()
+    
+    elif choice == "4":
+        from tiered_fetch import SEARCH_URLS
+        
+        scraper = ClothingScraper()
+        print(f"\nSites: {', '.join(SEARCH_URLS)}")
+        sites = input("Sites to search [asos,ebay]: ").strip() or "asos,ebay"
+        query = input("Enter search query (e.g., 'men shirts'): ").strip() or "men shirts"
+        
+        for site in sites.split(','):
+            scraper.scrape_search(site.strip(), query)
+        
+        scraper.close()
         if scraper.products:
             scraper.export_to_json()
             scraper.export_to_csv()
@@ -3,38 +3,20 @@ Combined Multi-Site Scraper
 Scrapes from ASOS + AliExpress + eBay together
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-import json
-import time
-import random
+from site_runner import run_sites
+from page_archive import open_archive
+from extraction import SITES, extract_tiles
+from readiness import wait_for_page, report as report_readiness
+from scrolling import scroll_page, report as report_scrolling
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
+from product_store import ProductStore
 from datetime import datetime
 import os
-import sys
+import argparse
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-def create_driver():
-    options = Options()
-    options.add_argument('--headless=new')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=options)
-
-def scroll_page(driver):
-    for i in range(3):
-        driver.execute_script(f"window.scrollTo(0, {(i+1) * 600});")
-        time.sleep(0.4)
-
 def scrape_asos(driver, query, max_items=15):
     """Scrape ASOS"""
     print(f"\n[ASOS] Searching for: {query}")
@@ -43,34 +25,25 @@ def scrape_asos(driver, query, max_items=15):
     try:
         url = f"https://www.asos.com/us/search/?q={query.replace(' ', '+')}"
         driver.get(url)
-        time.sleep(random.uniform(3, 5))
-        scroll_page(driver)
-        
-        items = driver.find_elements(By.CSS_SELECTOR, 'article[data-auto-id="productTile"]')
-        if not items:
-            items = driver.find_elements(By.CSS_SELECTOR, '[class*="productTile"]')
+        wait_for_page(driver, 'asos', replaces=4)
+        scroll_page(driver, 'asos', max_items, replaces=1.2)
         
+        items = extract_tiles(driver, SITES['asos'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[ASOS] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                name = item.find_element(By.CSS_SELECTOR, '[class*="productDescription"], h2, p').text
-                price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text if item.find_elements(By.CSS_SELECTOR, '[class*="price"]') else "N/A"
-                image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src') if item.find_elements(By.CSS_SELECTOR, 'img') else ""
-                link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href') if item.find_elements(By.CSS_SELECTOR, 'a') else ""
-                
-                if name and len(name) > 3:
-                    products.append({
-                        'source': 'ASOS',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 3:
+                products.append(Product(
+                    source='ASOS',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[ASOS] Error: {e}")
@@ -85,36 +58,25 @@ def scrape_aliexpress(driver, query, max_items=15):
     try:
         url = f"https://www.aliexpress.com/w/wholesale-{query.replace(' ', '-')}.html?catId=200000343"
         driver.get(url)
-        time.sleep(random.uniform(4, 6))
-        scroll_page(driver)
-        time.sleep(1)
+        wait_for_page(driver, 'aliexpress', replaces=5)
+        scroll_page(driver, 'aliexpress', max_items, replaces=2.2)
         
-        items = driver.find_elements(By.CSS_SELECTOR, '[class*="search-card-item"], [class*="product-card"], .list--gallery--C2f2tvm')
+        items = extract_tiles(driver, SITES['aliexpress'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[AliExpress] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, 'h3, [class*="title"]').text
-                except:
-                    continue
-                
-                price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text if item.find_elements(By.CSS_SELECTOR, '[class*="price"]') else "N/A"
-                image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src') if item.find_elements(By.CSS_SELECTOR, 'img') else ""
-                link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href') if item.find_elements(By.CSS_SELECTOR, 'a') else ""
-                
-                if name and len(name) > 5:
-                    products.append({
-                        'source': 'AliExpress',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 5:
+                products.append(Product(
+                    source='AliExpress',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[AliExpress] Error: {e}")
@@ -129,37 +91,31 @@ def scrape_ebay(driver, query, max_items=15):
     try:
         url = f"https://www.ebay.com/sch/i.html?_nkw={query.replace(' ', '+')}&_sacat=11450"
         driver.get(url)
-        time.sleep(random.uniform(2, 4))
-        scroll_page(driver)
+        wait_for_page(driver, 'ebay', replaces=3)
+        scroll_page(driver, 'ebay', max_items + 1, replaces=1.2)
         
-        items = driver.find_elements(By.CSS_SELECTOR, '.s-item')
+        items = extract_tiles(driver, SITES['ebay'], defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[eBay] Found {len(items)} items")
         
         count = 0
+        scraped_at = stamp()
         for item in items[1:]:  # Skip header
             if count >= max_items:
                 break
-            try:
-                name = item.find_element(By.CSS_SELECTOR, '.s-item__title').text
-                if "Shop on eBay" in name:
-                    continue
-                
-                price = item.find_element(By.CSS_SELECTOR, '.s-item__price').text if item.find_elements(By.CSS_SELECTOR, '.s-item__price') else "N/A"
-                image = item.find_element(By.CSS_SELECTOR, '.s-item__image-img').get_attribute('src') if item.find_elements(By.CSS_SELECTOR, '.s-item__image-img') else ""
-                link = item.find_element(By.CSS_SELECTOR, '.s-item__link').get_attribute('href') if item.find_elements(By.CSS_SELECTOR, '.s-item__link') else ""
-                
-                products.append({
-                    'source': 'eBay',
-                    'name': name,
-                    'price': price,
-                    'image': image,
-                    'url': link,
-                    'scraped_at': datetime.now().isoformat()
-                })
-                count += 1
-                print(f"  [+] {name[:50]}...")
-            except:
+            name = item['name']
+            if not name or "Shop on eBay" in name:
                 continue
+            
+            products.append(Product(
+                source='eBay',
+                name=name,
+                price=item['price'],
+                image=item['image'],
+                url=item['url'],
+                scraped_at=scraped_at
+            ))
+            count += 1
+            print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[eBay] Error: {e}")
@@ -174,37 +130,26 @@ def scrape_shein(driver, query, max_items=10):
     try:
         url = f"https://us.shein.com/pdsearch/{query.replace(' ', '%20')}/"
         driver.get(url)
-        time.sleep(random.uniform(4, 6))
-        scroll_page(driver)
+        wait_for_page(driver, 'shein', replaces=5)
+        scroll_page(driver, 'shein', max_items, replaces=1.2)
         
-        items = driver.find_elements(By.CSS_SELECTOR, '.product-card, [class*="productCard"], .S-product-item')
+        items = extract_tiles(driver, SITES['shein'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[Shein] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, '[class*="title"], [class*="name"], a[title]').text
-                    if not name:
-                        name = item.find_element(By.CSS_SELECTOR, 'a[title]').get_attribute('title')
-                except:
-                    name = ""
-                
-                price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text if item.find_elements(By.CSS_SELECTOR, '[class*="price"]') else "N/A"
-                image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src') if item.find_elements(By.CSS_SELECTOR, 'img') else ""
-                link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href') if item.find_elements(By.CSS_SELECTOR, 'a') else ""
-                
-                if name and len(name) > 3:
-                    products.append({
-                        'source': 'Shein',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link if link.startswith('http') else f"https://us.shein.com{link}",
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            link = item['url']
+            if name and len(name) > 3:
+                products.append(Product(
+                    source='Shein',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=link if link.startswith('http') else f"https://us.shein.com{link}",
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
                 
     except Exception as e:
         print(f"[Shein] Error: {e}")
@@ -212,47 +157,61 @@ def scrape_shein(driver, query, max_items=10):
     return products
 
 def main():
-    query = sys.argv[1] if len(sys.argv) > 1 else "t-shirts"
+    parser = argparse.ArgumentParser(description="Combined multi-site scraper")
+    parser.add_argument('query', nargs='?', default="t-shirts")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="sites to scrape at once, each in its own browser")
+    archiving = parser.add_mutually_exclusive_group()
+    archiving.add_argument('--record', metavar='ARCHIVE',
+                           help="save every page to this page archive while scraping")
+    archiving.add_argument('--replay', metavar='ARCHIVE',
+                           help="re-run extraction on a page archive, with no browser or network")
+    args = parser.parse_args()
+    query = args.query
+    archive = open_archive(args.record or args.replay, record=bool(args.record))
     
     print("=" * 60)
     print(f"  Combined Multi-Site Scraper")
     print(f"  Query: {query}")
     print("=" * 60)
     
-    print("\n[*] Starting Chrome...")
-    driver = create_driver()
+    run_started = datetime.now().isoformat()
+    print("\n[*] Replaying archived pages..." if args.replay else "\n[*] Starting Chrome...")
+    all_products, _ = run_sites([
+        ('ASOS', scrape_asos, 15),
+        ('AliExpress', scrape_aliexpress, 15),
+        ('eBay', scrape_ebay, 15),
+        ('Shein', scrape_shein, 10),
+    ], query, workers=args.workers, sink=JsonlSink(stream_path('clothes_data')),
+        archive=archive, replay=bool(args.replay))
     
-    all_products = []
-    
-    try:
-        # Scrape from all sites
-        all_products.extend(scrape_asos(driver, query, 15))
-        all_products.extend(scrape_aliexpress(driver, query, 15))
-        all_products.extend(scrape_ebay(driver, query, 15))
-        all_products.extend(scrape_shein(driver, query, 10))
-        
-    finally:
-        driver.quit()
-    
-    # Save results
-    if all_products:
+    # Save results: merge into the product store, export this run from it.
+    # Archived pages are not new sightings, so a replay stays out of the
+    # store, its price history and clothes_data.json
+    if all_products and args.replay:
+        print(f"\n[+] Replayed {len(all_products)} products, written only to {all_products.path}")
+    elif all_products:
+        store = ProductStore()
+        store.upsert(all_products)
+        duplicates = store.cluster()
         json_path = os.path.join(SCRIPT_DIR, 'clothes_data.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(all_products, f, indent=2, ensure_ascii=False)
+        saved = store.export_json(json_path, since=run_started)
         
         # Count by source
-        sources = {}
-        for p in all_products:
-            src = p['source']
-            sources[src] = sources.get(src, 0) + 1
+        sources = store.counts_by_source(since=run_started)
+        store.close()
         
         print(f"\n{'=' * 40}")
-        print(f"[+] Saved {len(all_products)} products total:")
+        print(f"[+] Saved {saved} products total ({len(all_products)} scraped):")
         for src, count in sources.items():
             print(f"    - {src}: {count} products")
+        print(f"[+] {duplicates} products have near-duplicates across listings")
         print(f"{'=' * 40}")
     else:
         print("\n[!] No products found")
+    
+    report_readiness()
+    report_scrolling()
 
 
 if __name__ == "__main__":
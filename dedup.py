@@ -0,0 +1,195 @@
+"""
+Near-Duplicate Detection
+Clusters products whose names are nearly the same (the same shirt on eBay,
+AliExpress and Shein) with MinHash signatures and locality-sensitive hashing:
+candidates come from shared LSH buckets, so there is no pairwise comparison.
+Requires: pip install numpy
+"""
+
+import re
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SHINGLE = 4          # character 4-grams of the normalized name
+NUM_PERM = 64        # MinHash signature length
+BANDS = 16           # LSH bands of NUM_PERM // BANDS rows: pairs above ~50% similar share a bucket
+THRESHOLD = 0.7      # estimated Jaccard similarity a bucket-mate needs to join the cluster
+CHUNK = 200_000      # names hashed per pass, bounds memory on millions of products
+MAX_NAME = 200       # characters of a name that are shingled
+VOCAB_BITS = 22      # shingles are bucketed into 2**22 ids before MinHash
+SEED = 20240601
+
+NOISE = re.compile(r"[\W_]+")
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("near-duplicate detection needs numpy: pip install numpy")
+
+
+def normalize(name):
+    """"Men's Slim-Fit  SHIRT" -> " men s slim fit shirt " (padded so short names still have a shingle)"""
+    return f" {NOISE.sub(' ', (name or '')[:MAX_NAME].lower()).strip()} ".ljust(SHINGLE)
+
+
+def hash_params(count, seed=SEED):
+    """Odd 64-bit multipliers and offsets for multiply-shift hashing"""
+    rnd = np.random.default_rng(seed)
+    a = rnd.integers(1, 2 ** 63, count, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rnd.integers(0, 2 ** 63, count, dtype=np.uint64)
+    return a, b
+
+
+def shingles(names):
+    """
+    Every 4-byte shingle of every name as one uint32, plus where each name's
+    shingles start. Names are joined into one buffer; shingles that would cross
+    a name boundary are dropped.
+    """
+    text = '\n'.join(normalize(name) for name in names).encode('utf-8')
+    data = np.frombuffer(text, dtype=np.uint8).astype(np.uint32)
+    grams = data[:-3] << 24 | data[1:-2] << 16 | data[2:-1] << 8 | data[3:]
+    newline = data == 10
+    owner = np.cumsum(newline)[:-3]
+    # a shingle is valid if none of its 4 bytes is a separator
+    crosses = newline[:-3] | newline[1:-2] | newline[2:-1] | newline[3:]
+    grams, owner = grams[~crosses], owner[~crosses]
+    starts = np.searchsorted(owner, np.arange(len(names)))
+    return grams, starts
+
+
+def signatures(names, num_perm=NUM_PERM):
+    """MinHash signature per name: (len(names), num_perm) uint32"""
+    require_numpy()
+    a, b = hash_params(num_perm)
+    result = np.empty((len(names), num_perm), dtype=np.uint32)
+    for offset in range(0, len(names), CHUNK):
+        grams, starts = shingles(names[offset:offset + CHUNK])
+        # Hash each distinct shingle once: bucket them into a small vocabulary, hash the
+        # vocabulary for every permutation, then look the rows up per shingle
+        bucket = (grams * np.uint32(0x9E3779B1)) >> np.uint32(32 - VOCAB_BITS)
+        used = np.zeros(1 << VOCAB_BITS, dtype=bool)
+        used[bucket] = True
+        vocab = np.flatnonzero(used).astype(np.uint64)
+        word = (np.cumsum(used) - 1)[bucket]
+        table = ((vocab[:, None] * a + b) >> np.uint64(32)).astype(np.uint32)
+
+        # Longest names first, so column j of the shingle lists is a prefix of the names
+        counts = np.diff(np.r_[starts, len(grams)])
+        order = np.argsort(-counts, kind='stable')
+        first, counts = starts[order], counts[order]
+        sigs = np.full((len(order), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+        for j in range(counts[0] if len(counts) else 0):
+            active = np.searchsorted(-counts, -j, side='left')
+            np.minimum(sigs[:active], table[word[first[:active] + j]], out=sigs[:active])
+        result[offset + order] = sigs
+    return result
+
+
+def band_keys(sigs, bands=BANDS):
+    """LSH bucket key of every signature in every band: (len(sigs), bands) int64"""
+    rows = sigs.shape[1] // bands
+    mix, _ = hash_params(rows, seed=SEED + 1)
+    keys = np.empty((len(sigs), bands), dtype=np.uint64)
+    for band in range(bands):
+        keys[:, band] = (sigs[:, band * rows:(band + 1) * rows].astype(np.uint64) * mix).sum(axis=1)
+    return keys.view(np.int64)   # fits an SQLite INTEGER
+
+
+def candidate_pairs(sigs, bands=BANDS, threshold=THRESHOLD):
+    """
+    (left, right) index arrays of names that share an LSH bucket in any band
+    and whose signatures agree on at least threshold of their positions
+    """
+    all_keys = band_keys(sigs, bands)
+    lefts, rights = [], []
+    for band in range(bands):
+        keys = all_keys[:, band]
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        # every member of a bucket pairs with the bucket's first member
+        first = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        size = np.diff(np.r_[first, len(keys)])
+        head = np.repeat(order[first], size)
+        keep = head != order
+        lefts.append(head[keep])
+        rights.append(order[keep])
+    left, right = np.concatenate(lefts), np.concatenate(rights)
+    if len(left):
+        pairs = np.sort(left.astype(np.int64) * len(sigs) + right)
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]   # a pair can share several bands
+        left, right = pairs // len(sigs), pairs % len(sigs)
+        similar = np.concatenate([(sigs[left[i:i + CHUNK]] == sigs[right[i:i + CHUNK]]).mean(axis=1) >= threshold
+                                  for i in range(0, len(left), CHUNK)])
+        left, right = left[similar], right[similar]
+    return left, right
+
+
+def components(count, left, right):
+    """Connected components of the pair graph: the smallest member index for every node"""
+    labels = np.arange(count)
+    while len(left):
+        low = np.minimum(labels[left], labels[right])
+        before = labels.copy()
+        np.minimum.at(labels, left, low)
+        np.minimum.at(labels, right, low)
+        labels = labels[labels]   # pointer jumping: follow each label to its own label
+        if np.array_equal(labels, before):
+            break
+    return labels
+
+
+def join_labels(pairs):
+    """{label: smallest label it is connected to} for (label, label) pairs of clusters to merge"""
+    nodes = sorted({label for pair in pairs for label in pair})
+    rank = {node: i for i, node in enumerate(nodes)}
+    left = np.array([rank[a] for a, _ in pairs], dtype=np.int64)
+    right = np.array([rank[b] for _, b in pairs], dtype=np.int64)
+    return {node: nodes[i] for node, i in zip(nodes, components(len(nodes), left, right).tolist())}
+
+
+def agreements(sigs, stored):
+    """Share of positions where each signature matches its counterpart stored as bytes"""
+    if not len(sigs):
+        return np.zeros(0)
+    other = np.frombuffer(b''.join(stored), dtype=np.uint32).reshape(len(stored), -1)
+    return (np.asarray(sigs) == other).mean(axis=1)
+
+
+def is_named(name):
+    return bool(name and name.strip())
+
+
+def cluster_ids(names, ids=None, threshold=THRESHOLD, sigs=None):
+    """
+    Cluster id for every name: the smallest of ids (default: the index) among
+    the names it is a near-duplicate of. Unnamed products stay on their own.
+    sigs - signatures of the named names, if already computed
+    """
+    require_numpy()
+    ids = np.arange(len(names)) if ids is None else np.asarray(ids)
+    if not len(names):
+        return ids
+    named = np.flatnonzero([is_named(name) for name in names])
+    if sigs is None:
+        sigs = signatures([names[i] for i in named])
+    left, right = candidate_pairs(sigs, threshold=threshold)
+    # order by id first so each component's representative is its smallest id
+    by_id = np.argsort(ids[named], kind='stable')
+    rank = np.empty_like(by_id)
+    rank[by_id] = np.arange(len(by_id))
+    labels = components(len(named), rank[left], rank[right])
+    result = ids.copy()
+    result[named] = ids[named][by_id][labels[rank]]
+    return result
+
+
+def add_cluster_ids(products, threshold=THRESHOLD):
+    """Set product['cluster_id'] on a list of product dicts; returns the number of clusters"""
+    labels = cluster_ids([p.get('name') for p in products], threshold=threshold)
+    for product, label in zip(products, labels.tolist()):
+        product['cluster_id'] = label
+    return len(set(labels.tolist()))
@@ -0,0 +1,111 @@
+"""
+ChromeDriver Resolution Cache
+Remembers which chromedriver matches the installed Chrome so startup does
+not ask webdriver-manager (and the network) on every run
+"""
+
+from datetime import datetime
+import json
+import os
+import re
+import subprocess
+import sys
+
+CACHE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'clothes-scraper', 'chromedriver.json')
+
+# Set this to a chromedriver binary to skip resolution entirely
+PINNED_ENV = 'CHROMEDRIVER_PATH'
+
+CHROME_COMMANDS = [
+    ['google-chrome', '--version'],
+    ['google-chrome-stable', '--version'],
+    ['chromium', '--version'],
+    ['chromium-browser', '--version'],
+    ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', '--version'],
+]
+
+_resolved = None
+
+
+def chrome_version():
+    """Installed Chrome version ('144.0.7559.96'), or None if not found"""
+    if sys.platform == 'win32':
+        try:
+            import winreg
+            for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(root, r'Software\Google\Chrome\BLBeacon') as key:
+                        return winreg.QueryValueEx(key, 'version')[0]
+                except OSError:
+                    continue
+        except ImportError:
+            pass
+        return None
+
+    for command in CHROME_COMMANDS:
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            continue
+        match = re.search(r'(\d+)\.\d+\.\d+\.\d+', output)
+        if match:
+            return match.group(0)
+    return None
+
+
+def _major(version):
+    return version.split('.')[0] if version else None
+
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cache(path, version):
+    os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'path': path,
+            'chrome_version': version,
+            'chrome_major': _major(version),
+            'resolved_at': datetime.now().isoformat()
+        }, f, indent=2)
+
+
+def resolve_chromedriver(force=False):
+    """
+    Path to a chromedriver for the installed Chrome.
+    Order: $CHROMEDRIVER_PATH, in-process memo, on-disk cache (if Chrome's
+    major version is unchanged), then webdriver-manager.
+    """
+    global _resolved
+
+    pinned = os.environ.get(PINNED_ENV)
+    if pinned:
+        if os.path.isfile(pinned):
+            return pinned
+        print(f"[!] {PINNED_ENV}={pinned} does not exist, resolving instead")
+
+    if _resolved and not force:
+        return _resolved
+
+    version = chrome_version()
+    cache = load_cache()
+    if (not force and cache and os.path.isfile(cache.get('path', ''))
+            and (version is None or cache.get('chrome_major') == _major(version))):
+        _resolved = cache['path']
+        return _resolved
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    print(f"[*] Resolving ChromeDriver for Chrome {version or '(unknown version)'}...")
+    _resolved = ChromeDriverManager().install()
+    try:
+        save_cache(_resolved, version)
+    except OSError as e:
+        print(f"[!] Could not write driver cache: {e}")
+    return _resolved
@@ -0,0 +1,243 @@
+"""
+Chrome Driver Pool
+Hands out warm Chrome drivers so a run pays Chrome's cold start once,
+not once per site or query
+"""
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from driver_cache import resolve_chromedriver
+from contextlib import contextmanager
+import atexit
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+import network_capture
+import rate_limiter
+import resource_blocking
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36'
+
+STEALTH_JS = '''
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
+'''
+
+# Recycle a driver after this many page loads or this much JS heap
+MAX_PAGES = 50
+MAX_HEAP_MB = 512
+
+# Keep Chrome's performance log (CDP Network.* events) for drivers started
+# from now on: network_capture reads site API responses from it and
+# page_archive saves response bodies
+PERFORMANCE_LOG = True
+
+
+def build_options(headless=True):
+    """Chrome options shared by every scraper"""
+    options = Options()
+    if headless:
+        options.add_argument('--headless=new')
+
+    # Anti-detection settings
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--disable-infobars')
+    options.add_argument(f'user-agent={USER_AGENT}')
+    options.add_experimental_option('excludeSwitches', ['enable-automation'])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    # Return from driver.get() at DOMContentLoaded; readiness.wait_for_page()
+    # then waits for the product tiles themselves
+    options.page_load_strategy = 'eager'
+    if PERFORMANCE_LOG:
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+    return options
+
+
+def create_driver(headless=True):
+    """Start a new Chrome (cold start, prefer DriverPool.lease())"""
+    service = Service(resolve_chromedriver())
+    driver = webdriver.Chrome(service=service, options=build_options(headless))
+
+    # Remove webdriver flag
+    driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': STEALTH_JS})
+    return driver
+
+
+class DriverPool:
+    def __init__(self, size=1, headless=True, max_pages=MAX_PAGES, max_heap_mb=MAX_HEAP_MB):
+        self.size = size
+        self.headless = headless
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+        self.idle = []          # warm drivers, most recently used last
+        self.drivers = set()
+        self.starting = 0
+        self.lock = threading.Lock()
+        # Signalled whenever a driver goes idle or a slot frees up, so a
+        # waiting acquire() can take the driver or start a replacement
+        self.available = threading.Condition(self.lock)
+        self.closed = False
+
+    def _start(self):
+        driver = create_driver(self.headless)
+
+        # Count page loads so the driver can be recycled after max_pages,
+        # remember origins so their storage can be wiped on release, apply
+        # the site's resource blocklist, and pace every navigation through
+        # the per-domain rate limiter
+        driver.pool_pages = 0
+        driver.pool_origins = set()
+        driver.pool_get = driver.get
+
+        def get(url):
+            driver.pool_pages += 1
+            parts = urlparse(url)
+            if parts.scheme in ('http', 'https'):
+                driver.pool_origins.add(f"{parts.scheme}://{parts.netloc}")
+                resource_blocking.apply_for_url(driver, url)
+                rate_limiter.acquire(url)
+            return driver.pool_get(url)
+
+        driver.get = get
+        return driver
+
+    def _quit(self, driver):
+        with self.available:
+            self.drivers.discard(driver)
+            self.available.notify()
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def _alive(self, driver):
+        try:
+            driver.current_url
+            return True
+        except WebDriverException:
+            return False
+
+    def acquire(self, timeout=None):
+        """Take a warm driver, starting one if the pool is not full yet; queue.Empty after timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.available:
+                while True:
+                    if self.closed:
+                        raise RuntimeError("driver pool is closed")
+                    if self.idle:
+                        driver, start = self.idle.pop(), False
+                        break
+                    if len(self.drivers) + self.starting < self.size:
+                        self.starting += 1  # reserve the slot
+                        driver, start = None, True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self.available.wait(remaining)
+
+            if start:
+                try:
+                    driver = self._start()
+                except BaseException:
+                    with self.available:
+                        self.starting -= 1
+                        self.available.notify()
+                    raise
+                with self.lock:
+                    self.starting -= 1
+                    self.drivers.add(driver)
+                return driver
+
+            if self._alive(driver):
+                return driver
+            self._quit(driver)
+
+    def release(self, driver):
+        """Give a driver back, resetting or recycling it"""
+        if self.closed or self._needs_recycle(driver):
+            self._quit(driver)
+            return
+        try:
+            self.reset(driver)
+        except WebDriverException:
+            self._quit(driver)
+            return
+        with self.available:
+            self.idle.append(driver)
+            self.available.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """with pool.lease() as driver: ..."""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def _needs_recycle(self, driver):
+        if driver.pool_pages >= self.max_pages:
+            return True
+        try:
+            heap = driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0")
+        except WebDriverException:
+            return True
+        return heap / (1024 * 1024) > self.max_heap_mb
+
+    def reset(self, driver):
+        """Drop cookies and storage so the next lease starts clean"""
+        driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+        for origin in driver.pool_origins:
+            driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+        driver.pool_origins.clear()
+        driver.pool_get('about:blank')
+        network_capture.forget(driver)
+
+    def close(self):
+        """Quit every driver, idle or leased"""
+        with self.available:
+            self.closed = True
+            drivers = list(self.drivers)
+            self.available.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(headless=True, size=None):
+    """Shared pool for this process (one per headless setting)"""
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None or pool.closed:
+            pool = DriverPool(size=size or 1, headless=headless)
+            _pools[headless] = pool
+        elif size and size > pool.size:
+            with pool.available:
+                pool.size = size
+                pool.available.notify_all()
+        return pool
+
+
+@atexit.register
+def shutdown():
+    """Quit all pooled Chrome processes at exit"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
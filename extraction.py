@@ -0,0 +1,360 @@
+"""
+Batched Product Extraction
+Pulls every product tile on a page with ONE execute_script call
+instead of several find_element round-trips per tile
+"""
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from lxml.cssselect import CSSSelector
+from urllib.parse import urljoin
+import json
+import lxml.html
+
+from hidden_state import rows_from_driver, rows_from_html
+import network_capture
+
+# Per-site selectors shared by every Selenium scraper.
+#   tiles  - tile selectors, tried in order until one matches
+#   fields - field -> list of (selector, attribute[, format]) tried in order,
+#            the first non-empty value wins. selector None means the tile itself,
+#            attribute 'text' means the visible text.
+#   state  - key into hidden_state.STATE_SITES when the page embeds its products
+#            as JSON; read before the tiles, which are the fallback
+#   api    - key into network_capture.API_SITES when the page fetches its
+#            products as JSON; those are added to whatever the tiles gave
+SITES = {
+    'ebay': {
+        'source': 'eBay',
+        'tiles': ['.s-item'],
+        'fields': {
+            'name': [('.s-item__title', 'text')],
+            'price': [('.s-item__price', 'text')],
+            'image': [('.s-item__image-img', 'src')],
+            'url': [('.s-item__link', 'href')],
+        },
+    },
+    'etsy': {
+        'source': 'Etsy',
+        'state': 'etsy',
+        'api': 'etsy',
+        'tiles': ['[data-listing-id]'],
+        'fields': {
+            'name': [('h3', 'text'), ('[class*="title"]', 'text')],
+            'price': [('[class*="price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'depop': {
+        'source': 'Depop',
+        'api': 'depop',
+        'tiles': ['[data-testid="product__item"]', 'a[href*="/products/"]'],
+        'fields': {
+            'name': [('[class*="ProductCard"]', 'text')],
+            'price': [('[class*="price"], [class*="Price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [(None, 'href'), ('a', 'href')],
+        },
+    },
+    'shein': {
+        'source': 'Shein',
+        'state': 'shein',
+        'tiles': ['.product-card, [class*="productCard"], .S-product-item', 'section[class*="product"]'],
+        'fields': {
+            'name': [('[class*="title"], [class*="name"], a[title]', 'text'), ('a[title]', 'title')],
+            'price': [('[class*="price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'asos': {
+        'source': 'ASOS',
+        'state': 'asos',
+        'api': 'asos',
+        'tiles': ['article[data-auto-id="productTile"]', '[class*="productTile"]'],
+        'fields': {
+            'name': [('[class*="productDescription"], h2, p', 'text')],
+            'price': [('[class*="price"], [data-auto-id*="price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'zara': {
+        'source': 'Zara',
+        'state': 'zara',
+        'tiles': ['[class*="product-grid-product"], li[class*="product"]'],
+        'fields': {
+            'name': [('[class*="name"], [class*="product-name"], h2', 'text')],
+            'price': [('[class*="price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'aliexpress': {
+        'source': 'AliExpress',
+        'api': 'aliexpress',
+        'tiles': ['[class*="search-card-item"], [class*="product-card"], .list--gallery--C2f2tvm'],
+        'fields': {
+            'name': [('h3, [class*="title"]', 'text')],
+            'price': [('[class*="price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'hm': {
+        'source': 'H&M',
+        'tiles': ['[data-item-type="product"], article.product-item', '.product-item, [class*="ProductItem"]'],
+        'fields': {
+            'name': [('a.link, [class*="ProductName"], h2', 'text')],
+            'price': [('[class*="price"], span.price', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'nordstrom': {
+        'source': 'Nordstrom',
+        'state': 'nordstrom',
+        'tiles': ['article[data-element]', '[class*="ProductCard"]'],
+        'fields': {
+            'name': [('h2, [class*="ProductName"]', 'text')],
+            'price': [('[class*="Price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'forever21': {
+        'source': 'Forever21',
+        'tiles': ['.product-tile, [class*="ProductCard"]'],
+        'fields': {
+            'name': [('[class*="product-name"], [class*="title"], h3', 'text')],
+            'price': [('[class*="price"]', 'text')],
+            'image': [('img', 'src')],
+            'url': [('a', 'href')],
+        },
+    },
+    'amazon': {
+        'source': 'Amazon',
+        'tiles': ['[data-component-type="s-search-result"]'],
+        'fields': {
+            'name': [('h2 a span', 'text'), ('h2 span', 'text')],
+            'price': [('.a-price .a-offscreen', 'textContent'), ('.a-price-whole', 'text', '${}')],
+            'rating': [('.a-icon-alt', 'textContent')],
+            'reviews': [('[aria-label*="stars"] + span', 'text')],
+            'image': [('.s-image', 'src')],
+            'url': [('h2 a', 'href')],
+        },
+    },
+}
+
+# Set to False to force the old per-element path everywhere
+USE_BATCHED = True
+# Set to False to skip the hidden-state JSON and always read the tiles
+USE_STATE = True
+# Set to False to ignore captured API responses
+USE_NETWORK = True
+
+_EXTRACT_JS = """
+const spec = %s;
+const limit = arguments[0];
+let tiles = [];
+for (const sel of spec.tiles) {
+    tiles = document.querySelectorAll(sel);
+    if (tiles.length) break;
+}
+const read = (el, attr) => {
+    if (attr === 'text') return (el.innerText || '').trim();
+    if (attr === 'textContent') return el.textContent;
+    const v = (attr in el) ? el[attr] : el.getAttribute(attr);
+    return v == null ? null : String(v);
+};
+const out = [];
+const n = limit == null ? tiles.length : Math.min(limit, tiles.length);
+for (let i = 0; i < n; i++) {
+    const row = {};
+    for (const [field, chain] of Object.entries(spec.fields)) {
+        let value = null;
+        for (const [sel, attr, fmt] of chain) {
+            const el = sel ? tiles[i].querySelector(sel) : tiles[i];
+            if (!el) continue;
+            let v = read(el, attr);
+            if (v && fmt) v = fmt.replace('{}', v);
+            if (v) { value = v; break; }
+            if (value === null) value = v;
+        }
+        row[field] = value;
+    }
+    out.push(row);
+}
+return out;
+"""
+
+_script_cache = {}   # compact spec JSON -> script; keyed by content, so a rebuilt spec still hits
+
+
+def build_extract_script(spec):
+    """Build (and cache) the JavaScript snippet for a site spec"""
+    compact = {
+        'tiles': spec['tiles'],
+        'fields': {f: [list(e) + [None] * (3 - len(e)) for e in chain]
+                   for f, chain in spec['fields'].items()},
+    }
+    key = json.dumps(compact)
+    if key not in _script_cache:
+        _script_cache[key] = _EXTRACT_JS % key
+    return _script_cache[key]
+
+
+def extract_tiles_batched(driver, spec, limit=None):
+    """Extract all tiles with a single execute_script call"""
+    rows = driver.execute_script(build_extract_script(spec), limit)
+    if not isinstance(rows, list):
+        raise WebDriverException("extraction script returned no rows")
+    return rows
+
+
+def _read_field(tile, chain):
+    value = None
+    for entry in chain:
+        selector, attr = entry[0], entry[1]
+        fmt = entry[2] if len(entry) > 2 else None
+        if selector:
+            found = tile.find_elements(By.CSS_SELECTOR, selector)
+            if not found:
+                continue
+            el = found[0]
+        else:
+            el = tile
+        v = el.text if attr == 'text' else el.get_attribute(attr)
+        if v and fmt:
+            v = fmt.replace('{}', v)
+        if v:
+            return v
+        if value is None:
+            value = v
+    return value
+
+
+def extract_tiles_slow(driver, spec, limit=None):
+    """Per-element fallback: find_elements on every field of every tile"""
+    tiles = []
+    for selector in spec['tiles']:
+        tiles = driver.find_elements(By.CSS_SELECTOR, selector)
+        if tiles:
+            break
+
+    rows = []
+    for tile in tiles[:limit]:
+        try:
+            rows.append({field: _read_field(tile, chain) for field, chain in spec['fields'].items()})
+        except WebDriverException:
+            continue
+    return rows
+
+
+_selector_cache = {}
+
+
+def _select(node, selector):
+    if selector not in _selector_cache:
+        _selector_cache[selector] = CSSSelector(selector)
+    return _selector_cache[selector](node)
+
+
+def _read_node(el, attr, url):
+    """Python reading of the script's read(): innerText, textContent, DOM property or attribute"""
+    if attr == 'text':
+        return ' '.join(el.text_content().split())
+    if attr == 'textContent':
+        return el.text_content()
+    value = el.get(attr)
+    if attr in ('href', 'src'):
+        # the DOM properties: absolute, and '' rather than null when missing
+        return urljoin(url, value) if value else ''
+    return value
+
+
+def extract_tiles_html(html, url, spec, limit=None):
+    """
+    What extract_tiles_batched returns for a page, read from saved HTML with
+    no browser (page_archive replay). Same spec rules as the script above.
+    """
+    if USE_STATE and spec.get('state'):
+        rows = rows_from_html(html, url, spec['state'], spec['fields'], limit)
+        if rows:
+            return rows
+    root = lxml.html.document_fromstring(html or '<html></html>')
+    tiles = []
+    for selector in spec['tiles']:
+        tiles = _select(root, selector)
+        if tiles:
+            break
+
+    rows = []
+    for tile in tiles[:limit]:
+        row = {}
+        for field, chain in spec['fields'].items():
+            value = None
+            for entry in chain:
+                selector, attr = entry[0], entry[1]
+                fmt = entry[2] if len(entry) > 2 else None
+                if selector:
+                    found = _select(tile, selector)
+                    if not found:
+                        continue
+                    el = found[0]
+                else:
+                    el = tile
+                v = _read_node(el, attr, url)
+                if v and fmt:
+                    v = fmt.replace('{}', v)
+                if v:
+                    value = v
+                    break
+                if value is None:
+                    value = v
+            row[field] = value
+        rows.append(row)
+    return rows
+
+
+def extract_tiles(driver, spec, limit=None, defaults=None):
+    """
+    Extract product tiles for a site spec.
+    Missing fields are filled from defaults (or left as None).
+    """
+    rows = None
+    api = spec.get('api') if USE_NETWORK else None
+    # Record/replay drivers (page_archive) snapshot or answer the extraction themselves
+    own = getattr(driver, 'extract_tiles', None)
+    if own is not None:
+        rows = own(spec, limit)
+    elif api and limit is not None and network_capture.enough(driver, api, spec, limit):
+        # The site's API already returned the whole page: no need to read the DOM
+        rows = network_capture.rows_from_driver(driver, api, spec, limit)
+        api = None
+    else:
+        if USE_STATE and spec.get('state'):
+            try:
+                rows = rows_from_driver(driver, spec['state'], spec['fields'], limit) or None
+            except WebDriverException as e:
+                print(f"[!] Hidden-state read failed, reading tiles: {str(e)[:60]}")
+        if rows is None and USE_BATCHED:
+            try:
+                rows = extract_tiles_batched(driver, spec, limit)
+            except WebDriverException as e:
+                print(f"[!] Batched extraction failed, using per-element path: {str(e)[:60]}")
+    if rows is None:
+        rows = extract_tiles_slow(driver, spec, limit)
+    if own is None and api:
+        try:
+            rows = network_capture.merge(rows, network_capture.rows_from_driver(driver, api, spec), limit)
+        except WebDriverException as e:
+            print(f"[!] Reading captured API responses failed: {str(e)[:60]}")
+
+    if defaults:
+        for row in rows:
+            for field, default in defaults.items():
+                if row.get(field) is None:
+                    row[field] = default
+    return rows
@@ -0,0 +1,284 @@
+"""
+Hidden-State Extraction
+Many sites ship their whole product grid as JSON inside the page
+(__NEXT_DATA__, window.__INITIAL_STATE__-style assignments, ld+json
+ItemLists). Reading that blob - one page_source scan or one execute_script
+call - gives every product on the page, not just the rendered tiles, and
+skips walking the DOM. Extractors fall back to tiles when no blob is found.
+"""
+
+from urllib.parse import urljoin
+import json
+import re
+
+# Per-site blobs and how their products map onto our fields.
+#   blobs  - where the JSON lives, tried in order until one has products:
+#            ('script', id)      <script id="..." type="application/json">
+#            ('assign', name)    window.name = {...} / name = {...} in an inline script
+#            ('ld+json', type)   the <script type="application/ld+json"> object of that @type
+#   items  - dotted path to the product list in the blob; * steps into every
+#            element of a list or value of a dict
+#   fields - field -> list of entries tried in order, the first non-empty wins:
+#            path, or (path, format) or (path, format, convert). path may be a
+#            tuple of paths, filled into the format's {} in order. Numbers in a
+#            path index lists, * takes the first element.
+#   base   - base URL for relative links (None means the page URL)
+STATE_SITES = {
+    'asos': {
+        'blobs': [('assign', 'window.asos.plp._data')],
+        'items': 'search.products',
+        'fields': {
+            'name': ['name'],
+            'price': ['price.current.text', ('price.current.value', '${}')],
+            'image': [('imageUrl', 'https://{}')],
+            'url': ['url'],
+        },
+        'base': 'https://www.asos.com/',
+    },
+    'shein': {
+        'blobs': [('assign', 'gbRawData')],
+        'items': 'results.goods',
+        'fields': {
+            'name': ['goods_name'],
+            'price': ['salePrice.amountWithSymbol', 'retailPrice.amountWithSymbol'],
+            'image': ['goods_img'],
+            'url': [(('goods_url_name', 'goods_id', 'cat_id'), '/{}-p-{}-cat-{}.html')],
+        },
+        'base': 'https://us.shein.com/',
+    },
+    'etsy': {
+        'blobs': [('ld+json', 'ItemList')],
+        'items': 'itemListElement',
+        'fields': {
+            'name': ['name', 'item.name'],
+            'price': [(('offers.price', 'offers.priceCurrency'), '{} {}'),
+                      (('item.offers.price', 'item.offers.priceCurrency'), '{} {}')],
+            'image': ['image', 'image.*', 'item.image'],
+            'url': ['url', 'item.url'],
+        },
+        'base': None,
+    },
+    'nordstrom': {
+        'blobs': [('assign', 'window.__INITIAL_STATE__')],
+        'items': 'productResults.productsById.*',
+        'fields': {
+            'name': ['name'],
+            'price': ['pricesById.sale.priceString', 'pricesById.regular.priceString'],
+            'image': ['media.0.src'],
+            'url': ['productPageUrl'],
+        },
+        'base': 'https://www.nordstrom.com/',
+    },
+    'zara': {
+        'blobs': [('assign', 'window.zara.viewPayload')],
+        'items': 'productGroups.*.elements.*.commercialComponents.*',
+        'fields': {
+            'name': ['name'],
+            'price': [('price', '{} USD', 'cents')],
+            'image': [(('xmedia.0.path', 'xmedia.0.name', 'xmedia.0.timestamp'),
+                       'https://static.zara.net/photos///{}/w/563/{}.jpg?ts={}')],
+            'url': [(('seo.keyword', 'seo.seoProductId'), '/us/en/{}-p{}.html')],
+        },
+        'base': 'https://www.zara.com/',
+    },
+}
+
+CONVERTERS = {
+    'cents': lambda value: f"{int(value) / 100:.2f}",
+}
+
+# One round-trip: the raw JSON text of each blob, or null
+_STATE_JS = """
+const out = [];
+for (const [kind, name] of arguments[0]) {
+    if (kind === 'script') {
+        const el = document.getElementById(name);
+        out.push(el ? el.textContent : null);
+    } else if (kind === 'assign') {
+        let value = window;
+        for (const part of name.replace(/^window\\./, '').split('.')) value = value == null ? value : value[part];
+        out.push(value == null ? null : JSON.stringify(value));
+    } else {
+        const docs = Array.from(document.querySelectorAll('script[type="application/ld+json"]'), s => s.textContent);
+        out.push(JSON.stringify(docs));
+    }
+}
+return out;
+"""
+
+_decoder = json.JSONDecoder()
+_patterns = {}
+
+
+def _script_pattern(kind, name):
+    key = (kind, name)
+    if key not in _patterns:
+        attr = r'\bid=["\']' + re.escape(name) if kind == 'script' else r'type=["\']application/ld\+json'
+        _patterns[key] = re.compile(r'<script[^>]*' + attr + r'["\'][^>]*>(.*?)</script>', re.S | re.I)
+    return _patterns[key]
+
+
+def _assigned(html, name):
+    """The JSON value assigned to name (window. optional) in the page, or None"""
+    bare = name[len('window.'):] if name.startswith('window.') else name
+    pos = html.find(bare)
+    while pos >= 0:
+        end = pos + len(bare)
+        while end < len(html) and html[end] in ' \t\r\n':
+            end += 1
+        if html.startswith('=', end) and not html.startswith('==', end):
+            end += 1
+            while end < len(html) and html[end] in ' \t\r\n':
+                end += 1
+            try:
+                return _decoder.raw_decode(html, end)[0]
+            except ValueError:
+                pass
+        pos = html.find(bare, pos + 1)
+    return None
+
+
+def _loads(text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def blobs_from_html(html, state):
+    """Decoded JSON per blob in state['blobs'] (None where absent), read from page source"""
+    found = []
+    for kind, name in state['blobs']:
+        if kind == 'assign':
+            found.append(_assigned(html, name))
+        elif kind == 'script':
+            match = _script_pattern(kind, name).search(html)
+            found.append(_loads(match.group(1)) if match else None)
+        else:
+            found.append([_loads(body) for body in _script_pattern(kind, name).findall(html)])
+    return found
+
+
+def blobs_from_driver(driver, state):
+    """The same, with one execute_script call in the page"""
+    texts = driver.execute_script(_STATE_JS, [list(blob) for blob in state['blobs']])
+    if not isinstance(texts, list):
+        return []
+    found = []
+    for (kind, _), text in zip(state['blobs'], texts):
+        value = _loads(text)
+        found.append([_loads(body) for body in value] if kind == 'ld+json' and value else value)
+    return found
+
+
+# ==================== Paths ====================
+def walk(value, path):
+    """Every value at a dotted path; * fans out over list elements / dict values"""
+    values = [value]
+    for part in path.split('.') if path else []:
+        step = []
+        for v in values:
+            if part == '*':
+                if isinstance(v, list):
+                    step.extend(v)
+                elif isinstance(v, dict):
+                    step.extend(v.values())
+            elif isinstance(v, dict):
+                if part in v:
+                    step.append(v[part])
+            elif isinstance(v, list) and part.isdigit() and int(part) < len(v):
+                step.append(v[int(part)])
+        values = step
+    return values
+
+
+def lookup(item, path):
+    found = walk(item, path)
+    return found[0] if found else None
+
+
+def read_field(item, entries):
+    for entry in entries:
+        if isinstance(entry, str):
+            entry = (entry,)
+        path, fmt, convert = (tuple(entry) + (None, None))[:3]
+        paths = path if isinstance(path, tuple) else (path,)
+        values = [lookup(item, p) for p in paths]
+        if any(v is None or v == '' or isinstance(v, (dict, list)) for v in values):
+            continue
+        if convert:
+            values = [CONVERTERS[convert](v) for v in values]
+        value = fmt.format(*values) if fmt else str(values[0])
+        if value.strip():
+            return value.strip()
+    return None
+
+
+def ld_documents(bodies, wanted):
+    """Objects of @type wanted in the decoded ld+json script bodies"""
+    docs = []
+    stack = list(bodies)
+    while stack:
+        node = stack.pop(0)
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict):
+            if node.get('@type') == wanted:
+                docs.append(node)
+            stack.extend(node.get('@graph', []))
+    return docs
+
+
+def absolute(base, link):
+    return link if link.startswith(('https://', 'http://')) else urljoin(base, link)
+
+
+def rows_from_items(items, spec, fields, base, limit=None):
+    """Rows with the given fields for the product dicts in items, per spec['fields']"""
+    rows = []
+    for item in items:
+        for item in item if isinstance(item, list) else [item]:
+            if not isinstance(item, dict):
+                continue
+            row = {field: read_field(item, spec['fields'][field]) if field in spec['fields'] else None
+                   for field in fields}
+            if not row.get('name'):
+                continue
+            if row.get('url'):
+                row['url'] = absolute(base, row['url'])
+            if row.get('image'):
+                row['image'] = absolute(base, row['image'])
+            rows.append(row)
+            if limit is not None and len(rows) >= limit:
+                return rows
+    return rows
+
+
+def rows_from_blobs(blobs, state, fields, url, limit=None):
+    """Rows for the first blob that holds products, else []"""
+    base = state.get('base') or url
+    for (kind, name), blob in zip(state['blobs'], blobs):
+        if not blob:
+            continue
+        docs = ld_documents(blob, name) if kind == 'ld+json' else [blob]
+        rows = rows_from_items([item for doc in docs for item in walk(doc, state['items'])],
+                               state, fields, base, limit)
+        if rows:
+            return rows
+    return []
+
+
+def rows_from_html(html, url, site, fields, limit=None):
+    """Products from the site's hidden state in page source, [] when it has none"""
+    state = STATE_SITES.get(site)
+    if state is None or not html:
+        return []
+    return rows_from_blobs(blobs_from_html(html, state), state, fields, url, limit)
+
+
+def rows_from_driver(driver, site, fields, limit=None):
+    """Products from the site's hidden state in the live page, [] when it has none"""
+    state = STATE_SITES.get(site)
+    if state is None:
+        return []
+    return rows_from_blobs(blobs_from_driver(driver, state), state, fields, driver.current_url, limit)
@@ -0,0 +1,296 @@
+"""
+HTML Parser Backends
+Parses category pages with selectolax or lxml instead of html.parser, strips
+scripts/styles/svg before parsing, and compiles each site's selectors once
+Optional: pip install selectolax (lxml + cssselect are used otherwise)
+"""
+
+from urllib.parse import urljoin
+import os
+import re
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+from bs4 import BeautifulSoup
+import soupsieve
+
+from hidden_state import rows_from_html
+from product import Product, stamp
+
+# Per-site rules for the requests-based scrapers. These are the CSS versions of
+# the old find_all(..., class_=re.compile(...)) lookups.
+#   tiles  - tile selectors, tried in order until one matches
+#   fields - field -> selector inside the tile. name/price take the first match
+#            with text (image links often match the name selector too), image/url
+#            the first match in document order
+#   base   - base URL for relative links (None means the page URL)
+#   state  - key into hidden_state.STATE_SITES when the page embeds its products
+#            as JSON; read before the tiles, which are the fallback
+PAGE_SITES = {
+    'hm': {
+        'source': 'H&M',
+        'tiles': ['article[class*="product-item"]', 'li[class*="product"]'],
+        'fields': {
+            'name': 'h2[class*="link"], h2[class*="title"], h2[class*="name"], '
+                    'h3[class*="link"], h3[class*="title"], h3[class*="name"], '
+                    'a[class*="link"], a[class*="title"], a[class*="name"]',
+            'price': 'span[class*="price"], div[class*="price"]',
+            'image': 'img',
+            'url': 'a[href]',
+        },
+        'base': None,
+    },
+    'asos': {
+        'source': 'ASOS',
+        'tiles': ['article[data-auto-id="productTile"]', 'div[class*="product"]'],
+        'fields': {
+            'name': '[class*="productDescription"], '
+                    'h2[class*="title"], h2[class*="name"], h2[class*="description"], '
+                    'p[class*="title"], p[class*="name"], p[class*="description"], '
+                    'div[class*="title"], div[class*="name"], div[class*="description"]',
+            'price': 'span[class*="price"], p[class*="price"]',
+            'image': 'img',
+            'url': 'a[href]',
+        },
+        'base': 'https://www.asos.com',
+        'state': 'asos',
+    },
+    'zara': {
+        'source': 'Zara',
+        'tiles': ['li[class*="product"]', 'div[class*="product-grid-product"]'],
+        'fields': {
+            'name': 'a[class*="name"], a[class*="title"], a[class*="link"], '
+                    'span[class*="name"], span[class*="title"], span[class*="link"], '
+                    'h2[class*="name"], h2[class*="title"], h2[class*="link"]',
+            'price': 'span[class*="price"], span[class*="money"], div[class*="price"], div[class*="money"]',
+            'image': 'img',
+            'url': 'a[href]',
+        },
+        'base': 'https://www.zara.com',
+        'state': 'zara',
+    },
+}
+
+# Pre-filter: none of this can hold a product tile, and on a modern category
+# page it is most of the bytes (inline bundles, JSON blobs, icon sprites)
+NOISE_START = re.compile(r'<(script|style|svg|noscript|template)\b|<!--', re.I)
+
+
+def default_backend():
+    """$SCRAPER_PARSER if set, else the fastest one installed"""
+    backend = os.environ.get('SCRAPER_PARSER')
+    if backend:
+        return backend
+    if LexborHTMLParser is not None:
+        return 'selectolax'
+    if CSSSelector is not None:
+        return 'lxml'
+    return 'bs4'
+
+
+PARSER_BACKEND = default_backend()
+
+
+def strip_noise(html):
+    """Cut noise blocks out with str.find, which is much cheaper than a lazy regex over megabytes"""
+    parts = []
+    pos = 0
+    while True:
+        match = NOISE_START.search(html, pos)
+        if not match:
+            break
+        parts.append(html[pos:match.start()])
+        if match.group(1):
+            close = '</' + match.group(1)
+            end = html.find(close, match.end())
+            if end < 0:
+                end = html.lower().find(close.lower(), match.end())
+            pos = html.find('>', end) + 1 if end >= 0 else len(html)
+        else:
+            end = html.find('-->', match.end())
+            pos = end + 3 if end >= 0 else len(html)
+        if pos == 0:
+            pos = len(html)
+    parts.append(html[pos:])
+    return ''.join(parts)
+
+
+# ==================== Backends ====================
+# Each backend: parse(html) -> root, compile(selector) -> matcher,
+# select(node, matcher) -> list, first(node, matcher) -> node or None,
+# text(node), attr(node, name)
+
+class SelectolaxBackend:
+    name = 'selectolax'
+
+    def parse(self, html):
+        return LexborHTMLParser(html)
+
+    def compile(self, selector):
+        return selector  # lexbor has no reusable compiled form
+
+    def select(self, node, selector):
+        return node.css(selector)
+
+    def first(self, node, selector):
+        return node.css_first(selector)
+
+    def text(self, node):
+        return node.text(strip=True)
+
+    def attr(self, node, name):
+        return node.attributes.get(name)
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    def parse(self, html):
+        return lxml.html.document_fromstring(html or '<html></html>')
+
+    def compile(self, selector):
+        return CSSSelector(selector)
+
+    def select(self, node, selector):
+        return selector(node)
+
+    def first(self, node, selector):
+        found = selector(node)
+        return found[0] if found else None
+
+    def text(self, node):
+        return ''.join(part.strip() for part in node.itertext())
+
+    def attr(self, node, name):
+        return node.get(name)
+
+
+class SoupBackend:
+    """BeautifulSoup on the lxml tree builder, for when neither of the above is installed"""
+    name = 'bs4'
+
+    def parse(self, html):
+        return BeautifulSoup(html, 'lxml' if CSSSelector is not None else 'html.parser')
+
+    def compile(self, selector):
+        return soupsieve.compile(selector)
+
+    def select(self, node, selector):
+        return selector.select(node)
+
+    def first(self, node, selector):
+        return selector.select_one(node)
+
+    def text(self, node):
+        return node.get_text(strip=True)
+
+    def attr(self, node, name):
+        return node.get(name)
+
+
+BACKENDS = {'selectolax': SelectolaxBackend, 'lxml': LxmlBackend, 'bs4': SoupBackend}
+_backends = {}
+_compiled = {}
+_generic = {}
+
+
+def get_backend(name=None):
+    name = name or PARSER_BACKEND
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def compile_spec(spec, backend):
+    """Compile a site's selectors once per backend"""
+    key = (id(spec), backend.name)
+    if key not in _compiled:
+        _compiled[key] = (
+            [backend.compile(s) for s in spec['tiles']],
+            [(field, backend.compile(s)) for field, s in spec['fields'].items()],
+        )
+    return _compiled[key]
+
+
+def generic_spec(source, product_selector, name_selector, price_selector, image_selector, link_selector):
+    """Spec for user-supplied selectors, reused so they are compiled once"""
+    key = (source, product_selector, name_selector, price_selector, image_selector, link_selector)
+    if key not in _generic:
+        _generic[key] = {
+            'source': source,
+            'tiles': [product_selector],
+            'fields': {'name': name_selector, 'price': price_selector,
+                       'image': image_selector, 'url': link_selector},
+            'base': None,
+        }
+    return _generic[key]
+
+
+# ==================== Extraction ====================
+TEXT_FIELDS = ('name', 'price')
+
+
+def first_text(backend, node, selector):
+    for match in backend.select(node, selector):
+        text = backend.text(match)
+        if text:
+            return text
+    return None
+
+
+def find_tiles(html, spec, backend=None, prefilter=True):
+    """Parse a page and return (backend, tiles, compiled fields)"""
+    backend = get_backend(backend)
+    tiles, fields = compile_spec(spec, backend)
+    root = backend.parse(strip_noise(html) if prefilter else html)
+    for tile_selector in tiles:
+        found = backend.select(root, tile_selector)
+        if found:
+            return backend, found, fields
+    return backend, [], fields
+
+
+def extract_page(html, url, spec, backend=None, prefilter=True, state=True):
+    """Products for every tile on the page, same fields as the old BeautifulSoup parsers"""
+    scraped_at = stamp()
+    if state and spec.get('state'):
+        rows = rows_from_html(html, url, spec['state'], spec['fields'])
+        if rows:
+            return [Product(source=spec['source'], name=row['name'], price=row['price'] or 'N/A',
+                            image=row['image'] or 'N/A', url=row['url'] or 'N/A', scraped_at=scraped_at)
+                    for row in rows]
+
+    backend, tiles, fields = find_tiles(html, spec, backend, prefilter)
+    base = spec.get('base') or url
+
+    results = []
+    for tile in tiles:
+        values = {}
+        for field, selector in fields:
+            if field in TEXT_FIELDS:
+                values[field] = first_text(backend, tile, selector)
+            else:
+                values[field] = backend.first(tile, selector)
+
+        if values['name'] is None:
+            continue
+        image, link = values['image'], values['url']
+        href = backend.attr(link, 'href') if link is not None else None
+        results.append(Product(
+            source=spec['source'],
+            name=values['name'],
+            price=values['price'] or 'N/A',
+            image=(backend.attr(image, 'src') or backend.attr(image, 'data-src')) if image is not None else 'N/A',
+            url=urljoin(base, href) if href else 'N/A',
+            scraped_at=scraped_at,
+        ))
+    return results
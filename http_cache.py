@@ -0,0 +1,170 @@
+"""
+HTTP Cache
+On-disk cache for ClothingScraper.make_request: stores ETag/Last-Modified,
+revalidates with If-None-Match/If-Modified-Since, and keeps the products
+extracted from each page so a 304 can skip parsing entirely
+"""
+
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from product import Product
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(SCRIPT_DIR, '.http_cache.sqlite')
+DEFAULT_TTL = 600                       # seconds an entry is served without revalidating
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024   # compressed bodies, LRU-evicted above this
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    encoding TEXT,
+    body BLOB,
+    size INTEGER,
+    raw_size INTEGER,
+    stored_at REAL,
+    last_used REAL
+);
+CREATE TABLE IF NOT EXISTS extractions (
+    url TEXT,
+    kind TEXT,
+    products TEXT,
+    PRIMARY KEY (url, kind)
+);
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+"""
+
+
+class CachedResponse:
+    """Stands in for a requests.Response served from the cache"""
+
+    def __init__(self, url, text, revalidated):
+        self.url = url
+        self.text = text
+        self.status_code = 200
+        self.from_cache = True
+        self.revalidated = revalidated
+
+
+class HttpCache:
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.stats = {'fresh': 0, 'revalidated': 0, 'misses': 0, 'bytes_saved': 0, 'bytes_fetched': 0}
+
+    def lookup(self, url):
+        """Cached entry for url as a dict, or None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, last_modified, stored_at, raw_size FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        return {'url': url, 'etag': row[0], 'last_modified': row[1], 'stored_at': row[2], 'raw_size': row[3]}
+
+    def is_fresh(self, entry):
+        return entry['stored_at'] + self.ttl > time.time()
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def serve(self, entry, revalidated):
+        """Return the stored page as a CachedResponse and count the hit"""
+        url = entry['url']
+        now = time.time()
+        with self.lock:
+            body, encoding = self.db.execute("SELECT body, encoding FROM pages WHERE url = ?", (url,)).fetchone()
+            if revalidated:
+                self.db.execute("UPDATE pages SET stored_at = ?, last_used = ? WHERE url = ?", (now, now, url))
+            else:
+                self.db.execute("UPDATE pages SET last_used = ? WHERE url = ?", (now, url))
+            self.db.commit()
+            self.stats['revalidated' if revalidated else 'fresh'] += 1
+            self.stats['bytes_saved'] += entry['raw_size'] or 0
+        text = zlib.decompress(body).decode(encoding or 'utf-8', errors='replace')
+        return CachedResponse(url, text, revalidated)
+
+    def store(self, url, response):
+        """Save a 200 response if the server gave us something to revalidate with"""
+        raw = response.content
+        with self.lock:
+            self.stats['misses'] += 1
+            self.stats['bytes_fetched'] += len(raw)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        body = zlib.compress(raw)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, response.encoding, body, len(body), len(raw), now, now))
+            # The page changed, so any stored extraction is stale
+            self.db.execute("DELETE FROM extractions WHERE url = ?", (url,))
+            self.db.commit()
+        self.evict()
+
+    def get_extraction(self, url, kind):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT products FROM extractions WHERE url = ? AND kind = ?", (url, kind)).fetchone()
+        return [Product.from_dict(p) for p in json.loads(row[0])] if row else None
+
+    def store_extraction(self, url, kind, products):
+        with self.lock:
+            if not self.db.execute("SELECT 1 FROM pages WHERE url = ?", (url,)).fetchone():
+                return
+            self.db.execute("INSERT OR REPLACE INTO extractions VALUES (?, ?, ?)",
+                            (url, kind, json.dumps(products, ensure_ascii=False, default=dict)))
+            self.db.commit()
+
+    def evict(self):
+        """Drop least recently used pages until the cache fits in max_bytes"""
+        with self.lock:
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for url, size in self.db.execute("SELECT url, size FROM pages ORDER BY last_used").fetchall():
+                self.db.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self.db.execute("DELETE FROM extractions WHERE url = ?", (url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+            self.db.commit()
+
+    def report(self):
+        s = self.stats
+        lookups = s['fresh'] + s['revalidated'] + s['misses']
+        if not lookups:
+            return
+        hits = s['fresh'] + s['revalidated']
+        print(f"\n[*] HTTP cache: {hits}/{lookups} hits ({hits / lookups:.0%}) - "
+              f"{s['fresh']} fresh, {s['revalidated']} revalidated (304), {s['misses']} downloaded")
+        print(f"    Bytes saved: {s['bytes_saved'] / 1024:.0f} KB, downloaded: {s['bytes_fetched'] / 1024:.0f} KB")
+
+    def close(self):
+        self.db.close()
+
+
+def restamp(products):
+    """Reused extractions are observed again now"""
+    scraped_at = datetime.now().isoformat()
+    for product in products:
+        product['scraped_at'] = scraped_at
+    return products
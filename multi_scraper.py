@@ -3,14 +3,13 @@ Multi-Site Clothes Scraper
 Scrapes from multiple reliable e-commerce sites
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import json
+from driver_pool import get_pool
+from extraction import SITES, extract_tiles
+from readiness import wait_for_page, report as report_readiness
+from scrolling import scroll_page, report as report_scrolling
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
+from product_store import ProductStore
 import time
 import random
 from datetime import datetime
@@ -22,31 +21,16 @@ class MultiSiteScraper:
     def __init__(self, headless=True):
         print("[*] Setting up Chrome driver...")
         
-        options = Options()
-        if headless:
-            options.add_argument('--headless=new')
-        
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--disable-gpu')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
-        options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-        self.products = []
+        self.pool = get_pool(headless)
+        self.driver = self.pool.acquire()
+        # Written to disk as they are found; save_data reads them back
+        self.products = JsonlSink(stream_path('clothes_data'))
+        self.started = datetime.now().isoformat()
         print("[+] Chrome ready!")
     
     def delay(self, min_s=1, max_s=3):
         time.sleep(random.uniform(min_s, max_s))
     
-    def scroll_page(self):
-        for i in range(3):
-            self.driver.execute_script(f"window.scrollTo(0, {(i+1) * 500});")
-            time.sleep(0.3)
-    
     def scrape_ebay(self, query="shirts", max_items=25):
         """Scrape eBay - Very reliable"""
         print(f"\n[eBay] Searching for: {query}")
@@ -54,48 +38,31 @@ class MultiSiteScraper:
         try:
             url = f"https://www.ebay.com/sch/i.html?_nkw={query.replace(' ', '+')}&_sacat=11450"
             self.driver.get(url)
-            self.delay(2, 4)
-            self.scroll_page()
+            wait_for_page(self.driver, 'ebay', replaces=3)
+            scroll_page(self.driver, 'ebay', max_items + 1, replaces=0.9)
             
-            items = self.driver.find_elements(By.CSS_SELECTOR, '.s-item')
+            items = extract_tiles(self.driver, SITES['ebay'], defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
             print(f"[eBay] Found {len(items)} items")
             
             count = 0
+            scraped_at = stamp()
             for item in items[1:]:  # Skip header
                 if count >= max_items:
                     break
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, '.s-item__title').text
-                    if "Shop on eBay" in name:
-                        continue
-                    
-                    try:
-                        price = item.find_element(By.CSS_SELECTOR, '.s-item__price').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = item.find_element(By.CSS_SELECTOR, '.s-item__image-img').get_attribute('src')
-                    except:
-                        image = ""
-                    
-                    try:
-                        link = item.find_element(By.CSS_SELECTOR, '.s-item__link').get_attribute('href')
-                    except:
-                        link = ""
-                    
-                    self.products.append({
-                        'source': 'eBay',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    count += 1
-                    print(f"  [+] {name[:45]}...")
-                except:
+                name = item['name']
+                if not name or "Shop on eBay" in name:
                     continue
+                
+                self.products.append(Product(
+                    source='eBay',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                count += 1
+                print(f"  [+] {name[:45]}...")
                     
         except Exception as e:
             print(f"[eBay] Error: {e}")
@@ -107,50 +74,29 @@ class MultiSiteScraper:
         try:
             url = f"https://www.etsy.com/search?q={query.replace(' ', '+')}&explicit=1&category_id=1&ship_to=US"
             self.driver.get(url)
-            self.delay(3, 5)
-            self.scroll_page()
+            wait_for_page(self.driver, 'etsy', replaces=4)
+            scroll_page(self.driver, 'etsy', max_items, replaces=0.9)
             
-            items = self.driver.find_elements(By.CSS_SELECTOR, '[data-listing-id]')
+            items = extract_tiles(self.driver, SITES['etsy'], defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
             print(f"[Etsy] Found {len(items)} items")
             
             count = 0
+            scraped_at = stamp()
             for item in items:
                 if count >= max_items:
                     break
-                try:
-                    try:
-                        name = item.find_element(By.CSS_SELECTOR, 'h3').text
-                    except:
-                        name = item.find_element(By.CSS_SELECTOR, '[class*="title"]').text
-                    
-                    try:
-                        price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                    except:
-                        image = ""
-                    
-                    try:
-                        link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    except:
-                        link = ""
-                    
-                    if name and len(name) > 3:
-                        self.products.append({
-                            'source': 'Etsy',
-                            'name': name,
-                            'price': price,
-                            'image': image,
-                            'url': link,
-                            'scraped_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                        print(f"  [+] {name[:45]}...")
-                except:
-                    continue
+                name = item['name']
+                if name and len(name) > 3:
+                    self.products.append(Product(
+                        source='Etsy',
+                        name=name,
+                        price=item['price'],
+                        image=item['image'],
+                        url=item['url'],
+                        scraped_at=scraped_at
+                    ))
+                    count += 1
+                    print(f"  [+] {name[:45]}...")
                     
         except Exception as e:
             print(f"[Etsy] Error: {e}")
@@ -162,55 +108,29 @@ class MultiSiteScraper:
         try:
             url = f"https://www.depop.com/search/?q={query.replace(' ', '%20')}"
             self.driver.get(url)
-            self.delay(3, 5)
-            self.scroll_page()
-            
-            items = self.driver.find_elements(By.CSS_SELECTOR, '[data-testid="product__item"]')
-            if not items:
-                items = self.driver.find_elements(By.CSS_SELECTOR, 'a[href*="/products/"]')
+            wait_for_page(self.driver, 'depop', replaces=4)
+            scroll_page(self.driver, 'depop', max_items, replaces=0.9)
             
+            items = extract_tiles(self.driver, SITES['depop'], defaults={'name': 'Depop Item', 'price': 'N/A', 'image': '', 'url': ''})
             print(f"[Depop] Found {len(items)} items")
             
             count = 0
+            scraped_at = stamp()
             for item in items:
                 if count >= max_items:
                     break
-                try:
-                    try:
-                        name = item.find_element(By.CSS_SELECTOR, '[class*="ProductCard"]').text
-                    except:
-                        name = "Depop Item"
-                    
-                    try:
-                        price = item.find_element(By.CSS_SELECTOR, '[class*="price"], [class*="Price"]').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                    except:
-                        image = ""
-                    
-                    try:
-                        link = item.get_attribute('href')
-                        if not link:
-                            link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    except:
-                        link = ""
-                    
-                    if image:
-                        self.products.append({
-                            'source': 'Depop',
-                            'name': name if name else "Fashion Item",
-                            'price': price,
-                            'image': image,
-                            'url': link,
-                            'scraped_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                        print(f"  [+] {name[:45]}...")
-                except:
-                    continue
+                name = item['name']
+                if item['image']:
+                    self.products.append(Product(
+                        source='Depop',
+                        name=name if name else "Fashion Item",
+                        price=item['price'],
+                        image=item['image'],
+                        url=item['url'],
+                        scraped_at=scraped_at
+                    ))
+                    count += 1
+                    print(f"  [+] {name[:45]}...")
                     
         except Exception as e:
             print(f"[Depop] Error: {e}")
@@ -222,56 +142,31 @@ class MultiSiteScraper:
         try:
             url = f"https://us.shein.com/pdsearch/{query.replace(' ', '%20')}/"
             self.driver.get(url)
-            self.delay(4, 6)
-            self.scroll_page()
+            wait_for_page(self.driver, 'shein', replaces=5)
+            scroll_page(self.driver, 'shein', max_items, replaces=0.9)
             self.delay(1, 2)
             
-            items = self.driver.find_elements(By.CSS_SELECTOR, '.product-card, [class*="productCard"], .S-product-item')
-            if not items:
-                items = self.driver.find_elements(By.CSS_SELECTOR, 'section[class*="product"]')
-            
+            items = extract_tiles(self.driver, SITES['shein'], defaults={'name': 'Shein Item', 'price': 'N/A', 'image': '', 'url': ''})
             print(f"[Shein] Found {len(items)} items")
             
             count = 0
+            scraped_at = stamp()
             for item in items:
                 if count >= max_items:
                     break
-                try:
-                    try:
-                        name = item.find_element(By.CSS_SELECTOR, '[class*="title"], [class*="name"], a[title]').text
-                        if not name:
-                            name = item.find_element(By.CSS_SELECTOR, 'a[title]').get_attribute('title')
-                    except:
-                        name = "Shein Item"
-                    
-                    try:
-                        price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                    except:
-                        image = ""
-                    
-                    try:
-                        link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    except:
-                        link = ""
-                    
-                    if name and len(name) > 3:
-                        self.products.append({
-                            'source': 'Shein',
-                            'name': name,
-                            'price': price,
-                            'image': image,
-                            'url': link if link.startswith('http') else f"https://us.shein.com{link}",
-                            'scraped_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                        print(f"  [+] {name[:45]}...")
-                except:
-                    continue
+                name = item['name']
+                link = item['url']
+                if name and len(name) > 3:
+                    self.products.append(Product(
+                        source='Shein',
+                        name=name,
+                        price=item['price'],
+                        image=item['image'],
+                        url=link if link.startswith('http') else f"https://us.shein.com{link}",
+                        scraped_at=scraped_at
+                    ))
+                    count += 1
+                    print(f"  [+] {name[:45]}...")
                     
         except Exception as e:
             print(f"[Shein] Error: {e}")
@@ -283,53 +178,29 @@ class MultiSiteScraper:
         try:
             url = f"https://www.asos.com/us/search/?q={query.replace(' ', '+')}"
             self.driver.get(url)
-            self.delay(3, 5)
-            self.scroll_page()
-            
-            items = self.driver.find_elements(By.CSS_SELECTOR, 'article[data-auto-id="productTile"]')
-            if not items:
-                items = self.driver.find_elements(By.CSS_SELECTOR, '[class*="productTile"]')
+            wait_for_page(self.driver, 'asos', replaces=4)
+            scroll_page(self.driver, 'asos', max_items, replaces=0.9)
             
+            items = extract_tiles(self.driver, SITES['asos'], defaults={'name': 'ASOS Item', 'price': 'N/A', 'image': '', 'url': ''})
             print(f"[ASOS] Found {len(items)} items")
             
             count = 0
+            scraped_at = stamp()
             for item in items:
                 if count >= max_items:
                     break
-                try:
-                    try:
-                        name = item.find_element(By.CSS_SELECTOR, '[class*="productDescription"], h2, p').text
-                    except:
-                        name = "ASOS Item"
-                    
-                    try:
-                        price = item.find_element(By.CSS_SELECTOR, '[class*="price"], [data-auto-id*="price"]').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                    except:
-                        image = ""
-                    
-                    try:
-                        link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    except:
-                        link = ""
-                    
-                    if name and len(name) > 3:
-                        self.products.append({
-                            'source': 'ASOS',
-                            'name': name,
-                            'price': price,
-                            'image': image,
-                            'url': link,
-                            'scraped_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                        print(f"  [+] {name[:45]}...")
-                except:
-                    continue
+                name = item['name']
+                if name and len(name) > 3:
+                    self.products.append(Product(
+                        source='ASOS',
+                        name=name,
+                        price=item['price'],
+                        image=item['image'],
+                        url=item['url'],
+                        scraped_at=scraped_at
+                    ))
+                    count += 1
+                    print(f"  [+] {name[:45]}...")
                     
         except Exception as e:
             print(f"[ASOS] Error: {e}")
@@ -341,63 +212,47 @@ class MultiSiteScraper:
         try:
             url = f"https://www.zara.com/us/en/search?searchTerm={query.replace(' ', '%20')}&section=MAN"
             self.driver.get(url)
-            self.delay(4, 6)
-            self.scroll_page()
+            wait_for_page(self.driver, 'zara', replaces=5)
+            scroll_page(self.driver, 'zara', max_items, replaces=0.9)
             
-            items = self.driver.find_elements(By.CSS_SELECTOR, '[class*="product-grid-product"], li[class*="product"]')
+            items = extract_tiles(self.driver, SITES['zara'], defaults={'name': 'Zara Item', 'price': 'N/A', 'image': '', 'url': ''})
             print(f"[Zara] Found {len(items)} items")
             
             count = 0
+            scraped_at = stamp()
             for item in items:
                 if count >= max_items:
                     break
-                try:
-                    try:
-                        name = item.find_element(By.CSS_SELECTOR, '[class*="name"], [class*="product-name"], h2').text
-                    except:
-                        name = "Zara Item"
-                    
-                    try:
-                        price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                    except:
-                        image = ""
-                    
-                    try:
-                        link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    except:
-                        link = ""
-                    
-                    if name and len(name) > 2:
-                        self.products.append({
-                            'source': 'Zara',
-                            'name': name,
-                            'price': price,
-                            'image': image,
-                            'url': link,
-                            'scraped_at': datetime.now().isoformat()
-                        })
-                        count += 1
-                        print(f"  [+] {name[:45]}...")
-                except:
-                    continue
+                name = item['name']
+                if name and len(name) > 2:
+                    self.products.append(Product(
+                        source='Zara',
+                        name=name,
+                        price=item['price'],
+                        image=item['image'],
+                        url=item['url'],
+                        scraped_at=scraped_at
+                    ))
+                    count += 1
+                    print(f"  [+] {name[:45]}...")
                     
         except Exception as e:
             print(f"[Zara] Error: {e}")
     
     def save_data(self):
+        """Merge this run into the product store and export it from there"""
+        store = ProductStore()
+        store.upsert(self.products)
+        duplicates = store.cluster()
         json_path = os.path.join(SCRIPT_DIR, 'clothes_data.json')
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
-        print(f"\n[+] Saved {len(self.products)} products to {json_path}")
+        count = store.export_json(json_path, since=self.started)
+        store.close()
+        print(f"\n[+] Saved {count} products to {json_path}")
+        print(f"[+] {duplicates} products have near-duplicates across listings")
     
     def close(self):
         try:
-            self.driver.quit()
+            self.pool.release(self.driver)
         except:
             pass
 
@@ -468,6 +323,9 @@ def main():
         else:
             print("\n[!] No products found")
         
+        report_readiness()
+        report_scrolling()
+        
     finally:
         scraper.close()
 
@@ -0,0 +1,271 @@
+"""
+Network Capture
+Reads the JSON that search pages fetch their results with (ASOS, Depop,
+Etsy, AliExpress) out of Chrome's performance log, and decodes products
+straight from those payloads - including the ones a lazy or virtualized
+grid has not rendered, or has already dropped again.
+Needs driver_pool.PERFORMANCE_LOG (on by default) when Chrome starts.
+"""
+
+from selenium.common.exceptions import WebDriverException
+import base64
+import json
+import re
+import weakref
+
+from canonical import canonical_url
+from hidden_state import rows_from_items, walk
+
+# Responses kept from the log: the page itself and the JSON/HTML its scripts fetch
+RESPONSE_TYPES = {'Document', 'XHR', 'Fetch'}
+RESPONSE_MIMES = ('text/html', 'application/json', 'text/json', 'text/plain', 'application/javascript')
+
+# Per-site search APIs, mapped onto our fields like hidden_state.STATE_SITES.
+#   urls   - patterns a response URL must match (re.search)
+#   items  - dotted path to the product list in the payload
+#   html   - instead of items: path to an HTML fragment of tiles in the payload,
+#            read with the site's tile selectors from extraction.SITES
+#   fields - as in STATE_SITES
+#   base   - base URL for relative links (None means the response URL)
+API_SITES = {
+    'asos': {
+        'urls': [r'/api/product/search/v\d+/'],
+        'items': 'products',
+        'fields': {
+            'name': ['name'],
+            'price': ['price.current.text', ('price.current.value', '${}')],
+            'image': [('imageUrl', 'https://{}')],
+            'url': ['url'],
+        },
+        'base': 'https://www.asos.com/',
+    },
+    'depop': {
+        'urls': [r'/api/v\d+/search/products/'],
+        'items': 'products',
+        'fields': {
+            'name': ['description', 'slug'],
+            'price': [(('price.priceAmount', 'price.currencyName'), '{} {}'),
+                      (('pricing.original_price.total_price', 'pricing.currency_name'), '{} {}')],
+            'image': ['preview.640', 'preview.320', 'pictures.0.url'],
+            'url': [('slug', '/products/{}/')],
+        },
+        'base': 'https://www.depop.com/',
+    },
+    'etsy': {
+        'urls': [r'/api/v3/ajax/bespoke/member/neu/specs/async_search_results'],
+        'html': 'output.async_listings',
+        'base': None,
+    },
+    'aliexpress': {
+        'urls': [r'/fn/search-pc/index', r'/glosearch/api/product'],
+        'items': 'data.result.mods.itemList.content',
+        'fields': {
+            'name': ['title.displayTitle', 'title'],
+            'price': ['prices.salePrice.formattedPrice', 'prices.originalPrice.formattedPrice'],
+            'image': ['image.imgUrl'],
+            'url': [('productId', '/item/{}.html')],
+        },
+        'base': 'https://www.aliexpress.us/',
+    },
+}
+
+_patterns = {}
+
+
+def api_match(site):
+    """A function telling whether a response URL is one of the site's API calls"""
+    if site not in _patterns:
+        patterns = [re.compile(p) for p in API_SITES[site]['urls']]
+        _patterns[site] = lambda url: any(p.search(url) for p in patterns)
+    return _patterns[site]
+
+
+def _payload(body):
+    try:
+        return json.loads(body)
+    except (TypeError, ValueError):
+        return None
+
+
+class NetworkCapture:
+    """
+    One driver's performance log, drained into a list of responses. Each
+    reader (the API tier, page_archive) has its own cursor, so one reading
+    the log doesn't take responses from the other. Bodies are fetched once,
+    when a reader first wants them. A reader can ask for one tab's responses
+    only (pagination.PagePipeline loads the next pages in other tabs); the
+    other tabs' wait until theirs is asked for.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.entries = []
+        self.cursors = {}
+        self.held = {}      # reader -> responses from tabs it has not asked for yet
+        self.pending = {}   # (site, tab) -> API rows read for that tab's page, not extracted yet
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            self.poll()
+            self.enabled = True
+        except (WebDriverException, ValueError):
+            # no performance log: driver_pool.PERFORMANCE_LOG was off when Chrome started
+            self.enabled = False
+
+    def register(self, reader):
+        """Start a reader at the responses still buffered"""
+        self.cursors.setdefault(reader, 0)
+
+    def poll(self):
+        for entry in self.driver.get_log('performance'):
+            logged = json.loads(entry['message'])
+            message = logged['message']
+            if message.get('method') != 'Network.responseReceived':
+                continue
+            params = message['params']
+            response = params['response']
+            if params.get('type') not in RESPONSE_TYPES or not response.get('mimeType', '').startswith(RESPONSE_MIMES):
+                continue
+            self.entries.append({'url': response['url'], 'status': response.get('status'),
+                                 'mime': response.get('mimeType'), 'type': params.get('type'),
+                                 'request_id': params['requestId'], 'tab': logged.get('webview')})
+
+    def body(self, entry):
+        if 'body' not in entry:
+            try:
+                body = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': entry['request_id']})
+                entry['body'] = base64.b64decode(body['body']) if body.get('base64Encoded') \
+                    else body['body'].encode('utf-8')
+            except WebDriverException:
+                entry['body'] = None   # evicted, or still loading
+        return entry['body']
+
+    def read(self, reader, match=None, tab=None):
+        """
+        Responses (with bodies) since this reader's last call, only URLs match()
+        accepts if given, and only the tab's if given (see current_tab)
+        """
+        if not self.enabled:
+            return []
+        self.poll()
+        start = self.cursors.get(reader, 0)
+        self.cursors[reader] = len(self.entries)
+        entries = [entry for entry in self.entries[start:] if match is None or match(entry['url'])]
+        if tab is not None:
+            # Bodies can only be fetched from the current tab, so another tab's
+            # responses are held, not read, until that tab is current
+            entries = self.held.pop(reader, []) + entries
+            other = [entry for entry in entries if entry['tab'] not in (None, tab)]
+            if other:
+                self.held[reader] = other
+            entries = [entry for entry in entries if entry['tab'] in (None, tab)]
+        found = [entry for entry in entries if self.body(entry) is not None]
+
+        # drop what every reader has seen
+        done = min(self.cursors.values())
+        if done:
+            del self.entries[:done]
+            for name in self.cursors:
+                self.cursors[name] -= done
+        return found
+
+
+_captures = weakref.WeakKeyDictionary()
+
+
+def capture_for(driver):
+    """The capture for a live driver, started on first use"""
+    if isinstance(getattr(driver, 'capture', None), NetworkCapture):
+        return driver.capture   # page_archive.RecordingDriver shares its driver's
+    capture = _captures.get(driver)
+    if capture is None:
+        capture = _captures[driver] = NetworkCapture(driver)
+    return capture
+
+
+def current_tab(driver):
+    """The performance log's id for the driver's current tab, or None if it can't tell"""
+    try:
+        handle = getattr(driver, 'current_window_handle', None)
+    except WebDriverException:
+        return None
+    return handle[len('CDwindow-'):] if isinstance(handle, str) and handle.startswith('CDwindow-') else handle
+
+
+def forget(driver):
+    """Drop a driver's unread log, e.g. when the pool hands it to the next lease"""
+    _captures.pop(driver, None)
+    try:
+        driver.get_log('performance')
+    except (WebDriverException, ValueError):
+        pass
+
+
+# ==================== Products ====================
+def rows_from_responses(responses, site, spec, limit=None):
+    """Rows with spec's fields from the site's API payloads among responses (dicts with url and body)"""
+    api = API_SITES.get(site)
+    if api is None:
+        return []
+    match = api_match(site)
+    rows = []
+    for response in responses:
+        if not match(response['url']):
+            continue
+        payload = _payload(response['body'])
+        if payload is None:
+            continue
+        base = api.get('base') or response['url']
+        if 'html' in api:
+            from extraction import extract_tiles_html
+            for html in walk(payload, api['html']):
+                if isinstance(html, str):
+                    rows.extend(extract_tiles_html(html, base, spec))
+        else:
+            rows.extend(rows_from_items(walk(payload, api['items']), api, spec['fields'], base))
+    return merge([], rows, limit)
+
+
+def peek(driver, site, spec):
+    """
+    Products in the site's API responses so far for the current page. They
+    stay pending until rows_from_driver() takes them, so readiness and
+    scrolling can look without using them up.
+    """
+    if site not in API_SITES:
+        return []
+    capture = capture_for(driver)
+    tab = current_tab(driver)
+    rows = capture.pending.setdefault((site, tab), [])
+    return merge(rows, rows_from_responses(capture.read('api', api_match(site), tab), site, spec))
+
+
+def enough(driver, site, spec, count=None):
+    """True once the API responses hold count products (any, if None); the page need not have rendered"""
+    try:
+        return len(peek(driver, site, spec)) >= (count or 1)
+    except WebDriverException:
+        return False
+
+
+def rows_from_driver(driver, site, spec, limit=None):
+    """Products in the site's API responses for the driver's current tab since the last call"""
+    if site not in API_SITES:
+        return []
+    rows = peek(driver, site, spec)
+    capture_for(driver).pending.pop((site, current_tab(driver)), None)
+    return rows if limit is None else rows[:limit]
+
+
+def row_key(row):
+    return canonical_url(row['url']) if row.get('url') else row.get('name')
+
+
+def merge(rows, extra, limit=None):
+    """rows followed by the extra rows they don't already have, cut to limit"""
+    seen = {row_key(row) for row in rows}
+    for row in extra:
+        key = row_key(row)
+        if key not in seen:
+            seen.add(key)
+            rows.append(row)
+    return rows if limit is None else rows[:limit]
@@ -0,0 +1,240 @@
+"""
+Streaming Product Output
+Writes every product to a JSONL file as soon as it is scraped, so a crash
+halfway through a crawl keeps what was already collected and memory stays flat
+Optional: pip install zstandard (for .jsonl.zst streams)
+"""
+
+from datetime import datetime
+import atexit
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+import zlib
+
+from canonical import SeenIndex
+from parquet_export import PARQUET_DIR, export_parquet
+from product import csv_fields, to_json
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# What reading a cut-off stream raises: gzip without its trailer, a torn JSON line
+TRUNCATED = (EOFError, ValueError) + ((zstandard.ZstdError,) if zstandard else ())
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+STREAM_DIR = os.path.join(SCRIPT_DIR, 'streams')
+
+# '' (plain), 'gzip' or 'zstd'
+STREAM_COMPRESSION = os.environ.get('SCRAPER_STREAM_COMPRESSION', '')
+EXTENSIONS = {'': '.jsonl', 'gzip': '.jsonl.gz', 'zstd': '.jsonl.zst'}
+
+FLUSH_EVERY = 100                   # products buffered before a write
+FLUSH_INTERVAL = 2.0                # seconds before a partial buffer is written anyway
+MAX_PART_BYTES = 64 * 1024 * 1024   # on-disk size at which a new part is started
+
+
+def stream_path(name, compression=None):
+    """
+    streams/<name>-<timestamp>-<pid>.jsonl[.gz|.zst], one per sink; the
+    microseconds and process id keep sinks opened together from sharing a file
+    """
+    compression = STREAM_COMPRESSION if compression is None else compression
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    return os.path.join(STREAM_DIR, f"{name}-{stamp}-{os.getpid()}{EXTENSIONS[compression]}")
+
+
+def compression_of(path):
+    if path.endswith('.gz'):
+        return 'gzip'
+    if path.endswith('.zst'):
+        return 'zstd'
+    return ''
+
+
+def part_path(path, part):
+    """clothes_data.jsonl.gz -> clothes_data.0001.jsonl.gz"""
+    if part == 0:
+        return path
+    base, ext = path.split('.jsonl', 1)
+    return f"{base}.{part:04d}.jsonl{ext}"
+
+
+class JsonlSink:
+    """
+    Append-only product stream. Behaves enough like the old products list
+    (append, extend, len, iteration) that scrapers can use it in its place;
+    iterating reads the products back from disk. With dedup (the default) a
+    product whose canonical key or image was already written is dropped.
+    """
+
+    def __init__(self, path, flush_every=FLUSH_EVERY, flush_interval=FLUSH_INTERVAL,
+                 max_part_bytes=MAX_PART_BYTES, dedup=True):
+        self.path = path
+        self.compression = compression_of(path)
+        if self.compression == 'zstd' and zstandard is None:
+            raise ImportError("zstd streams need zstandard: pip install zstandard")
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.max_part_bytes = max_part_bytes
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.count = 0
+        self.parts = []
+        self.raw = None
+        self.writer = None
+        self.index = SeenIndex() if dedup else None
+        self.last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._open_part()
+        atexit.register(self.close)
+
+    def _open_part(self):
+        path = part_path(self.path, len(self.parts))
+        self.parts.append(path)
+        self.raw = open(path, 'xb')   # never truncate another sink's stream
+        if self.compression == 'gzip':
+            self.writer = gzip.GzipFile(fileobj=self.raw, mode='wb')
+        elif self.compression == 'zstd':
+            self.writer = zstandard.ZstdCompressor().stream_writer(self.raw, closefd=False)
+        else:
+            self.writer = self.raw
+
+    def _close_part(self):
+        if self.writer is not self.raw:
+            self.writer.close()
+        self.raw.close()
+        self.raw = self.writer = None
+
+    def append(self, product):
+        if self.raw is None:
+            raise ValueError(f"append to closed stream {self.path}")
+        if self.index is not None and self.index.seen(product):
+            return
+        line = to_json(product)
+        with self.lock:
+            if self.raw is None:
+                raise ValueError(f"append to closed stream {self.path}")
+            self.buffer.append(line)
+            self.count += 1
+            if (len(self.buffer) >= self.flush_every
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._flush()
+
+    def extend(self, products):
+        for product in products:
+            self.append(product)
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if self.raw is None:
+            return
+        if self.buffer:
+            self.writer.write(('\n'.join(self.buffer) + '\n').encode('utf-8'))
+            self.buffer = []
+        # Push compressed data all the way to disk so a crash leaves a readable stream
+        if self.compression == 'gzip':
+            self.writer.flush(zlib.Z_SYNC_FLUSH)
+        elif self.compression == 'zstd':
+            self.writer.flush(zstandard.FLUSH_FRAME)  # one frame per flush, each readable on its own
+        self.raw.flush()
+        self.last_flush = time.monotonic()
+        if self.raw.tell() >= self.max_part_bytes:
+            self._close_part()
+            self._open_part()
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            if self.raw is not None:
+                self._close_part()
+
+    def clear(self):
+        """Drop everything written so far and start the stream again"""
+        self.close()
+        with self.lock:
+            for path in self.parts:
+                os.remove(path)
+            self.buffer = []
+            self.count = 0
+            self.parts = []
+            self._open_part()
+        if self.index is not None:
+            self.index.clear()
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def dropped(self):
+        """Duplicates dropped so far"""
+        return self.index.dropped if self.index is not None else 0
+
+    def __iter__(self):
+        self.flush()
+        # The open part has no end-of-stream marker yet, which is expected
+        return read_jsonl(self.parts, quiet=True)
+
+    # ==================== Export ====================
+    def export_json(self, filename):
+        """Pretty-printed JSON array, written product by product from the stream"""
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for product in self:
+                f.write(',\n  ' if count else '\n  ')
+                f.write(json.dumps(product, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+                count += 1
+            f.write('\n]' if count else ']')
+        return count
+
+    def export_csv(self, filename):
+        """CSV with Product.FIELDS and then every extra field any product has as columns"""
+        fieldnames = csv_fields(self)
+        count = 0
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+            writer.writeheader()
+            for product in self:
+                writer.writerow(product)
+                count += 1
+        return count
+
+    def export_parquet(self, directory=PARQUET_DIR):
+        """Typed Parquet dataset partitioned by date and source, written in batches from the stream"""
+        return export_parquet(self, directory)
+
+
+def open_text(path):
+    compression = compression_of(path)
+    if compression == 'gzip':
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8')
+    if compression == 'zstd':
+        raw = open(path, 'rb')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=True), encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def read_jsonl(paths, quiet=False):
+    """Products from one or more stream parts, keeping what precedes a cut-off tail (crashed run)"""
+    if isinstance(paths, str):
+        paths = [paths]
+    for path in paths:
+        with open_text(path) as f:
+            try:
+                for line in f:
+                    if not line.endswith('\n'):
+                        break  # half-written last line
+                    yield json.loads(line)
+            except TRUNCATED as e:
+                if not quiet:
+                    print(f"[!] {os.path.basename(path)} ends early ({e}), keeping what was read")
@@ -0,0 +1,383 @@
+"""
+Page Archive
+Records what each scraped page looked like when its tiles were extracted
+(final page_source plus the document/XHR/fetch responses Chrome received)
+under (site, query, page), and replays it later through the same scrape
+functions with no browser or network. Bodies are stored once per content
+hash, compressed, in one SQLite file.
+Optional: pip install zstandard (zlib is used otherwise)
+"""
+
+from datetime import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        WebDriverException)
+from selenium.webdriver.common.by import By
+import lxml.html
+
+import driver_pool
+import extraction
+import network_capture
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(SCRIPT_DIR, 'pages.archive')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT,
+    raw_size INTEGER,
+    data BLOB
+);
+CREATE TABLE IF NOT EXISTS pages (
+    site TEXT,
+    query TEXT,
+    page INTEGER,
+    url TEXT,
+    source TEXT,
+    recorded_at TEXT,
+    PRIMARY KEY (site, query, page)
+);
+CREATE TABLE IF NOT EXISTS responses (
+    site TEXT,
+    query TEXT,
+    page INTEGER,
+    seq INTEGER,
+    url TEXT,
+    status INTEGER,
+    mime TEXT,
+    type TEXT,
+    body TEXT,
+    PRIMARY KEY (site, query, page, seq)
+);
+"""
+
+
+def compress(data):
+    if zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(data)
+    return 'zlib', zlib.compress(data, 6)
+
+
+def decompress(codec, data):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImportError("this archive was written with zstd: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def open_archive(path, record=False):
+    """The PageArchive for a --record/--replay path, or None when neither was given"""
+    if not path:
+        return None
+    if record:
+        driver_pool.PERFORMANCE_LOG = True   # before the pool starts Chrome
+    elif not os.path.exists(path):
+        raise SystemExit(f"[!] No page archive at {path}")
+    return PageArchive(path)
+
+
+class PageArchive:
+    """
+    archive = PageArchive('pages.archive')
+    driver = archive.recorder(driver, 'eBay', 'men shirts')   # live, saving
+    driver = archive.replayer('eBay', 'men shirts')           # offline
+    scrape_ebay(driver, 'men shirts', 15)
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.stats = {'pages': 0, 'responses': 0, 'bytes': 0, 'stored': 0}
+
+    # ==================== Blobs ====================
+    def put(self, data):
+        """Store bytes once under their SHA-256; returns the hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            if self.db.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+                codec, packed = compress(data)
+                self.db.execute("INSERT INTO blobs VALUES (?, ?, ?, ?)", (digest, codec, len(data), packed))
+                self.stats['stored'] += len(packed)
+            self.stats['bytes'] += len(data)
+        return digest
+
+    def get(self, digest):
+        with self.lock:
+            row = self.db.execute("SELECT codec, data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return decompress(row[0], row[1])
+
+    # ==================== Pages ====================
+    def save_page(self, site, query, page, url, source, responses=()):
+        """
+        Store one page; responses are dicts with url, status, mime, type and
+        body (bytes). Re-recording a page replaces it.
+        """
+        source_hash = self.put(source.encode('utf-8'))
+        rows = [(site, query, page, seq, r['url'], r['status'], r['mime'], r['type'], self.put(r['body']))
+                for seq, r in enumerate(responses)]
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?)",
+                            (site, query, page, url, source_hash, datetime.now().isoformat()))
+            self.db.execute("DELETE FROM responses WHERE site = ? AND query = ? AND page = ?", (site, query, page))
+            self.db.executemany("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.db.commit()
+            self.stats['pages'] += 1
+            self.stats['responses'] += len(rows)
+
+    def load_page(self, site, query, page):
+        """{'url', 'source', 'responses': [...]} for a recorded page, or None"""
+        with self.lock:
+            row = self.db.execute("SELECT url, source FROM pages WHERE site = ? AND query = ? AND page = ?",
+                                  (site, query, page)).fetchone()
+            if row is None:
+                return None
+            responses = self.db.execute(
+                "SELECT url, status, mime, type, body FROM responses WHERE site = ? AND query = ? AND page = ? "
+                "ORDER BY seq", (site, query, page)).fetchall()
+        return {
+            'url': row[0],
+            'source': self.get(row[1]).decode('utf-8'),
+            'responses': [{'url': url, 'status': status, 'mime': mime, 'type': kind, 'body': self.get(body)}
+                          for url, status, mime, kind, body in responses],
+        }
+
+    def pages(self, site=None):
+        """(site, query, page count) for everything recorded"""
+        sql = "SELECT site, query, COUNT(*) FROM pages"
+        args = ()
+        if site:
+            sql += " WHERE site = ?"
+            args = (site,)
+        with self.lock:
+            return self.db.execute(sql + " GROUP BY site, query ORDER BY site, query", args).fetchall()
+
+    def prune(self):
+        """Delete blobs no page or response refers to any more; returns how many"""
+        with self.lock:
+            deleted = self.db.execute(
+                "DELETE FROM blobs WHERE hash NOT IN (SELECT source FROM pages) "
+                "AND hash NOT IN (SELECT body FROM responses)").rowcount
+            self.db.commit()
+        return deleted
+
+    # ==================== Drivers ====================
+    def recorder(self, driver, site, query):
+        return RecordingDriver(self, driver, site, query)
+
+    def replayer(self, site, query):
+        return ReplayDriver(self, site, query)
+
+    def report(self):
+        s = self.stats
+        if s['pages']:
+            print(f"[*] Archived {s['pages']} page(s), {s['responses']} response(s): "
+                  f"{s['bytes'] / 1024:.0f} KB, {s['stored'] / 1024:.0f} KB new on disk")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class RecordingDriver:
+    """
+    A live driver that saves each page as its tiles are extracted: the n-th
+    extraction for (site, query) is page n. Everything else goes straight
+    to the wrapped driver.
+    """
+
+    def __init__(self, archive, driver, site, query):
+        self.archive = archive
+        self.driver = driver
+        self.site = site
+        self.query = query
+        self.page = 0
+        # shares the driver's log with the API tier in extraction, each with its own cursor
+        self.capture = network_capture.capture_for(driver)
+        self.capture.register('archive')
+
+    def __getattr__(self, name):
+        return getattr(self.driver, name)
+
+    def extract_tiles(self, spec, limit=None):
+        rows = extraction.extract_tiles(self.driver, spec, limit)
+        try:
+            self.archive.save_page(self.site, self.query, self.page, self.driver.current_url,
+                                   self.driver.page_source, self.responses())
+        except WebDriverException as e:
+            print(f"[!] Could not archive {self.site} page {self.page}: {str(e)[:60]}")
+        self.page += 1
+        return rows
+
+    def responses(self):
+        """Bodies of the document/XHR/fetch responses since the last call"""
+        return [{key: entry[key] for key in ('url', 'status', 'mime', 'type', 'body')}
+                for entry in self.capture.read('archive')]
+
+
+def find_nodes(node, by, value):
+    """The nodes under node a find_elements(by, value) would return"""
+    if by == By.XPATH:
+        return node.xpath(value)
+    selector = {By.ID: f'[id="{value}"]', By.CLASS_NAME: f'.{value}', By.TAG_NAME: value,
+                By.NAME: f'[name="{value}"]'}.get(by, value)
+    return extraction._select(node, selector)
+
+
+class ReplayElement:
+    """Enough of a WebElement for the scrapers' pagination and readiness checks"""
+
+    def __init__(self, driver, node):
+        self.driver = driver
+        self.node = node
+        self.page = driver.page
+
+    def _check(self):
+        if self.page != self.driver.page:
+            raise StaleElementReferenceException("page changed")
+
+    @property
+    def text(self):
+        self._check()
+        return ' '.join(self.node.text_content().split())
+
+    def get_attribute(self, name):
+        self._check()
+        return extraction._read_node(self.node, name, self.driver.current_url)
+
+    def is_enabled(self):
+        self._check()
+        return True
+
+    def is_displayed(self):
+        self._check()
+        return True
+
+    def click(self):
+        self._check()
+        self.driver.navigate()
+
+    def send_keys(self, *keys):
+        self._check()
+
+    def clear(self):
+        self._check()
+
+    def find_elements(self, by, value):
+        self._check()
+        return [ReplayElement(self.driver, node) for node in find_nodes(self.node, by, value)]
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(value)
+        return found[0]
+
+
+class ReplayDriver:
+    """
+    Stands in for a WebDriver over recorded pages. get() and click() show
+    the next recorded page, extract_tiles() reads it without a browser, and
+    scrolling, waits and CDP calls return at once.
+    """
+
+    def __init__(self, archive, site, query):
+        self.archive = archive
+        self.site = site
+        self.query = query
+        self.page = 0
+        self.extracted = -1       # last page extract_tiles ran on
+        self.snapshot = None
+        self.tree = None
+        self.session_id = 'replay'
+
+    def navigate(self):
+        """Move to the next recorded page; the first navigation shows page 0"""
+        page = self.extracted + 1
+        snapshot = self.archive.load_page(self.site, self.query, page)
+        if snapshot is None:
+            raise WebDriverException(f"page {page} of {self.site} '{self.query}' was not recorded")
+        self.page, self.snapshot, self.tree = page, snapshot, None
+
+    def _current(self):
+        if self.snapshot is None:
+            self.navigate()
+        return self.snapshot
+
+    def _root(self):
+        if self.tree is None:
+            self.tree = lxml.html.document_fromstring(self._current()['source'] or '<html></html>')
+        return self.tree
+
+    # ==================== WebDriver surface ====================
+    def get(self, url):
+        if self.snapshot is None or self.extracted == self.page:
+            self.navigate()
+
+    @property
+    def current_url(self):
+        return self._current()['url']
+
+    @property
+    def page_source(self):
+        return self._current()['source']
+
+    @property
+    def responses(self):
+        """The recorded network responses of the current page"""
+        return self._current()['responses']
+
+    def extract_tiles(self, spec, limit=None):
+        snapshot = self._current()
+        self.extracted = self.page
+        rows = extraction.extract_tiles_html(snapshot['source'], snapshot['url'], spec, limit)
+        if extraction.USE_NETWORK and spec.get('api'):
+            found = network_capture.rows_from_responses(snapshot['responses'], spec['api'], spec, limit)
+            rows = network_capture.merge(rows, found, limit)
+        return rows
+
+    def execute_script(self, script, *args):
+        if 'document.querySelector(arguments[0])' in script:
+            return bool(extraction._select(self._root(), args[0]))
+        if 'scrollHeight' in script and script.lstrip().startswith('return'):
+            return 0
+        return None
+
+    def execute_async_script(self, script, *args):
+        return 0
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_cdp_cmd(self, cmd, params):
+        return {}
+
+    def find_elements(self, by, value):
+        return [ReplayElement(self, node) for node in find_nodes(self._root(), by, value)]
+
+    def find_element(self, by, value):
+        found = self.find_elements(by, value)
+        if not found:
+            raise NoSuchElementException(value)
+        return found[0]
+
+    def get_log(self, kind):
+        return []
+
+    def quit(self):
+        pass
@@ -0,0 +1,175 @@
+"""
+Pipelined Pagination
+Opens the next results pages in background tabs of the same Chrome while
+the current page is scrolled and extracted, so a multi-page run costs about
+its navigation time. Every navigation still waits its turn with the
+per-domain rate limiter and a minimum interval per domain.
+"""
+
+from selenium.common.exceptions import WebDriverException
+from urllib.parse import urlparse
+import threading
+import time
+
+import rate_limiter
+import resource_blocking
+from driver_pool import STEALTH_JS
+from rate_limiter import domain_of
+
+# Pages opened ahead of the one being extracted (0 loads one page at a time)
+PREFETCH_DEPTH = 1
+# Seconds between two navigations to the same domain, on top of the rate limiter
+MIN_INTERVAL = 2.0
+
+# Runs in the new tab: navigate once the domain's turn comes. Timers in a
+# background tab may fire late, never early; switching to the tab before
+# then navigates it right away (see _show)
+_SCHEDULE_JS = """
+const [url, delay] = arguments;
+window.__prefetch = setTimeout(() => { window.__navigated = true; window.location.href = url; }, delay);
+"""
+_NAVIGATE_JS = """
+clearTimeout(window.__prefetch);
+if (!window.__navigated && window.location.href === 'about:blank') window.location.href = arguments[0];
+"""
+
+# (pages, pages that were prefetched, seconds waiting for a navigation slot, seconds for the whole run)
+STATS = []
+_stats_lock = threading.Lock()
+
+
+class PagePipeline:
+    """
+    for url in PagePipeline(driver, urls, depth=1):
+        wait_for_page(driver, site)     # the driver is on url's page
+        ... scroll and extract ...
+
+    The first page loads in the driver's own window, later ones in tabs that
+    are closed once the loop moves past them. Drivers without tabs (e.g.
+    page_archive replay), depth 0 and pages whose tab could not be opened
+    get a driver.get in the driver's window.
+    """
+
+    def __init__(self, driver, urls, depth=PREFETCH_DEPTH, min_interval=MIN_INTERVAL):
+        self.driver = driver
+        self.urls = list(urls)
+        self.depth = depth if hasattr(driver, 'switch_to') else 0
+        self.min_interval = min_interval or 0.0
+        self.last = {}      # domain -> time.time() of its last navigation
+        self.tabs = {}      # page index -> (window handle, time.time() it navigates at)
+        self.prefetched = 0
+        self.waited = 0.0
+
+    # ==================== Pacing ====================
+    def _slot(self, url):
+        """Reserve url's navigation slot; returns the time.time() it falls at"""
+        domain = domain_of(url)
+        now = time.time()
+        at = max(now + rate_limiter.reserve(url), self.last.get(domain, 0.0) + self.min_interval)
+        self.last[domain] = at
+        return at
+
+    def _sleep_until(self, at):
+        delay = at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+            self.waited += delay
+
+    # ==================== Tabs ====================
+    def _open(self, index):
+        """Open page index in a new tab that navigates when its slot comes, and come back; False if it failed"""
+        url = self.urls[index]
+        driver = self.driver
+        current = driver.current_window_handle
+        handle = None
+        try:
+            driver.switch_to.new_window('tab')
+            handle = driver.current_window_handle
+            # stealth and the blocklist are per tab
+            driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': STEALTH_JS})
+            if resource_blocking.BLOCK_RESOURCES:
+                resource_blocking.set_blocking(driver, resource_blocking.blocked_patterns(domain_of(url)))
+            if hasattr(driver, 'pool_pages'):
+                driver.pool_pages += 1
+                parts = urlparse(url)
+                driver.pool_origins.add(f"{parts.scheme}://{parts.netloc}")
+            at = self._slot(url)
+            driver.execute_script(_SCHEDULE_JS, url, max(0, int((at - time.time()) * 1000)))
+            self.tabs[index] = (handle, at)
+            return True
+        except WebDriverException as e:
+            print(f"[!] Could not prefetch {url[:60]}: {str(e)[:60]}")
+            if handle is not None and handle != current:
+                driver.close()
+            return False
+        finally:
+            driver.switch_to.window(current)
+
+    def _show(self, index):
+        """Switch to prefetched page index, navigating it now if its timer has not fired"""
+        handle, at = self.tabs[index]
+        self.driver.switch_to.window(handle)
+        self._sleep_until(at)
+        self.driver.execute_script(_NAVIGATE_JS, self.urls[index])
+        self.prefetched += 1
+
+    def _close(self, index):
+        handle, _ = self.tabs.pop(index)
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except WebDriverException:
+            pass
+
+    # ==================== Pages ====================
+    def __iter__(self):
+        start = time.perf_counter()
+        pages = 0
+        home = self.driver.current_window_handle if self.depth else None
+        try:
+            for index, url in enumerate(self.urls):
+                if index in self.tabs:
+                    self._show(index)
+                else:
+                    # in the driver's own window, paced by driver_pool's get; the local interval is ours to keep
+                    self._sleep_until(self.last.get(domain_of(url), 0.0) + self.min_interval)
+                    try:
+                        self.driver.get(url)
+                    except WebDriverException as e:
+                        print(f"[!] Could not load {url[:60]}: {str(e)[:60]}")
+                    self.last[domain_of(url)] = time.time()
+
+                for ahead in range(index + 1, min(index + 1 + self.depth, len(self.urls))):
+                    if ahead not in self.tabs and not self._open(ahead):
+                        break
+
+                pages += 1
+                yield url
+
+                if index in self.tabs:
+                    self._close(index)
+                    self.driver.switch_to.window(home)
+        finally:
+            if self.depth:
+                for index in list(self.tabs):
+                    self._close(index)
+                try:
+                    self.driver.switch_to.window(home)
+                except WebDriverException:
+                    pass
+            with _stats_lock:
+                STATS.append((pages, self.prefetched, self.waited, time.perf_counter() - start))
+
+
+def report():
+    """Print how much of the paginated runs was spent waiting on navigation"""
+    with _stats_lock:
+        stats = list(STATS)
+    if not stats:
+        return
+    pages = sum(s[0] for s in stats)
+    prefetched = sum(s[1] for s in stats)
+    waited = sum(s[2] for s in stats)
+    elapsed = sum(s[3] for s in stats)
+    print(f"\n[*] Pagination: {pages} page(s) in {elapsed:.1f}s, {prefetched} prefetched, "
+          f"{waited:.1f}s waiting for a navigation slot")
@@ -0,0 +1,153 @@
+"""
+Parquet Export
+Writes products as a typed Arrow table to a Parquet dataset partitioned by
+date and source (date=2026-10-18/source=eBay/part-....parquet). Prices get
+numeric cent columns, per-site fields (rating, reviews) are nullable
+columns, and readers can filter on any column without loading the rest.
+Optional: pip install pyarrow pandas
+"""
+
+from datetime import datetime
+import json
+import os
+
+from prices import normalize_prices
+from product import FIELDS, Product, columns
+
+try:
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+except ImportError:
+    pa = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PARQUET_DIR = os.path.join(SCRIPT_DIR, 'clothes_data.parquet')
+BATCH_ROWS = 100_000         # products converted and written per pass
+ROW_GROUP_ROWS = 50_000      # smaller groups: finer min/max statistics for readers to skip on
+
+# Fields some sites have and others don't, with how to read them; everything
+# else a product carries goes into the extra column as JSON
+SPARSE_FIELDS = ['rating', 'reviews', 'cluster_id', 'first_seen', 'last_seen']
+KNOWN = set(FIELDS) | set(SPARSE_FIELDS)
+
+if pa is not None:
+    SCHEMA = pa.schema([
+        ('source', pa.dictionary(pa.int32(), pa.string())),
+        ('name', pa.string()),
+        ('price', pa.string()),              # as shown on the page
+        ('min_cents', pa.int64()),
+        ('max_cents', pa.int64()),
+        ('currency', pa.dictionary(pa.int8(), pa.string())),
+        ('image', pa.string()),
+        ('url', pa.string()),
+        ('scraped_at', pa.timestamp('us')),
+        ('rating', pa.float32()),
+        ('reviews', pa.int64()),
+        ('cluster_id', pa.int64()),
+        ('first_seen', pa.timestamp('us')),
+        ('last_seen', pa.timestamp('us')),
+        ('extra', pa.string()),
+        ('date', pa.string()),
+    ])
+    PARTITIONING = ds.partitioning(pa.schema([('date', pa.string()), ('source', pa.string())]), flavor='hive')
+
+
+def require_pyarrow():
+    if pa is None:
+        raise ImportError("Parquet export needs pyarrow and pandas: pip install pyarrow pandas")
+
+
+def timestamps(values):
+    return pd.to_datetime(pd.Series(values, dtype=object), format='ISO8601', errors='coerce')
+
+
+def first_number(values, thousands=False):
+    """'4.5 out of 5 stars' -> 4.5, '1,234' / '(2.1K)' -> 1234 / 2100 with thousands"""
+    text = pd.Series(values, dtype=object).where(lambda s: s.map(type) == str).astype('string')
+    if not thousands:
+        return pd.to_numeric(text.str.extract(r'(\d+(?:\.\d+)?)', expand=False), errors='coerce')
+    parts = text.str.extract(r'(\d[\d,]*(?:\.\d+)?)\s*([kK])?')
+    number = pd.to_numeric(parts[0].str.replace(',', '', regex=False), errors='coerce')
+    return (number * parts[1].notna().map({True: 1000, False: 1})).round().astype('Int64')
+
+
+def extra_json(product):
+    """Fields no column covers, as a JSON object (None when there are none)"""
+    if type(product) is Product:
+        if not product.extra:
+            return None
+        rest = {k: v for k, v in product.extra.items() if k not in KNOWN}
+    else:
+        rest = {k: v for k, v in product.items() if k not in KNOWN}
+    return json.dumps(rest, ensure_ascii=False, default=str) if rest else None
+
+
+def to_table(products):
+    """One typed Arrow table for a batch of Products or product dicts"""
+    require_pyarrow()
+    data = columns(products, FIELDS + tuple(SPARSE_FIELDS))
+    prices = normalize_prices(data['price'])
+    scraped_at = timestamps(data['scraped_at'])
+    extra = [extra_json(product) for product in products]
+    frame = pd.DataFrame({
+        'source': pd.Categorical(data['source']),
+        'name': data['name'],
+        'price': data['price'],
+        'min_cents': prices['min_cents'],
+        'max_cents': prices['max_cents'],
+        'currency': pd.Categorical(prices['currency']),
+        'image': data['image'],
+        'url': data['url'],
+        'scraped_at': scraped_at,
+        'rating': first_number(data['rating']),
+        'reviews': first_number(data['reviews'], thousands=True),
+        'cluster_id': pd.array(data['cluster_id'], dtype='Int64'),
+        'first_seen': timestamps(data['first_seen']),
+        'last_seen': timestamps(data['last_seen']),
+        'extra': extra,
+        'date': scraped_at.dt.strftime('%Y-%m-%d').fillna('unknown'),
+    })
+    # Sorted by price inside each file, so min_cents row-group statistics are tight
+    frame = frame.sort_values(['date', 'source', 'min_cents'], kind='stable')
+    return pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+
+
+def batches(products, size):
+    batch = []
+    for product in products:
+        batch.append(product)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def export_parquet(products, directory=PARQUET_DIR, batch_rows=BATCH_ROWS):
+    """
+    Append products to the dataset at directory, one file per date/source per
+    batch. Earlier exports stay; each call adds files. Returns the product count.
+    """
+    require_pyarrow()
+    run = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    count = 0
+    for number, batch in enumerate(batches(products, batch_rows)):
+        table = to_table(batch)
+        ds.write_dataset(table, directory, format='parquet', partitioning=PARTITIONING,
+                         basename_template=f"part-{run}-{number}-{{i}}.parquet",
+                         existing_data_behavior='overwrite_or_ignore',
+                         max_rows_per_group=ROW_GROUP_ROWS, min_rows_per_group=min(ROW_GROUP_ROWS, len(batch)),
+                         file_options=ds.ParquetFileFormat().make_write_options(compression='zstd'))
+        count += len(batch)
+    return count
+
+
+def open_dataset(directory=PARQUET_DIR):
+    """
+    The exported dataset, for filtered reads that skip partitions and row groups:
+    open_dataset().to_table(filter=(ds.field('source') == 'eBay') & (ds.field('min_cents') < 2000))
+    """
+    require_pyarrow()
+    return ds.dataset(directory, format='parquet', partitioning=PARTITIONING,
+                      schema=SCHEMA)
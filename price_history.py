@@ -0,0 +1,206 @@
+"""
+Price History
+Every price observation as integer cents, in fixed-width binary segments (one
+file per UTC day). Recording needs only the standard library; queries load
+the days they need as NumPy columns. Old days are folded to daily min/max.
+Optional: pip install numpy (for drops() and downsample())
+"""
+
+from datetime import datetime, timezone
+import os
+import struct
+import threading
+import time
+
+from prices import MAX_CENTS, normalize_prices, parse_price
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DAY = 86400
+KEEP_RAW_DAYS = 30   # days older than this are downsampled to daily min/max
+
+# product_id, ts, min_cents, max_cents, currency -- 25 bytes per observation
+RECORD = struct.Struct('<qqiiB')   # the cents fields bound prices.MAX_CENTS
+CURRENCIES = ['USD', 'GBP', 'EUR', 'CAD', 'AUD', 'JPY', 'INR', 'PLN', 'SEK', 'HKD', 'CHF', 'CNY']
+if np is not None:
+    DTYPE = np.dtype([('product_id', '<i8'), ('ts', '<i8'), ('min_cents', '<i4'),
+                      ('max_cents', '<i4'), ('currency', 'u1')])
+
+
+def to_timestamp(scraped_at):
+    try:
+        return int(datetime.fromisoformat(scraped_at).timestamp())
+    except (TypeError, ValueError):
+        return int(time.time())
+
+
+def observation(product_id, product):
+    """
+    (product_id, ts, min_cents, max_cents, currency index) for a product dict,
+    or None if its price has no number or does not fit the record
+    """
+    price = parse_price(product.get('price'))
+    if price is None or price[1] > MAX_CENTS:
+        return None
+    currency = CURRENCIES.index(price[2]) if price[2] in CURRENCIES else 0
+    return (product_id, to_timestamp(product.get('scraped_at')), price[0], price[1], currency)
+
+
+def observations(rows):
+    """
+    observation() for a whole batch of (product_id, price text, scraped_at)
+    rows, with the prices parsed by normalize_prices() in one pass
+    """
+    rows = list(rows)
+    try:
+        prices = normalize_prices([row[1] for row in rows])
+    except ImportError:
+        return [obs for obs in (observation(pid, {'price': price, 'scraped_at': scraped_at})
+                                for pid, price, scraped_at in rows) if obs]
+    index = {code: i for i, code in enumerate(CURRENCIES)}
+    low = prices['min_cents'].to_numpy(dtype='int64', na_value=0)
+    high = prices['max_cents'].to_numpy(dtype='int64', na_value=0)
+    found = prices['min_cents'].notna().to_numpy() & (high <= MAX_CENTS)
+    currency = prices['currency'].to_numpy()
+    return [(rows[i][0], to_timestamp(rows[i][2]), int(low[i]), int(high[i]), index.get(currency[i], 0))
+            for i in found.nonzero()[0]]
+
+
+def day_of(ts):
+    return datetime.fromtimestamp(ts - ts % DAY, timezone.utc).strftime('%Y-%m-%d')
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("price history queries need numpy: pip install numpy")
+
+
+class PriceHistory:
+    """
+    <directory>/<YYYY-MM-DD>.bin        raw observations for that day
+    <directory>/<YYYY-MM-DD>.daily.bin  the same day folded to one min/max row per product
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def segment(self, day, daily=False):
+        return os.path.join(self.directory, f"{day}{'.daily' if daily else ''}.bin")
+
+    def days(self):
+        """{day: [paths]} for every segment; a day can have both a raw and a daily one"""
+        segments = {}
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.bin'):
+                segments.setdefault(name[:10], []).append(os.path.join(self.directory, name))
+        return segments
+
+    # ==================== Writing ====================
+    def record(self, rows):
+        """Append observation() rows to their day segments"""
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(row[1] // DAY, []).append(RECORD.pack(*row))
+        with self.lock:
+            for day_number, records in by_day.items():
+                day = day_of(day_number * DAY)
+                daily = self.segment(day, daily=True)
+                path = daily if os.path.exists(daily) else self.segment(day)
+                with open(path, 'ab') as f:
+                    f.write(b''.join(records))
+
+    # ==================== Reading ====================
+    def load(self, since=None, product_id=None):
+        """Observations with ts >= since as one NumPy record array, oldest day first"""
+        require_numpy()
+        since_day = day_of(since) if since else ''
+        parts = []
+        for day, paths in sorted(self.days().items()):
+            if day >= since_day:
+                parts.extend(read_segment(path) for path in paths)
+        rows = np.concatenate(parts) if parts else np.zeros(0, DTYPE)
+        if since:
+            rows = rows[rows['ts'] >= since]
+        if product_id is not None:
+            rows = rows[rows['product_id'] == product_id]
+        return rows
+
+    def history(self, product_id):
+        """[(ts, min_cents, max_cents, currency)] oldest first"""
+        rows = np.sort(self.load(product_id=product_id), order='ts')
+        return [(int(r['ts']), int(r['min_cents']), int(r['max_cents']), CURRENCIES[r['currency']]) for r in rows]
+
+    # ==================== Maintenance ====================
+    def downsample(self, keep_raw_days=KEEP_RAW_DAYS, now=None):
+        """Fold raw days older than keep_raw_days into one min/max row per product; returns rows removed"""
+        require_numpy()
+        cutoff = day_of(int(now or time.time()) - keep_raw_days * DAY)
+        removed = 0
+        with self.lock:
+            for day, paths in sorted(self.days().items()):
+                raw = self.segment(day)
+                if day >= cutoff or raw not in paths:
+                    continue
+                # Fold in the day's daily segment too, if another run already made one
+                rows = np.concatenate([read_segment(path) for path in paths])
+                folded = fold(rows)
+                folded['ts'] -= folded['ts'] % DAY
+                tmp = self.segment(day, daily=True) + '.tmp'
+                folded.tofile(tmp)
+                os.replace(tmp, self.segment(day, daily=True))
+                os.remove(raw)
+                removed += len(rows) - len(folded)
+        return removed
+
+    # ==================== Queries ====================
+    def drops(self, percent=20, days=7, now=None):
+        """
+        Products whose latest price is at least percent% below the highest
+        price seen in the last days: [(product_id, was_cents, now_cents, ts)],
+        biggest drop first
+        """
+        since = int(now or time.time()) - days * DAY
+        rows = self.load(since=since)
+        if not len(rows):
+            return []
+        ids, starts, order = group(rows)
+        cents = rows['min_cents'][order].astype(np.int64)
+        peak = np.maximum.reduceat(cents, starts)
+        # Latest observation per product: the max of (ts, cents) packed into one int64
+        latest = np.maximum.reduceat((rows['ts'][order] << 32) | cents, starts)
+        latest_cents, latest_ts = latest & 0xFFFFFFFF, latest >> 32
+        hit = np.flatnonzero((peak > 0) & (latest_cents <= peak * (1 - percent / 100)))
+        hit = hit[np.argsort(latest_cents[hit] / peak[hit])]
+        return [(int(ids[starts[i]]), int(peak[i]), int(latest_cents[i]), int(latest_ts[i])) for i in hit]
+
+
+def read_segment(path):
+    data = np.fromfile(path, dtype=np.uint8)
+    usable = len(data) - len(data) % DTYPE.itemsize  # ignore a torn last record
+    return data[:usable].view(DTYPE)
+
+
+def group(rows):
+    """Sort order by product, and where each product's run starts"""
+    order = rows['product_id'].argsort()
+    ids = rows['product_id'][order]
+    starts = np.concatenate(([0], np.flatnonzero(ids[1:] != ids[:-1]) + 1))
+    return ids, starts, order
+
+
+def fold(rows):
+    """One row per product: lowest min, highest max, latest ts"""
+    if not len(rows):
+        return rows
+    ids, starts, order = group(rows)
+    rows = rows[order]
+    folded = rows[starts].copy()
+    folded['ts'] = np.maximum.reduceat(rows['ts'], starts)
+    folded['min_cents'] = np.minimum.reduceat(rows['min_cents'], starts)
+    folded['max_cents'] = np.maximum.reduceat(rows['max_cents'], starts)
+    return folded
@@ -0,0 +1,198 @@
+"""
+Price Parsing
+Turns the price text a page showed ("$44.99", "US $12.50 to $19.99",
+"1.299,00 €", "N/A") into integer cents plus a currency code.
+normalize_prices() does a whole batch at once with pandas.
+Optional: pip install pandas (for normalize_prices)
+"""
+
+import re
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = pd = None
+
+# Longest symbols first so "US $" wins over "$"
+SYMBOLS = [
+    ('US $', 'USD'), ('C $', 'CAD'), ('CA$', 'CAD'), ('AU $', 'AUD'), ('A$', 'AUD'), ('HK$', 'HKD'),
+    ('$', 'USD'), ('£', 'GBP'), ('€', 'EUR'), ('¥', 'JPY'), ('₹', 'INR'), ('zł', 'PLN'), ('kr', 'SEK'),
+]
+CODES = ('USD', 'GBP', 'EUR', 'CAD', 'AUD', 'JPY', 'INR', 'PLN', 'SEK', 'HKD', 'CHF', 'CNY')
+DEFAULT_CURRENCY = 'USD'
+
+NUMBER = re.compile(r'\d[\d.,\s ]*')
+PERCENT = re.compile(r'\d[\d.,]*\s*%')   # "(20% off)" is a discount, not a price
+MAX_LENGTH = 64         # longer strings are parsed one at a time
+# price_history stores cents as int32; a bigger number is a mis-scrape (an SKU,
+# two prices run together) and is skipped like any other non-price number
+MAX_CENTS = 2 ** 31 - 1
+MAX_WHOLE_DIGITS = len(str(MAX_CENTS // 100))   # longer numbers can't fit, and would overflow int64 below
+
+
+def to_cents(number):
+    """'1,299.99' / '1.299,99' / '1 299,99' / '44' -> 129999 / 129999 / 129999 / 4400"""
+    number = number.strip().replace(' ', '').replace(' ', '').rstrip('.,')
+    if not number:
+        return None
+    last_dot, last_comma = number.rfind('.'), number.rfind(',')
+    decimal = max(last_dot, last_comma)
+    # A separator followed by exactly 1-2 digits is the decimal point; otherwise
+    # it is a thousands separator ("1,299" is one thousand two hundred ninety-nine)
+    if decimal >= 0 and 1 <= len(number) - decimal - 1 <= 2:
+        whole, fraction = number[:decimal], number[decimal + 1:]
+    else:
+        whole, fraction = number, ''
+    whole = whole.replace('.', '').replace(',', '')
+    if not whole.isdigit() and whole:
+        return None
+    return int(whole or 0) * 100 + int(fraction.ljust(2, '0') or 0)
+
+
+def currency_of(text):
+    upper = text.upper()
+    for code in CODES:
+        if code in upper:
+            return code
+    for symbol, code in SYMBOLS:
+        if symbol in text:
+            return code
+    return DEFAULT_CURRENCY
+
+
+def parse_price(text):
+    """
+    (min_cents, max_cents, currency) for a price string, or None if it has no number.
+    Ranges ("$12.50 to $19.99", "$10 - $15") give their low and high ends;
+    percentages ("$19.99 (20% off)") and numbers above MAX_CENTS are skipped.
+    """
+    if not text or not isinstance(text, str):
+        return None
+    if '%' in text:
+        text = PERCENT.sub(' ', text)
+    amounts = [cents for cents in (to_cents(m.group(0)) for m in NUMBER.finditer(text))
+               if cents is not None and cents <= MAX_CENTS]
+    if not amounts:
+        return None
+    return min(amounts), max(amounts), currency_of(text)
+
+
+# ==================== Batch normalization ====================
+def normalize_prices(texts):
+    """
+    parse_price() for a whole batch: a DataFrame with min_cents, max_cents
+    (nullable Int64) and currency, one row per input in the same order; rows
+    without a number are <NA>/None. Each distinct string is parsed once.
+    """
+    if pd is None:
+        raise ImportError("normalize_prices needs numpy and pandas: pip install pandas")
+    codes, uniques = pd.factorize(pd.Series(list(texts), dtype=object))
+    strings = [value if isinstance(value, str) else '' for value in uniques]
+    low = np.full(len(strings), -1, np.int64)
+    high = np.full(len(strings), -1, np.int64)
+    currency = np.full(len(strings), None, object)
+
+    lengths = np.fromiter(map(len, strings), np.int64, len(strings))
+    short = np.flatnonzero((lengths > 0) & (lengths <= MAX_LENGTH))
+    chars = np.array([strings[i] for i in short], dtype=f'<U{max(1, lengths[short].max(initial=1))}')
+    odd, low[short], high[short], currency[short] = parse_columns(chars)
+    # Long strings and the rare ones parse_columns can't do exactly go through parse_price
+    for i in np.concatenate((np.flatnonzero(lengths > MAX_LENGTH), short[odd])):
+        price = parse_price(strings[i])
+        low[i], high[i], currency[i] = price if price else (-1, -1, None)
+
+    low, high, currency = low[codes], high[codes], currency[codes]
+    missing = (codes < 0) | (low < 0)
+    currency[missing] = None
+    return pd.DataFrame({'min_cents': pd.arrays.IntegerArray(low, missing),
+                         'max_cents': pd.arrays.IntegerArray(high, missing),
+                         'currency': pd.Series(currency, dtype=object)})
+
+
+def parse_columns(chars):
+    """
+    parse_price() over a NumPy unicode array, one codepoint per matrix cell:
+    (odd rows, min cents, max cents, currency) with -1 cents for no number
+    """
+    rows, width = len(chars), chars.dtype.itemsize // 4 + 1
+    cells = np.zeros((rows, width), np.uint32)   # the extra zero column ends every row's last number
+    cells[:, :width - 1] = chars.view(np.uint32).reshape(rows, width - 1)
+    flat = cells.ravel()
+    table = odd_characters()
+    odd = (table[np.minimum(flat, len(table) - 1)] | (flat >= len(table))).reshape(rows, width).any(axis=1)
+
+    # NUMBER: within each run of digits/separators/spaces, everything from its first digit on
+    digit = (flat >= 48) & (flat <= 57)
+    separator = (flat == 46) | (flat == 44)
+    member = digit | separator | (flat == 32) | (flat == 160)
+    index = np.arange(flat.size)
+    run_start = np.maximum.accumulate(np.where(member & ~np.r_[False, member[:-1]], index, -1))
+    last_digit = np.maximum.accumulate(np.where(digit, index, -1))
+    in_number = member & (last_digit >= run_start)
+    number = np.cumsum(in_number & ~np.r_[False, in_number[:-1]]) - 1
+
+    # to_cents: spaces dropped, trailing separators ignored, the last separator is
+    # the decimal point when 1-2 digits follow it
+    pos = np.flatnonzero(in_number & (digit | separator))
+    low, high = np.full(rows, -1, np.int64), np.full(rows, -1, np.int64)
+    currency = np.full(rows, None, object)
+    if not len(pos):
+        return odd, low, high, currency
+    tid, is_digit = number[pos], digit[pos]
+    starts = np.flatnonzero(np.r_[True, tid[1:] != tid[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(pos)]))
+    end = np.maximum.reduceat(np.where(is_digit, pos, -1), starts)
+    point = np.maximum.reduceat(np.where(~is_digit & (pos < end[group]), pos, -1), starts)
+    after = is_digit & (pos > point[group])
+    decimal = (point >= 0) & (np.add.reduceat(after, starts) <= 2)
+    fraction = after & decimal[group]
+    whole = is_digit & ~fraction
+
+    def rank(mask):
+        """1-based position of each masked cell among its number's masked cells"""
+        total = np.cumsum(mask)
+        return total - (total - mask)[starts][group]
+
+    whole_digits = np.add.reduceat(whole, starts)
+    value = (flat[pos].astype(np.int64) - 48)
+    place = np.where(whole, np.minimum(whole_digits[group] - rank(whole), 18) + 2, 2 - rank(fraction))
+    cents = np.add.reduceat(np.where(whole | fraction, value * 10 ** np.maximum(place, 0), 0), starts)
+
+    ok = (whole_digits <= MAX_WHOLE_DIGITS) & (cents <= MAX_CENTS)
+    cents, row = cents[ok], pos[starts][ok] // width
+    if len(row):
+        first = np.flatnonzero(np.r_[True, row[1:] != row[:-1]])
+        low[row[first]] = np.minimum.reduceat(cents, first)
+        high[row[first]] = np.maximum.reduceat(cents, first)
+        priced = row[first]
+        currency[priced] = currencies(chars[priced])
+    return odd, low, high, currency
+
+
+def currencies(chars):
+    """currency_of() over a NumPy unicode array: codes win over symbols, earlier entries over later ones"""
+    found = np.full(len(chars), DEFAULT_CURRENCY, object)
+    left = np.ones(len(chars), bool)
+    upper = np.char.upper(chars)
+    for code in CODES:
+        hit = left & (np.char.find(upper, code) >= 0)
+        found[hit], left = code, left & ~hit
+    for symbol, code in SYMBOLS:
+        hit = left & (np.char.find(chars, symbol) >= 0)
+        found[hit], left = code, left & ~hit
+    return found
+
+
+ODD = []
+
+
+def odd_characters():
+    """
+    Codepoint lookup of characters parse_columns treats differently from the
+    regexes: whitespace other than space/NBSP, non-ASCII digits and % (PERCENT)
+    """
+    if not ODD:
+        pattern = re.compile(r'[^\S \u00a0]|(?![0-9])\d|%')
+        ODD.append(np.array([bool(pattern.match(chr(c))) for c in range(0x10000)]))
+    return ODD[0]
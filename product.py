@@ -0,0 +1,145 @@
+"""
+Product Record
+One slotted object per scraped product instead of a dict with its own copy
+of every key: source names are interned and a page's products share one
+timestamp. Reads like the old dicts (product['name'], .get, keys/items),
+so the store, the dedup index and the exports take either.
+"""
+
+from datetime import datetime
+from json.encoder import encode_basestring
+import json
+import sys
+
+FIELDS = ('source', 'name', 'price', 'image', 'url', 'scraped_at')
+# '{"source": ', ', "name": ', ... -- the fixed parts of to_json()
+KEY_PREFIXES = tuple(('{' if i == 0 else ', ') + f'"{field}": ' for i, field in enumerate(FIELDS))
+EMPTY = {}   # extra for products without one, when reading it as a dict
+
+
+def stamp():
+    """One scraped_at for everything extracted from a page"""
+    return datetime.now().isoformat()
+
+
+def encode(value):
+    return encode_basestring(value) if type(value) is str else json.dumps(value, ensure_ascii=False)
+
+
+class Product:
+    """
+    source, name, price, image, url, scraped_at, plus any extra fields a site
+    has (rating, reviews, ...) in a dict that only exists when used
+    """
+    __slots__ = FIELDS + ('extra',)
+
+    def __init__(self, source, name, price='N/A', image='', url='', scraped_at=None, **extra):
+        self.source = sys.intern(source) if type(source) is str else source
+        self.name = name
+        self.price = price
+        self.image = image
+        self.url = url
+        self.scraped_at = scraped_at or stamp()
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        return cls(**{field: data.pop(field, None) for field in FIELDS}, **data)
+
+    # ==================== Dict-style access ====================
+    def __getitem__(self, key):
+        if key in FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in FIELDS:
+            setattr(self, key, value)
+        elif self.extra is None:
+            self.extra = {key: value}
+        else:
+            self.extra[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in FIELDS or bool(self.extra and key in self.extra)
+
+    def keys(self):
+        return FIELDS + tuple(self.extra) if self.extra else FIELDS
+
+    def values(self):
+        values = [self.source, self.name, self.price, self.image, self.url, self.scraped_at]
+        return values + list(self.extra.values()) if self.extra else values
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(FIELDS) + (len(self.extra) if self.extra else 0)
+
+    def __eq__(self, other):
+        if isinstance(other, (Product, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Product({dict(self.items())!r})"
+
+    def to_dict(self):
+        return dict(self.items())
+
+    # ==================== Writers ====================
+    def to_json(self):
+        """The JSON object json.dumps(product.to_dict(), ensure_ascii=False) would give, without the dict"""
+        parts = [prefix + encode(value) for prefix, value in zip(KEY_PREFIXES, self.values())]
+        if self.extra:
+            parts.extend(f', {encode(key)}: {encode(value)}' for key, value in self.extra.items())
+        parts.append('}')
+        return ''.join(parts)
+
+    def row(self, fieldnames):
+        """Values for a csv.writer row in fieldnames order ('' when missing)"""
+        if fieldnames is FIELDS and not self.extra:
+            return self.values()
+        return [self.get(field, '') for field in fieldnames]
+
+
+def columns(products, fields=FIELDS):
+    """{field: [values]} for column writers (Parquet/Arrow); Product slots are read directly"""
+    products = list(products)
+    extras = [(p.extra or EMPTY) if type(p) is Product else p for p in products]
+    result = {}
+    for field in fields:
+        if field in FIELDS:
+            result[field] = [getattr(p, field) if type(p) is Product else p.get(field) for p in products]
+        else:
+            result[field] = [extra.get(field) for extra in extras]
+    return result
+
+
+def csv_fields(products):
+    """FIELDS followed by every other key any of the products has, in the order first seen"""
+    extra = {}
+    for product in products:
+        for key in product.keys():
+            if key not in FIELDS:
+                extra.setdefault(key)
+    return FIELDS + tuple(extra)
+
+
+def to_json(product):
+    """One JSON line for a Product or a plain dict"""
+    if type(product) is Product:
+        return product.to_json()
+    return json.dumps(product, ensure_ascii=False)
@@ -0,0 +1,385 @@
+"""
+Product Store
+SQLite (WAL) database of every product ever scraped, keyed on canonical URL,
+so runs add to each other instead of overwriting clothes_data.json
+"""
+
+from collections import Counter
+from datetime import datetime
+import csv
+import json
+import os
+import sqlite3
+import threading
+
+from canonical import canonical_url, key_hash, product_key
+import dedup
+from parquet_export import PARQUET_DIR, export_parquet
+from price_history import PriceHistory, observations
+from product import Product, csv_fields
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(SCRIPT_DIR, 'products.db')
+BATCH_SIZE = 1000
+IN_CHUNK = 500   # ids per "WHERE id IN (...)" query
+
+# Columns every product has; anything else (rating, reviews, ...) goes in extra
+COLUMNS = ['source', 'name', 'price', 'image', 'scraped_at']
+
+# Bumped when canonical keys change; older stores are re-keyed on open
+KEY_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    url TEXT PRIMARY KEY,
+    id INTEGER,
+    source TEXT,
+    name TEXT,
+    price TEXT,
+    image TEXT,
+    extra TEXT,
+    scraped_at TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    cluster_id INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS products_id ON products (id);
+CREATE INDEX IF NOT EXISTS products_source ON products (source);
+CREATE INDEX IF NOT EXISTS products_scraped_at ON products (scraped_at);
+CREATE INDEX IF NOT EXISTS products_cluster ON products (cluster_id);
+CREATE TABLE IF NOT EXISTS name_signatures (
+    id INTEGER PRIMARY KEY,
+    sig BLOB
+);
+CREATE TABLE IF NOT EXISTS name_buckets (
+    band INTEGER,
+    key INTEGER,
+    cluster_id INTEGER,
+    PRIMARY KEY (band, key, cluster_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS name_buckets_cluster ON name_buckets (cluster_id);
+"""
+
+UPSERT = """
+INSERT INTO products (url, id, source, name, price, image, extra, scraped_at, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url) DO UPDATE SET
+    source = excluded.source,
+    name = excluded.name,
+    price = excluded.price,
+    image = excluded.image,
+    extra = excluded.extra,
+    scraped_at = excluded.scraped_at,
+    first_seen = MIN(first_seen, excluded.first_seen),
+    last_seen = MAX(last_seen, excluded.last_seen)
+"""
+
+
+def product_id(key):
+    """Stable 64-bit id for a product key, used by price_history"""
+    return key_hash(key)
+
+
+def to_row(product):
+    key = product_key(product)
+    scraped_at = product.get('scraped_at') or datetime.now().isoformat()
+    if type(product) is Product:
+        extra = product.extra
+    else:
+        extra = {k: v for k, v in product.items() if k not in COLUMNS and k != 'url'}
+    return (key, product_id(key), product.get('source'), product.get('name'), product.get('price'),
+            product.get('image'), json.dumps(extra, ensure_ascii=False) if extra else None,
+            scraped_at, scraped_at, scraped_at)
+
+
+class ProductStore:
+    def __init__(self, path=DB_PATH, batch_size=BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")    # readers don't block the writer, runs can overlap
+        self.db.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, much faster commits
+        self.migrate()
+        self.db.executescript(SCHEMA)
+        self.prices = PriceHistory(os.path.splitext(path)[0] + '_prices')
+        self.pending = []
+        self.changed = set()   # ids written since the last cluster()
+    
+    def migrate(self):
+        """Add the columns older stores lack: id (price history) and cluster_id (near-duplicates)"""
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(products)")]
+        if columns and 'cluster_id' not in columns:
+            self.db.execute("ALTER TABLE products ADD COLUMN cluster_id INTEGER")
+        if columns and 'id' not in columns:
+            with self.db:
+                self.db.execute("ALTER TABLE products ADD COLUMN id INTEGER")
+                keys = [row[0] for row in self.db.execute("SELECT url FROM products")]
+                self.db.executemany("UPDATE products SET id = ? WHERE url = ?", [(product_id(k), k) for k in keys])
+        if columns and self.db.execute("PRAGMA user_version").fetchone()[0] < KEY_VERSION:
+            self.rekey()
+        self.db.execute(f"PRAGMA user_version = {KEY_VERSION}")
+
+    def rekey(self):
+        """
+        Move rows to their current canonical key (site ids since KEY_VERSION 1).
+        Rows that now share a key are merged into the most recently scraped one.
+        Their old price observations stay under the old id.
+        """
+        rows = self.db.execute("SELECT url FROM products WHERE url NOT LIKE 'nourl:%'").fetchall()
+        moves = [(url, canonical_url(url)) for url, in rows]
+        moves = [(old, new) for old, new in moves if new != old]
+        with self.db:
+            for old, new in moves:
+                existing = self.db.execute("SELECT scraped_at FROM products WHERE url = ?", (new,)).fetchone()
+                if existing is None:
+                    self.db.execute("UPDATE products SET url = ?, id = ? WHERE url = ?", (new, product_id(new), old))
+                    continue
+                keep, drop = (new, old) if existing[0] >= self.db.execute(
+                    "SELECT scraped_at FROM products WHERE url = ?", (old,)).fetchone()[0] else (old, new)
+                self.db.execute("""UPDATE products SET
+                    first_seen = MIN(first_seen, (SELECT first_seen FROM products WHERE url = ?)),
+                    last_seen = MAX(last_seen, (SELECT last_seen FROM products WHERE url = ?))
+                    WHERE url = ?""", (drop, drop, keep))
+                self.db.execute("DELETE FROM products WHERE url = ?", (drop,))
+                if keep == old:
+                    self.db.execute("UPDATE products SET url = ?, id = ? WHERE url = ?", (new, product_id(new), old))
+        if moves:
+            print(f"[*] Re-keyed {len(moves)} stored products to site product ids")
+
+    # ==================== Writing ====================
+    def add(self, product):
+        """Queue one product; written (with its price observation) in the next full batch"""
+        self.pending.append(to_row(product))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def upsert(self, products):
+        """Insert or update any iterable of products in batches; returns how many"""
+        count = 0
+        for product in products:
+            self.add(product)
+            count += 1
+        self.flush()
+        return count
+
+    def flush(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        with self.lock, self.db:
+            self.db.executemany(UPSERT, rows)
+            self.changed.update(row[1] for row in rows)
+        self.prices.record(observations((row[1], row[4], row[7]) for row in rows))
+
+    # ==================== Queries ====================
+    def query(self, source=None, since=None, until=None):
+        """
+        Products as dicts in the order they were scraped. since/until filter on
+        scraped_at (ISO strings), which an upsert moves to the latest sighting.
+        """
+        self.flush()
+        sql = ("SELECT url, source, name, price, image, extra, scraped_at, first_seen, last_seen, cluster_id "
+               "FROM products")
+        where, args = [], []
+        if source:
+            where.append("source = ?")
+            args.append(source)
+        if since:
+            where.append("scraped_at >= ?")
+            args.append(since)
+        if until:
+            where.append("scraped_at < ?")
+            args.append(until)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY scraped_at"
+
+        for url, source, name, price, image, extra, scraped_at, first_seen, last_seen, cluster_id in \
+                self.db.execute(sql, args):
+            product = {'source': source, 'name': name, 'price': price, 'image': image,
+                       'url': 'N/A' if url.startswith('nourl:') else url}
+            if extra:
+                product.update(json.loads(extra))
+            product['scraped_at'] = scraped_at
+            product['first_seen'] = first_seen
+            product['last_seen'] = last_seen
+            if cluster_id is not None:
+                product['cluster_id'] = cluster_id
+            yield product
+
+    # ==================== Near-duplicates ====================
+    def cluster(self, threshold=dedup.THRESHOLD, full=False):
+        """
+        Group near-duplicate names (dedup.py) and save each product's
+        cluster_id: the smallest product id in its cluster. Only products
+        written since the last call (or never clustered) are hashed: they are
+        matched against each other and, through the LSH buckets kept in the
+        store, against the first product of every cluster sharing a bucket, so
+        the cost follows the run, not the store. full=True rebuilds the index
+        and every cluster, which also splits clusters whose names have drifted
+        apart. Returns how many of the clustered products have a near-duplicate.
+        """
+        self.flush()
+        try:
+            dedup.require_numpy()
+        except ImportError as e:
+            print(f"[!] Skipping near-duplicate clustering: {e}")
+            return 0
+        if full or self.db.execute("SELECT 1 FROM name_signatures LIMIT 1").fetchone() is None:
+            return self.recluster(threshold)
+
+        with self.lock:
+            ids, self.changed = self.changed, set()
+        ids |= {row[0] for row in self.db.execute("SELECT id FROM products WHERE cluster_id IS NULL")}
+        rows = self._in("SELECT id, name, cluster_id FROM products WHERE id IN ({})", ids)
+        if not rows:
+            return 0
+        named = [row for row in rows if dedup.is_named(row[1])]
+        sigs = dedup.signatures([row[1] for row in named])
+        keys = dedup.band_keys(sigs)
+        label = {row[0]: row[2] if row[2] is not None else row[0] for row in rows}
+
+        with self.lock, self.db:
+            self.db.executemany("INSERT OR REPLACE INTO name_signatures VALUES (?, ?)", self._signatures(rows, named, sigs))
+
+            # Stored clusters sharing a bucket, kept if their first product's signature agrees
+            self.db.execute("CREATE TEMP TABLE IF NOT EXISTS probe (band INTEGER, key INTEGER, id INTEGER)")
+            self.db.execute("DELETE FROM probe")
+            self.db.executemany("INSERT INTO probe VALUES (?, ?, ?)",
+                                ((band, key, row[0]) for row, row_keys in zip(named, keys.tolist())
+                                 for band, key in enumerate(row_keys)))
+            mates = self.db.execute(
+                "SELECT m.id, m.cluster_id, s.sig FROM (SELECT DISTINCT p.id, b.cluster_id FROM probe p "
+                "CROSS JOIN name_buckets b ON b.band = p.band AND b.key = p.key) m "   # probe first
+                "JOIN name_signatures s ON s.id = m.cluster_id WHERE s.sig IS NOT NULL").fetchall()
+            own = {row[0]: sig for row, sig in zip(named, sigs)}
+            agree = dedup.agreements([own[pid] for pid, _, _ in mates], [sig for _, _, sig in mates])
+            pairs = [(label[pid], cluster_id) for (pid, cluster_id, _), share in zip(mates, agree.tolist())
+                     if share >= threshold]
+            # ... and the run's products among themselves
+            left, right = dedup.candidate_pairs(sigs, threshold=threshold)
+            pairs += [(label[named[a][0]], label[named[b][0]]) for a, b in zip(left.tolist(), right.tolist())]
+
+            # Join the clusters of every verified pair; the smallest id wins
+            merged = dedup.join_labels(pairs)
+            moves = [(new, old) for old, new in merged.items() if new != old]
+            self.db.executemany("UPDATE products SET cluster_id = ? WHERE cluster_id = ?", moves)
+            self.db.executemany("UPDATE OR IGNORE name_buckets SET cluster_id = ? WHERE cluster_id = ?", moves)
+            self.db.executemany("DELETE FROM name_buckets WHERE cluster_id = ?", [(old,) for _, old in moves])
+            final = {pid: merged.get(cluster_id, cluster_id) for pid, cluster_id in label.items()}
+            self.db.executemany("UPDATE products SET cluster_id = ? WHERE id = ?",
+                                [(cluster_id, pid) for pid, cluster_id in final.items()])
+            self.db.executemany("INSERT OR IGNORE INTO name_buckets VALUES (?, ?, ?)",
+                                self._buckets(keys, [final[row[0]] for row in named]))
+
+        sizes = dict(self._in("SELECT cluster_id, COUNT(*) FROM products WHERE cluster_id IN ({}) "
+                              "GROUP BY cluster_id", set(final.values())))
+        return sum(1 for cluster_id in final.values() if sizes.get(cluster_id, 0) > 1)
+
+    def recluster(self, threshold=dedup.THRESHOLD):
+        """Cluster every stored product from scratch and rebuild the LSH index"""
+        with self.lock:
+            self.changed = set()
+        rows = self.db.execute("SELECT id, name, cluster_id FROM products").fetchall()
+        named = [row for row in rows if dedup.is_named(row[1])]
+        sigs = dedup.signatures([row[1] for row in named])
+        labels = dedup.cluster_ids([row[1] for row in rows], [row[0] for row in rows], threshold, sigs).tolist()
+        changed = [(label, row[0]) for row, label in zip(rows, labels) if row[2] != label]
+        cluster_of = {row[0]: label for row, label in zip(rows, labels)}
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM name_signatures")
+            self.db.execute("DELETE FROM name_buckets")
+            self.db.executemany("INSERT INTO name_signatures VALUES (?, ?)", self._signatures(rows, named, sigs))
+            self.db.executemany("INSERT OR IGNORE INTO name_buckets VALUES (?, ?, ?)",
+                                self._buckets(dedup.band_keys(sigs), [cluster_of[row[0]] for row in named]))
+            self.db.executemany("UPDATE products SET cluster_id = ? WHERE id = ?", changed)
+        sizes = Counter(labels)
+        return sum(1 for label in labels if sizes[label] > 1)
+
+    @staticmethod
+    def _signatures(rows, named, sigs):
+        """(id, signature bytes) per row; unnamed products get none"""
+        sig_of = {row[0]: sig.tobytes() for row, sig in zip(named, sigs)}
+        return [(row[0], sig_of.get(row[0])) for row in rows]
+
+    @staticmethod
+    def _buckets(keys, clusters):
+        for row_keys, cluster_id in zip(keys.tolist(), clusters):
+            for band, key in enumerate(row_keys):
+                yield band, key, cluster_id
+
+    def _in(self, sql, ids):
+        """Run sql with its IN ({}) filled by ids, a chunk at a time; returns all rows"""
+        ids = list(ids)
+        found = []
+        for i in range(0, len(ids), IN_CHUNK):
+            chunk = ids[i:i + IN_CHUNK]
+            found.extend(self.db.execute(sql.format(', '.join('?' * len(chunk))), chunk).fetchall())
+        return found
+
+    def price_drops(self, percent=20, days=7, now=None):
+        """Products whose price fell at least percent% within the last days, biggest drop first"""
+        self.flush()
+        results = []
+        for pid, was_cents, now_cents, ts in self.prices.drops(percent, days, now):
+            row = self.db.execute("SELECT source, name, url FROM products WHERE id = ?", (pid,)).fetchone()
+            if row:
+                results.append({'source': row[0], 'name': row[1], 'url': row[2],
+                                'was': was_cents / 100, 'now': now_cents / 100,
+                                'drop': round(100 * (1 - now_cents / was_cents), 1),
+                                'seen_at': datetime.fromtimestamp(ts).isoformat()})
+        return results
+    
+    def count(self, source=None):
+        self.flush()
+        if source:
+            return self.db.execute("SELECT COUNT(*) FROM products WHERE source = ?", (source,)).fetchone()[0]
+        return self.db.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def counts_by_source(self, since=None):
+        self.flush()
+        sql = "SELECT source, COUNT(*) FROM products"
+        args = []
+        if since:
+            sql += " WHERE scraped_at >= ?"
+            args.append(since)
+        return dict(self.db.execute(sql + " GROUP BY source ORDER BY COUNT(*) DESC", args).fetchall())
+
+    # ==================== Export ====================
+    def export_json(self, filename, **filters):
+        """Write a query result as a pretty-printed JSON array; returns the product count"""
+        count = 0
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for product in self.query(**filters):
+                f.write(',\n  ' if count else '\n  ')
+                f.write(json.dumps(product, indent=2, ensure_ascii=False).replace('\n', '\n  '))
+                count += 1
+            f.write('\n]' if count else ']')
+        return count
+
+    def export_csv(self, filename, **filters):
+        """CSV with Product.FIELDS and then every extra field any product has as columns"""
+        fieldnames = csv_fields(self.query(**filters))
+        count = 0
+        with open(filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+            writer.writeheader()
+            for product in self.query(**filters):
+                writer.writerow(product)
+                count += 1
+        return count
+
+    def export_parquet(self, directory=PARQUET_DIR, **filters):
+        """Append a query result to the partitioned Parquet dataset; returns the product count"""
+        return export_parquet(self.query(**filters), directory)
+
+    def close(self):
+        self.flush()
+        # Fold raw price observations older than KEEP_RAW_DAYS to daily min/max
+        try:
+            self.prices.downsample()
+        except ImportError:
+            pass  # without numpy the raw segments are kept
+        self.db.close()
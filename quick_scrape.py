@@ -3,16 +3,13 @@ Quick Scraper - Automatically scrapes and saves data
 No user input required
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import json
-import csv
-import time
+from driver_pool import get_pool
+from extraction import SITES, extract_tiles
+from readiness import wait_for_page, report as report_readiness
+from scrolling import scroll_page, report as report_scrolling
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
+from product_store import ProductStore
 import random
 from datetime import datetime
 import os
@@ -24,17 +21,7 @@ def scrape_ebay(query="t-shirts", max_items=30):
     """Scrape eBay - most reliable for scraping"""
     print(f"\n[*] Scraping eBay for: {query}")
     
-    options = Options()
-    options.add_argument('--headless=new')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    driver = get_pool().acquire()
     
     products = []
     
@@ -44,53 +31,32 @@ def scrape_ebay(query="t-shirts", max_items=30):
         print(f"[*] Loading: {url}")
         
         driver.get(url)
-        time.sleep(3)
+        wait_for_page(driver, 'ebay', replaces=3)
         
         # Scroll to load more
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/2);")
-        time.sleep(1)
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(1)
+        scroll_page(driver, 'ebay', max_items + 1, replaces=2.0)
         
-        items = driver.find_elements(By.CSS_SELECTOR, '.s-item')
+        items = extract_tiles(driver, SITES['ebay'], limit=max_items + 1, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[*] Found {len(items)} items")
         
-        for item in items[1:max_items+1]:  # Skip first item (usually header)
-            try:
-                name = item.find_element(By.CSS_SELECTOR, '.s-item__title').text
-                
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, '.s-item__price').text
-                except:
-                    price = "N/A"
-                
-                try:
-                    image = item.find_element(By.CSS_SELECTOR, '.s-item__image-img').get_attribute('src')
-                except:
-                    image = ""
-                
-                try:
-                    link = item.find_element(By.CSS_SELECTOR, '.s-item__link').get_attribute('href')
-                except:
-                    link = ""
-                
-                if name and "Shop on eBay" not in name:
-                    products.append({
-                        'source': 'eBay',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items[1:]:  # Skip first item (usually header)
+            name = item['name']
+            if name and "Shop on eBay" not in name:
+                products.append(Product(
+                    source='eBay',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
         
     except Exception as e:
         print(f"[!] Error: {e}")
     finally:
-        driver.quit()
+        get_pool().release(driver)
     
     return products
 
@@ -99,17 +65,7 @@ def scrape_aliexpress(query="t-shirts", max_items=30):
     """Scrape AliExpress"""
     print(f"\n[*] Scraping AliExpress for: {query}")
     
-    options = Options()
-    options.add_argument('--headless=new')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
+    driver = get_pool().acquire()
     
     products = []
     
@@ -118,55 +74,32 @@ def scrape_aliexpress(query="t-shirts", max_items=30):
         print(f"[*] Loading: {url}")
         
         driver.get(url)
-        time.sleep(5)
+        wait_for_page(driver, 'aliexpress', replaces=5)
         
         # Scroll
-        for i in range(3):
-            driver.execute_script(f"window.scrollTo(0, {(i+1) * 1000});")
-            time.sleep(0.5)
+        scroll_page(driver, 'aliexpress', max_items, replaces=1.5)
         
-        items = driver.find_elements(By.CSS_SELECTOR, '[class*="search-card-item"], [class*="product-card"], .list--gallery--C2f2tvm')
+        items = extract_tiles(driver, SITES['aliexpress'], limit=max_items, defaults={'name': '', 'price': 'N/A', 'image': '', 'url': ''})
         print(f"[*] Found {len(items)} items")
         
-        for item in items[:max_items]:
-            try:
-                try:
-                    name = item.find_element(By.CSS_SELECTOR, 'h3, [class*="title"]').text
-                except:
-                    continue
-                
-                try:
-                    price = item.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                except:
-                    price = "N/A"
-                
-                try:
-                    image = item.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                except:
-                    image = ""
-                
-                try:
-                    link = item.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                except:
-                    link = ""
-                
-                if name and len(name) > 5:
-                    products.append({
-                        'source': 'AliExpress',
-                        'name': name,
-                        'price': price,
-                        'image': image,
-                        'url': link,
-                        'scraped_at': datetime.now().isoformat()
-                    })
-                    print(f"  [+] {name[:50]}...")
-            except:
-                continue
+        scraped_at = stamp()
+        for item in items:
+            name = item['name']
+            if name and len(name) > 5:
+                products.append(Product(
+                    source='AliExpress',
+                    name=name,
+                    price=item['price'],
+                    image=item['image'],
+                    url=item['url'],
+                    scraped_at=scraped_at
+                ))
+                print(f"  [+] {name[:50]}...")
         
     except Exception as e:
         print(f"[!] Error: {e}")
     finally:
-        driver.quit()
+        get_pool().release(driver)
     
     return products
 
@@ -176,7 +109,9 @@ def main():
     print("  Quick Clothes Scraper")
     print("=" * 60)
     
-    all_products = []
+    # Written to disk as each site finishes, then merged into the product store
+    all_products = JsonlSink(stream_path('clothes_data'))
+    run_started = datetime.now().isoformat()
     
     # Scrape eBay
     ebay_products = scrape_ebay("men shirts", 20)
@@ -186,21 +121,25 @@ def main():
     ali_products = scrape_aliexpress("t-shirts", 20)
     all_products.extend(ali_products)
     
+    store = ProductStore()
+    store.upsert(all_products)
+    duplicates = store.cluster()
+    
     # Save to JSON
     json_path = os.path.join(SCRIPT_DIR, 'clothes_data.json')
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(all_products, f, indent=2, ensure_ascii=False)
-    print(f"\n[+] Saved {len(all_products)} products to {json_path}")
+    saved = store.export_json(json_path, since=run_started)
+    print(f"\n[+] Saved {saved} products to {json_path}")
+    print(f"[+] {duplicates} products have near-duplicates across listings")
     
     # Save to CSV
     csv_path = os.path.join(SCRIPT_DIR, 'clothes_data.csv')
-    if all_products:
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=all_products[0].keys())
-            writer.writeheader()
-            writer.writerows(all_products)
-        print(f"[+] Saved {len(all_products)} products to {csv_path}")
+    if saved:
+        store.export_csv(csv_path, since=run_started)
+        print(f"[+] Saved {saved} products to {csv_path}")
+    store.close()
     
+    report_readiness()
+    report_scrolling()
     print(f"\n[*] Done! Total: {len(all_products)} products")
 
 
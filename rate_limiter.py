@@ -0,0 +1,141 @@
+"""
+Per-Domain Rate Limiter
+Token buckets keyed by domain, so each site is fetched at the rate it
+tolerates instead of sleeping a random 2-5 s before every request
+"""
+
+from urllib.parse import urlparse
+import asyncio
+import random
+import threading
+import time
+
+# domain: (requests per second, burst size, max jitter in seconds)
+DOMAIN_RATES = {
+    'amazon.com': (0.25, 1, 1.0),
+    'ebay.com': (0.5, 2, 0.5),
+    'etsy.com': (0.33, 2, 0.5),
+    'depop.com': (0.33, 2, 0.5),
+    'shein.com': (0.25, 1, 1.0),
+    'asos.com': (0.4, 2, 0.5),
+    'zara.com': (0.25, 1, 1.0),
+    'aliexpress.com': (0.25, 1, 1.0),
+    'hm.com': (0.4, 2, 0.5),
+    'nordstrom.com': (0.33, 2, 0.5),
+    'forever21.com': (0.33, 2, 0.5),
+}
+DEFAULT_RATE = (0.33, 1, 0.5)
+
+
+def domain_of(url):
+    """'https://www2.hm.com/en_us/...' -> 'hm.com'"""
+    host = urlparse(url).hostname or url
+    if host.replace('.', '').isdigit():
+        return host  # IP address
+    return '.'.join(host.split('.')[-2:])
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1, jitter=0.0):
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take a token now and return how long the caller must wait for it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def reserve_jittered(self):
+        wait = self.reserve()
+        if wait > 0:
+            wait += random.uniform(0, self.jitter)
+        return wait
+
+    def acquire(self):
+        """Block until a token is available; returns seconds waited"""
+        wait = self.reserve_jittered()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        """Like acquire() but yields to the event loop while waiting"""
+        wait = self.reserve_jittered()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    def __init__(self, rates=None, default=DEFAULT_RATE):
+        self.rates = dict(DOMAIN_RATES if rates is None else rates)
+        self.default = default
+        self.buckets = {}
+        self.waited = {}
+        self.lock = threading.Lock()
+
+    def configure(self, domain, rate, burst=1, jitter=0.0):
+        """Override the rate for one domain"""
+        with self.lock:
+            self.rates[domain] = (rate, burst, jitter)
+            self.buckets.pop(domain, None)
+
+    def bucket(self, domain):
+        with self.lock:
+            if domain not in self.buckets:
+                self.buckets[domain] = TokenBucket(*self.rates.get(domain, self.default))
+            return self.buckets[domain]
+
+    def acquire(self, url):
+        """Wait for a token for this URL's domain"""
+        domain = domain_of(url)
+        waited = self.bucket(domain).acquire()
+        with self.lock:
+            self.waited[domain] = self.waited.get(domain, 0.0) + waited
+        return waited
+
+    def reserve(self, url):
+        """Take a token for this URL's domain now, returning how many seconds until it may be used"""
+        domain = domain_of(url)
+        wait = self.bucket(domain).reserve_jittered()
+        with self.lock:
+            self.waited[domain] = self.waited.get(domain, 0.0) + wait
+        return wait
+
+    async def acquire_async(self, url):
+        """Wait for a token without blocking the event loop"""
+        domain = domain_of(url)
+        waited = await self.bucket(domain).acquire_async()
+        with self.lock:
+            self.waited[domain] = self.waited.get(domain, 0.0) + waited
+        return waited
+
+
+_limiter = RateLimiter()
+
+
+def get_limiter():
+    """Shared limiter for this process"""
+    return _limiter
+
+
+def acquire(url):
+    return _limiter.acquire(url)
+
+
+def reserve(url):
+    return _limiter.reserve(url)
+
+
+async def acquire_async(url):
+    return await _limiter.acquire_async(url)
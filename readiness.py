@@ -0,0 +1,141 @@
+"""
+Page Readiness
+Waits for product tiles (plus an optional DOM-quiet or network-idle
+period) instead of sleeping a fixed 3-6 s after every navigation
+"""
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from extraction import SITES
+import extraction
+import network_capture
+import threading
+import time
+
+# site: timeout (s), DOM quiet period (ms), network idle period (ms, 0 = off)
+SITE_READY = {
+    'amazon': {'timeout': 10, 'quiet_ms': 300, 'idle_ms': 0},
+    'ebay': {'timeout': 8, 'quiet_ms': 200, 'idle_ms': 0},
+    'etsy': {'timeout': 10, 'quiet_ms': 300, 'idle_ms': 0},
+    'depop': {'timeout': 12, 'quiet_ms': 400, 'idle_ms': 500},
+    'shein': {'timeout': 15, 'quiet_ms': 500, 'idle_ms': 500},
+    'asos': {'timeout': 10, 'quiet_ms': 300, 'idle_ms': 0},
+    'zara': {'timeout': 15, 'quiet_ms': 500, 'idle_ms': 500},
+    'aliexpress': {'timeout': 15, 'quiet_ms': 500, 'idle_ms': 500},
+    'hm': {'timeout': 12, 'quiet_ms': 400, 'idle_ms': 0},
+    'nordstrom': {'timeout': 10, 'quiet_ms': 300, 'idle_ms': 0},
+    'forever21': {'timeout': 10, 'quiet_ms': 300, 'idle_ms': 0},
+}
+DEFAULT_READY = {'timeout': 10, 'quiet_ms': 300, 'idle_ms': 0}
+
+_DOM_QUIET_JS = """
+const [quietMs, maxMs, done] = arguments;
+const start = performance.now();
+let timer = null, cap = null;
+const observer = new MutationObserver(() => {
+    clearTimeout(timer);
+    timer = setTimeout(finish, quietMs);
+});
+function finish() {
+    observer.disconnect();
+    clearTimeout(timer);
+    clearTimeout(cap);
+    done(performance.now() - start);
+}
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+timer = setTimeout(finish, quietMs);
+cap = setTimeout(finish, maxMs);
+"""
+
+_NETWORK_IDLE_JS = """
+const [idleMs, maxMs, done] = arguments;
+const start = performance.now();
+let last = -1, lastChange = start;
+(function tick() {
+    const now = performance.now();
+    const n = performance.getEntriesByType('resource').length;
+    if (n !== last) { last = n; lastChange = now; }
+    if (now - lastChange >= idleMs || now - start >= maxMs) done(now - start);
+    else setTimeout(tick, 50);
+})();
+"""
+
+# (site, seconds to ready, ready?, seconds of fixed sleep it replaced)
+STATS = []
+_stats_lock = threading.Lock()
+
+
+def _run_async(driver, script, period_ms, remaining):
+    driver.set_script_timeout(remaining + 5)
+    driver.execute_async_script(script, period_ms, int(remaining * 1000))
+
+
+def wait_for_page(driver, site, selector=None, replaces=0.0, after=None, max_items=None):
+    """
+    Block until the site's product tiles are on the page, or its search API
+    response already holds the products (sites with an 'api' in SITES).
+
+    selector - tile selector override (defaults to the site's tile selectors)
+    replaces - the fixed sleep this wait stands in for, used by report()
+    after    - element from the previous page; wait for it to go stale first
+               (for navigations triggered by a click)
+    max_items - API products that count as ready (default: any)
+    Returns True if tiles or API products appeared before the site's timeout.
+    """
+    config = SITE_READY.get(site, DEFAULT_READY)
+    css = selector or ', '.join(SITES[site]['tiles'])
+    start = time.perf_counter()
+    deadline = start + config['timeout']
+    ready = False
+
+    try:
+        wait = WebDriverWait(driver, config['timeout'], poll_frequency=0.1)
+        if after is not None:
+            wait.until(EC.staleness_of(after))
+        api = SITES[site].get('api') if extraction.USE_NETWORK else None
+
+        def found(d):
+            if d.execute_script("return document.querySelector(arguments[0]) !== null", css):
+                return 'tiles'
+            return api is not None and network_capture.enough(d, api, SITES[site], max_items) and 'api'
+
+        rendered = wait.until(found) == 'tiles'
+        ready = True
+
+        # An API answer has nothing to settle: extract_tiles reads the captured products
+        if rendered and config['quiet_ms']:
+            _run_async(driver, _DOM_QUIET_JS, config['quiet_ms'], max(deadline - time.perf_counter(), 0.1))
+        if rendered and config['idle_ms']:
+            _run_async(driver, _NETWORK_IDLE_JS, config['idle_ms'], max(deadline - time.perf_counter(), 0.1))
+    except TimeoutException:
+        pass
+    except WebDriverException as e:
+        print(f"[!] Readiness check failed on {site}: {str(e)[:60]}")
+
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        STATS.append((site, elapsed, ready, replaces))
+    return ready
+
+
+def report():
+    """Print how long pages took to become ready vs the old fixed sleeps"""
+    with _stats_lock:
+        stats = list(STATS)
+    if not stats:
+        return
+
+    sites = {}
+    for site, elapsed, ready, replaces in stats:
+        s = sites.setdefault(site, {'pages': 0, 'elapsed': 0.0, 'timeouts': 0, 'saved': 0.0})
+        s['pages'] += 1
+        s['elapsed'] += elapsed
+        s['timeouts'] += 0 if ready else 1
+        s['saved'] += replaces - elapsed
+
+    print("\n[*] Page readiness:")
+    for site, s in sites.items():
+        print(f"    - {site:<12} {s['elapsed'] / s['pages']:5.2f}s avg over {s['pages']} page(s), "
+              f"{s['timeouts']} timeout(s), {s['saved']:+.1f}s vs fixed sleeps")
+    print(f"    Total saved: {sum(s['saved'] for s in sites.values()):+.1f}s")
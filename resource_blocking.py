@@ -0,0 +1,70 @@
+"""
+Resource Blocking
+Keeps Chrome from downloading images, fonts, media and trackers we never
+read (we only need text and image src attributes), using CDP
+Network.setBlockedURLs
+"""
+
+from selenium.common.exceptions import WebDriverException
+from rate_limiter import domain_of
+
+# Set to False to load pages with every resource
+BLOCK_RESOURCES = True
+
+# resource type: URL patterns (CDP wildcard syntax)
+BLOCKED_TYPES = {
+    'image': ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+              '*.jpg?*', '*.jpeg?*', '*.png?*', '*.webp?*', '*.avif?*'],
+    'font': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot', '*.woff2?*', '*.woff?*'],
+    'media': ['*.mp4', '*.webm', '*.m3u8', '*.ts', '*.mp3', '*.ogg', '*.mp4?*', '*.m3u8?*'],
+}
+
+TRACKERS = [
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*googlesyndication.com*', '*connect.facebook.net*', '*facebook.com/tr*',
+    '*hotjar.com*', '*criteo.com*', '*criteo.net*', '*scorecardresearch.com*',
+    '*bat.bing.com*', '*analytics.tiktok.com*', '*ct.pinterest.com*',
+    '*segment.io*', '*nr-data.net*', '*newrelic.com*', '*optimizely.com*',
+    '*quantserve.com*', '*adsrvr.org*', '*taboola.com*', '*outbrain.com*',
+    '*clarity.ms*', '*branch.io*', '*appsflyer.com*',
+]
+
+# domain: patterns from the blocklist that must NOT be blocked on that site.
+# Shein draws its product grid placeholders from SVG sprites and Zara only
+# renders its grid after its tag manager has loaded.
+SITE_ALLOW = {
+    'shein.com': ['*.svg'],
+    'zara.com': ['*googletagmanager.com*'],
+}
+
+
+def blocked_patterns(domain=None, types=None, extra=None):
+    """Blocklist for a domain, with that domain's allowlist taken out"""
+    patterns = []
+    for kind in (types or BLOCKED_TYPES):
+        patterns.extend(BLOCKED_TYPES[kind])
+    patterns.extend(TRACKERS)
+    if extra:
+        patterns.extend(extra)
+    allowed = set(SITE_ALLOW.get(domain, []))
+    return [p for p in patterns if p not in allowed]
+
+
+def set_blocking(driver, patterns):
+    """Install a URL blocklist on a driver (empty list turns blocking off)"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
+
+def apply_for_url(driver, url):
+    """Switch the driver to the blocklist for url's domain if it changed"""
+    if not BLOCK_RESOURCES:
+        return
+    domain = domain_of(url)
+    if getattr(driver, 'blocking_domain', None) == domain:
+        return
+    try:
+        set_blocking(driver, blocked_patterns(domain))
+        driver.blocking_domain = domain
+    except WebDriverException as e:
+        print(f"[!] Could not set resource blocking: {str(e)[:60]}")
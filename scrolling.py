@@ -0,0 +1,124 @@
+"""
+Adaptive Scrolling
+Scrolls a results page in the browser while counting its product tiles,
+and stops once there are enough of them, the count stops growing at the
+bottom of the page, or the site's time budget runs out - one round-trip
+instead of a fixed pattern of scrolls and sleeps
+"""
+
+from selenium.common.exceptions import WebDriverException
+from extraction import SITES
+import extraction
+import network_capture
+import threading
+import time
+
+# step    - px per scroll, picked at random in the range
+# pause   - ms between scrolls, picked at random in the range
+# plateau - ms at the bottom with no new tiles before giving up
+# budget  - s for the whole page
+DEFAULT_SCROLL = {'step': (600, 900), 'pause': (150, 250), 'plateau': 800, 'budget': 6}
+SITE_SCROLL = {
+    'amazon': {'step': (300, 700), 'pause': (300, 800), 'budget': 10},   # human-looking
+    'aliexpress': {'plateau': 1200, 'budget': 8},
+    'shein': {'plateau': 1200, 'budget': 8},
+    'depop': {'plateau': 1200, 'budget': 8},
+}
+
+_SCROLL_JS = """
+const [selectors, maxItems, plateauMs, budgetMs, step, pause, done] = arguments;
+const start = performance.now();
+const rand = ([lo, hi]) => lo + Math.random() * (hi - lo);
+const count = () => {
+    for (const sel of selectors) {
+        const n = document.querySelectorAll(sel).length;
+        if (n) return n;
+    }
+    return 0;
+};
+let tiles = count(), grew = start, steps = 0;
+(function tick() {
+    const now = performance.now();
+    const n = count();
+    if (n > tiles) { tiles = n; grew = now; }
+    const root = document.scrollingElement || document.documentElement;
+    const bottom = window.scrollY + window.innerHeight >= root.scrollHeight - 2;
+    let reason = null;
+    if (maxItems != null && tiles >= maxItems) reason = 'enough';
+    else if (bottom && now - grew >= plateauMs) reason = 'plateau';
+    else if (now - start >= budgetMs) reason = 'budget';
+    if (reason) return done([tiles, steps, reason]);
+    if (!bottom) { window.scrollBy(0, rand(step)); steps++; }
+    setTimeout(tick, rand(pause));
+})();
+"""
+
+# (site, seconds scrolling, tiles, steps, stop reason, seconds of the fixed scroll it replaced)
+STATS = []
+_stats_lock = threading.Lock()
+
+
+def scroll_page(driver, site, max_items=None, replaces=0.0):
+    """
+    Scroll until the page holds max_items tiles (None: as many as load),
+    the count plateaus at the bottom, or the site's budget runs out.
+
+    replaces - the time the old fixed scroll took, used by report()
+    Skipped when the site's captured API responses already hold max_items.
+    Returns the number of tiles (or API products) on the page.
+    """
+    config = dict(DEFAULT_SCROLL, **SITE_SCROLL.get(site, {}))
+    start = time.perf_counter()
+    api = SITES[site].get('api') if extraction.USE_NETWORK else None
+    if max_items is not None and api and network_capture.enough(driver, api, SITES[site], max_items):
+        # the site's API already returned enough products; nothing needs to render
+        tiles, steps, reason = len(network_capture.peek(driver, api, SITES[site])), 0, 'api'
+    else:
+        tiles, steps, reason = _scroll(driver, site, config, max_items)
+
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        STATS.append((site, elapsed, tiles, steps, reason, replaces))
+    return tiles
+
+
+def _scroll(driver, site, config, max_items):
+    """(tiles, scrolls, stop reason) from one run of _SCROLL_JS"""
+    tiles, steps, reason = 0, 0, 'error'
+    try:
+        driver.set_script_timeout(config['budget'] + 5)
+        result = driver.execute_async_script(_SCROLL_JS, SITES[site]['tiles'], max_items, config['plateau'],
+                                             config['budget'] * 1000, list(config['step']), list(config['pause']))
+        if isinstance(result, list):
+            tiles, steps, reason = result
+        else:
+            reason = 'skipped'   # no live page behind the driver (page_archive replay)
+    except WebDriverException as e:
+        print(f"[!] Scrolling failed on {site}: {str(e)[:60]}")
+    return tiles, steps, reason
+
+
+def report():
+    """Print scroll time per page, tiles found and why scrolling stopped"""
+    with _stats_lock:
+        stats = list(STATS)
+    if not stats:
+        return
+
+    sites = {}
+    for site, elapsed, tiles, steps, reason, replaces in stats:
+        s = sites.setdefault(site, {'pages': 0, 'elapsed': 0.0, 'tiles': 0, 'steps': 0, 'saved': 0.0, 'reasons': {}})
+        s['pages'] += 1
+        s['elapsed'] += elapsed
+        s['tiles'] += tiles
+        s['steps'] += steps
+        s['saved'] += replaces - elapsed
+        s['reasons'][reason] = s['reasons'].get(reason, 0) + 1
+
+    print("\n[*] Scrolling:")
+    for site, s in sites.items():
+        reasons = ', '.join(f"{n} {reason}" for reason, n in s['reasons'].items())
+        print(f"    - {site:<12} {s['elapsed'] / s['pages']:5.2f}s avg over {s['pages']} page(s), "
+              f"{s['tiles'] / s['pages']:.0f} tiles, {s['steps'] / s['pages']:.0f} scrolls ({reasons}), "
+              f"{s['saved']:+.1f}s vs fixed scrolling")
+    print(f"    Total saved: {sum(s['saved'] for s in sites.values()):+.1f}s")
@@ -0,0 +1,97 @@
+"""
+Site Runner
+Runs several site scrapers, one after another or concurrently
+with one pooled browser per worker
+"""
+
+from driver_pool import get_pool
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+
+def run_sites(tasks, query, workers=1, headless=True, sink=None, archive=None, replay=False):
+    """
+    Run scrape functions and merge their results.
+
+    tasks   - list of (label, scrape_fn, max_items); scrape_fn(driver, query, max_items)
+              must return a list of products
+    workers - number of sites scraped at once, each on its own driver
+    sink    - optional output_sink.JsonlSink; each site's products are written
+              to it as soon as it and every task before it have finished, so a
+              later failure loses nothing and the stream keeps task order
+    archive - optional page_archive.PageArchive; every page is saved to it as it
+              is extracted, keyed by (label, query, page)
+    replay  - run the scrape functions on the archive's pages instead: no
+              browser is started and nothing is fetched
+
+    Products come back in task order whatever order the sites finish in.
+    Returns (products, timings) where timings is a list of (label, seconds, count).
+    """
+    workers = max(1, min(workers, len(tasks)))
+    pool = None if replay else get_pool(headless, size=workers)
+
+    # Finished tasks waiting for an earlier one before they go to the sink
+    finished = {}
+    written = [0]
+    sink_lock = threading.Lock()
+
+    def write(index, products):
+        with sink_lock:
+            finished[index] = products
+            while written[0] in finished:
+                sink.extend(finished.pop(written[0]))
+                written[0] += 1
+
+    def scrape(index, label, scrape_fn, max_items, driver):
+        start = time.perf_counter()
+        try:
+            products = scrape_fn(driver, query, max_items)
+        except Exception as e:
+            print(f"[{label}] Error: {e}")
+            products = []
+        if sink is not None:
+            write(index, products)
+        return products, time.perf_counter() - start
+
+    def run(index, task):
+        label, scrape_fn, max_items = task
+        if replay:
+            return scrape(index, label, scrape_fn, max_items, archive.replayer(label, query))
+        with pool.lease() as driver:
+            if archive is not None:
+                driver = archive.recorder(driver, label, query)
+            return scrape(index, label, scrape_fn, max_items, driver)
+
+    wall_start = time.perf_counter()
+    if workers == 1:
+        results = [run(index, task) for index, task in enumerate(tasks)]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run, index, task) for index, task in enumerate(tasks)]
+            results = [future.result() for future in futures]
+    wall = time.perf_counter() - wall_start
+
+    products = sink if sink is not None else []
+    timings = []
+    for (label, _, _), (site_products, seconds) in zip(tasks, results):
+        if sink is None:
+            products.extend(site_products)
+        timings.append((label, seconds, len(site_products)))
+
+    print_timings(timings, wall, workers)
+    if archive is not None and not replay:
+        archive.report()
+    if sink is not None and sink.dropped:
+        print(f"[*] Dropped {sink.dropped} duplicate listings")
+    return products, timings
+
+
+def print_timings(timings, wall, workers):
+    print(f"\n{'=' * 40}")
+    print(f"[*] Site timings ({workers} worker{'s' if workers > 1 else ''}):")
+    for label, seconds, count in timings:
+        print(f"    - {label:<12} {seconds:6.1f}s  {count} products")
+    total = sum(seconds for _, seconds, _ in timings)
+    print(f"    Wall time: {wall:.1f}s (sum of sites: {total:.1f}s)")
+    print(f"{'=' * 40}")
@@ -3,57 +3,28 @@ Smart Clothes Scraper - Auto-detects Chrome version
 Uses webdriver-manager to automatically download correct ChromeDriver
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import json
-import csv
+from driver_pool import get_pool
+from extraction import SITES, extract_tiles
+from readiness import wait_for_page, report as report_readiness
+from scrolling import scroll_page, report as report_scrolling
+from pagination import PREFETCH_DEPTH, PagePipeline, report as report_pagination
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
 import time
 import random
-from datetime import datetime
 
 class SmartClothingScraper:
     def __init__(self, headless=False):
         """Initialize with auto-detected ChromeDriver"""
         print("[*] Setting up Chrome driver (auto-detecting version)...")
         
-        options = Options()
+        # Warm driver from the shared pool (anti-detection options and
+        # webdriver flag removal are applied by driver_pool)
+        self.pool = get_pool(headless)
+        self.driver = self.pool.acquire()
         
-        if headless:
-            options.add_argument('--headless=new')
-        
-        # Anti-detection settings
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--start-maximized')
-        options.add_argument('--disable-infobars')
-        options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36')
-        
-        # Disable automation flags
-        options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        # Use webdriver-manager to auto-download correct driver
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
-        
-        # Remove webdriver flag
-        self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-            'source': '''
-                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
-            '''
-        })
-        
-        self.products = []
+        # Written to disk as they are found; exports read them back
+        self.products = JsonlSink(stream_path('clothes_data'))
         print("[+] Chrome driver ready!")
     
     def random_delay(self, min_sec=2, max_sec=4):
@@ -61,149 +32,73 @@ class SmartClothingScraper:
         delay = random.uniform(min_sec, max_sec)
         time.sleep(delay)
     
-    def scroll_page(self):
-        """Scroll page to load lazy content"""
-        scroll_pause = 0.5
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
-        
-        for i in range(3):
-            self.driver.execute_script(f"window.scrollTo(0, {(i+1) * last_height / 3});")
-            time.sleep(scroll_pause)
-        
-        self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(scroll_pause)
-    
-    def scrape_amazon(self, search_query, max_pages=2):
-        """Scrape Amazon clothing"""
+    def scrape_amazon(self, search_query, max_pages=2, prefetch=PREFETCH_DEPTH):
+        """Scrape Amazon clothing; the next prefetch pages load in tabs while one is extracted"""
         print(f"\n[*] Searching Amazon for: {search_query}")
         
         base_url = f"https://www.amazon.com/s?k={search_query.replace(' ', '+')}&i=fashion"
+        urls = [f"{base_url}&page={page}" for page in range(1, max_pages + 1)]
         
-        for page in range(1, max_pages + 1):
-            url = f"{base_url}&page={page}"
+        for page, url in enumerate(PagePipeline(self.driver, urls, prefetch), 1):
             print(f"[*] Page {page}/{max_pages}...")
             
             try:
-                self.driver.get(url)
-                self.random_delay(3, 5)
-                self.scroll_page()
+                wait_for_page(self.driver, 'amazon', replaces=4)
+                scroll_page(self.driver, 'amazon', replaces=2.0)
                 
-                # Wait for products
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, '[data-component-type="s-search-result"]'))
-                )
-                
-                products = self.driver.find_elements(By.CSS_SELECTOR, '[data-component-type="s-search-result"]')
+                products = extract_tiles(self.driver, SITES['amazon'], defaults={'name': 'N/A', 'price': 'N/A', 'rating': 'N/A', 'image': 'N/A', 'url': 'N/A'})
                 print(f"    Found {len(products)} items on this page")
                 
+                scraped_at = stamp()
                 for product in products:
-                    try:
-                        # Get product name
-                        try:
-                            name = product.find_element(By.CSS_SELECTOR, 'h2 span').text
-                        except:
-                            name = "N/A"
-                        
-                        # Get price
-                        try:
-                            price = product.find_element(By.CSS_SELECTOR, '.a-price .a-offscreen').get_attribute('textContent')
-                        except:
-                            try:
-                                price = product.find_element(By.CSS_SELECTOR, '.a-price-whole').text
-                                price = f"${price}"
-                            except:
-                                price = "N/A"
-                        
-                        # Get image
-                        try:
-                            image = product.find_element(By.CSS_SELECTOR, '.s-image').get_attribute('src')
-                        except:
-                            image = "N/A"
-                        
-                        # Get link
-                        try:
-                            link = product.find_element(By.CSS_SELECTOR, 'h2 a').get_attribute('href')
-                        except:
-                            link = "N/A"
-                        
-                        # Get rating
-                        try:
-                            rating = product.find_element(By.CSS_SELECTOR, '.a-icon-alt').get_attribute('textContent')
-                        except:
-                            rating = "N/A"
-                        
-                        if name and name != "N/A":
-                            self.products.append({
-                                'source': 'Amazon',
-                                'name': name,
-                                'price': price,
-                                'rating': rating,
-                                'image': image,
-                                'url': link,
-                                'scraped_at': datetime.now().isoformat()
-                            })
-                            print(f"    [+] {name[:50]}...")
-                    
-                    except Exception as e:
-                        continue
-                
-                self.random_delay(2, 4)
+                    name = product['name']
+                    if name and name != "N/A":
+                        self.products.append(Product(
+                            source='Amazon',
+                            name=name,
+                            price=product['price'],
+                            rating=product['rating'],
+                            image=product['image'],
+                            url=product['url'],
+                            scraped_at=scraped_at
+                        ))
+                        print(f"    [+] {name[:50]}...")
                 
             except Exception as e:
                 print(f"    [!] Error on page {page}: {str(e)[:50]}")
         
         return self.products
     
-    def scrape_ebay(self, search_query, max_pages=2):
-        """Scrape eBay clothing"""
+    def scrape_ebay(self, search_query, max_pages=2, prefetch=PREFETCH_DEPTH):
+        """Scrape eBay clothing; the next prefetch pages load in tabs while one is extracted"""
         print(f"\n[*] Searching eBay for: {search_query}")
         
-        for page in range(1, max_pages + 1):
-            url = f"https://www.ebay.com/sch/i.html?_nkw={search_query.replace(' ', '+')}&_sacat=11450&_pgn={page}"
+        urls = [f"https://www.ebay.com/sch/i.html?_nkw={search_query.replace(' ', '+')}&_sacat=11450&_pgn={page}"
+                for page in range(1, max_pages + 1)]
+        
+        for page, url in enumerate(PagePipeline(self.driver, urls, prefetch), 1):
             print(f"[*] Page {page}/{max_pages}...")
             
             try:
-                self.driver.get(url)
-                self.random_delay(2, 4)
-                self.scroll_page()
+                wait_for_page(self.driver, 'ebay', replaces=3)
+                scroll_page(self.driver, 'ebay', replaces=2.0)
                 
-                products = self.driver.find_elements(By.CSS_SELECTOR, '.s-item')
+                products = extract_tiles(self.driver, SITES['ebay'], defaults={'name': '', 'price': 'N/A', 'image': 'N/A', 'url': 'N/A'})
                 print(f"    Found {len(products)} items")
                 
+                scraped_at = stamp()
                 for product in products[1:]:  # Skip first (it's usually a header)
-                    try:
-                        name = product.find_element(By.CSS_SELECTOR, '.s-item__title').text
-                        
-                        try:
-                            price = product.find_element(By.CSS_SELECTOR, '.s-item__price').text
-                        except:
-                            price = "N/A"
-                        
-                        try:
-                            image = product.find_element(By.CSS_SELECTOR, '.s-item__image-img').get_attribute('src')
-                        except:
-                            image = "N/A"
-                        
-                        try:
-                            link = product.find_element(By.CSS_SELECTOR, '.s-item__link').get_attribute('href')
-                        except:
-                            link = "N/A"
-                        
-                        if name and "Shop on eBay" not in name:
-                            self.products.append({
-                                'source': 'eBay',
-                                'name': name,
-                                'price': price,
-                                'image': image,
-                                'url': link,
-                                'scraped_at': datetime.now().isoformat()
-                            })
-                            print(f"    [+] {name[:50]}...")
-                    
-                    except:
-                        continue
-                
-                self.random_delay(2, 3)
+                    name = product['name']
+                    if name and "Shop on eBay" not in name:
+                        self.products.append(Product(
+                            source='eBay',
+                            name=name,
+                            price=product['price'],
+                            image=product['image'],
+                            url=product['url'],
+                            scraped_at=scraped_at
+                        ))
+                        print(f"    [+] {name[:50]}...")
                 
             except Exception as e:
                 print(f"    [!] Error: {e}")
@@ -219,49 +114,26 @@ class SmartClothingScraper:
         
         try:
             self.driver.get(url)
-            self.random_delay(4, 6)
-            self.scroll_page()
-            self.random_delay(2, 3)
+            wait_for_page(self.driver, 'aliexpress', replaces=5)
+            scroll_page(self.driver, 'aliexpress', 30, replaces=4.5)
             
             # Find product cards
-            products = self.driver.find_elements(By.CSS_SELECTOR, '[class*="search-card-item"], [class*="product-card"]')
+            products = extract_tiles(self.driver, SITES['aliexpress'], limit=30, defaults={'name': 'N/A', 'price': 'N/A', 'image': 'N/A', 'url': 'N/A'})
             print(f"    Found {len(products)} items")
             
-            for product in products[:30]:  # Limit to 30
-                try:
-                    try:
-                        name = product.find_element(By.CSS_SELECTOR, 'h3, [class*="title"]').text
-                    except:
-                        name = "N/A"
-                    
-                    try:
-                        price = product.find_element(By.CSS_SELECTOR, '[class*="price"]').text
-                    except:
-                        price = "N/A"
-                    
-                    try:
-                        image = product.find_element(By.CSS_SELECTOR, 'img').get_attribute('src')
-                    except:
-                        image = "N/A"
-                    
-                    try:
-                        link = product.find_element(By.CSS_SELECTOR, 'a').get_attribute('href')
-                    except:
-                        link = "N/A"
-                    
-                    if name and name != "N/A" and len(name) > 5:
-                        self.products.append({
-                            'source': 'AliExpress',
-                            'name': name,
-                            'price': price,
-                            'image': image,
-                            'url': link,
-                            'scraped_at': datetime.now().isoformat()
-                        })
-                        print(f"    [+] {name[:50]}...")
-                
-                except:
-                    continue
+            scraped_at = stamp()
+            for product in products:
+                name = product['name']
+                if name and name != "N/A" and len(name) > 5:
+                    self.products.append(Product(
+                        source='AliExpress',
+                        name=name,
+                        price=product['price'],
+                        image=product['image'],
+                        url=product['url'],
+                        scraped_at=scraped_at
+                    ))
+                    print(f"    [+] {name[:50]}...")
             
         except Exception as e:
             print(f"    [!] Error: {e}")
@@ -270,25 +142,21 @@ class SmartClothingScraper:
     
     def export_json(self, filename='clothes_data.json'):
         """Export to JSON"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.products, f, indent=2, ensure_ascii=False)
-        print(f"\n[+] Saved {len(self.products)} products to {filename}")
+        count = self.products.export_json(filename)
+        print(f"\n[+] Saved {count} products to {filename}")
     
     def export_csv(self, filename='clothes_data.csv'):
         """Export to CSV"""
         if not self.products:
             return
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=self.products[0].keys())
-            writer.writeheader()
-            writer.writerows(self.products)
-        print(f"[+] Saved {len(self.products)} products to {filename}")
+        count = self.products.export_csv(filename)
+        print(f"[+] Saved {count} products to {filename}")
     
     def close(self):
-        """Close browser"""
+        """Return browser to the pool"""
         try:
-            self.driver.quit()
+            self.pool.release(self.driver)
         except:
             pass
 
@@ -340,6 +208,9 @@ def main():
         else:
             print("\n[!] No products found")
         
+        report_readiness()
+        report_scrolling()
+        report_pagination()
         scraper.close()
         
     except Exception as e:
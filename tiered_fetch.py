@@ -0,0 +1,236 @@
+"""
+Tiered Fetcher
+Fetches a search page with a plain HTTP GET first and only opens it in a
+pooled headless Chrome when the response has no product tiles or embedded
+JSON. The tier that worked is remembered per site and URL pattern, so
+JS-only pages go straight to the browser on the next run.
+
+Usage: python tiered_fetch.py [query] [--sites asos,ebay,...] [--max-items N]
+or ClothingScraper.scrape_search() / option 4 of clothes_scraper.py
+"""
+
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+import argparse
+import os
+import random
+import re
+import sqlite3
+import threading
+
+import requests
+
+import rate_limiter
+from driver_pool import USER_AGENT, get_pool
+from extraction import SITES, extract_tiles, extract_tiles_html
+from output_sink import JsonlSink, stream_path
+from product import Product, stamp
+from readiness import wait_for_page
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(SCRIPT_DIR, '.fetch_tiers.sqlite')
+
+TIERS = ('http', 'browser')
+
+# A pattern that needed the browser gets plain HTTP again after this many
+# browser pages, in case the site started rendering on the server
+RETRY_HTTP_EVERY = 25
+
+# Search pages for the CLI: site -> (URL template, what spaces in the query become)
+SEARCH_URLS = {
+    'ebay': ('https://www.ebay.com/sch/i.html?_nkw={}&_sacat=11450', '+'),
+    'etsy': ('https://www.etsy.com/search?q={}&explicit=1&category_id=1&ship_to=US', '+'),
+    'depop': ('https://www.depop.com/search/?q={}', '%20'),
+    'shein': ('https://us.shein.com/pdsearch/{}/', '%20'),
+    'asos': ('https://www.asos.com/us/search/?q={}', '+'),
+    'zara': ('https://www.zara.com/us/en/search?searchTerm={}&section=MAN', '%20'),
+    'aliexpress': ('https://www.aliexpress.com/w/wholesale-{}.html?catId=200000343', '-'),
+    'hm': ('https://www2.hm.com/en_us/search-results.html?q={}', '+'),
+    'nordstrom': ('https://www.nordstrom.com/sr?keyword={}', '+'),
+    'forever21': ('https://www.forever21.com/us/shop/search/{}', '%20'),
+    'amazon': ('https://www.amazon.com/s?k={}&i=fashion', '+'),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiers (
+    site TEXT,
+    pattern TEXT,
+    tier TEXT,
+    browser_runs INTEGER,
+    updated_at TEXT,
+    PRIMARY KEY (site, pattern)
+);
+"""
+
+_WORD = re.compile(r'^[A-Za-z]+$')
+
+
+def url_pattern(url):
+    """
+    What a tier is remembered under: host, the path with every segment that
+    is not a plain word (ids, slugs, search terms) as *, and the query's keys
+    """
+    parts = urlsplit(url)
+    segments = [s if _WORD.match(s) else '*' for s in parts.path.split('/') if s]
+    keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return parts.netloc + '/' + '/'.join(segments) + ('?' + '&'.join(keys) if keys else '')
+
+
+def search_url(site, query):
+    template, space = SEARCH_URLS[site]
+    return template.format(query.replace(' ', space))
+
+
+class TieredFetcher:
+    """
+    fetcher = TieredFetcher()
+    products = fetcher.scrape('asos', url, limit=20)
+    fetcher.report()
+    """
+
+    def __init__(self, path=DEFAULT_PATH, headless=True, min_products=1, timeout=15):
+        self.headless = headless
+        self.min_products = min_products
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.stats = {'http': 0, 'browser': 0, 'failed': 0, 'escalated': 0, 'skipped_http': 0}
+
+    # ==================== Tier memory ====================
+    def remembered(self, site, pattern):
+        """(tier, browser pages since HTTP was last tried) for a pattern, or (None, 0)"""
+        with self.lock:
+            row = self.db.execute("SELECT tier, browser_runs FROM tiers WHERE site = ? AND pattern = ?",
+                                  (site, pattern)).fetchone()
+        return row if row else (None, 0)
+
+    def remember(self, site, pattern, tier, browser_runs=0):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO tiers VALUES (?, ?, ?, ?, ?)",
+                            (site, pattern, tier, browser_runs, datetime.now().isoformat()))
+            self.db.commit()
+
+    # ==================== Tiers ====================
+    def get_headers(self):
+        return {
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': random.choice(['en-US,en;q=0.9', 'en-US,en;q=0.8']),
+            'Accept-Encoding': 'gzip, deflate',
+        }
+
+    def fetch_http(self, site, url, limit=None):
+        """Rows from a plain GET, or [] when it was blocked or has nothing to extract"""
+        try:
+            rate_limiter.acquire(url)
+            response = self.session.get(url, headers=self.get_headers(), timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            print(f"[!] {site}: HTTP error: {str(e)[:60]}")
+            return []
+        if response.status_code != 200:
+            return []
+        return extract_tiles_html(response.text, response.url, SITES[site], limit)
+
+    def fetch_browser(self, site, url, limit=None):
+        """Rows from the page rendered in a pooled Chrome"""
+        with get_pool(self.headless).lease() as driver:
+            driver.get(url)
+            wait_for_page(driver, site)
+            return extract_tiles(driver, SITES[site], limit)
+
+    def fetch(self, site, url, limit=None):
+        """(rows, tier) for a page, trying the cheapest tier that can work first; tier None if none did"""
+        pattern = url_pattern(url)
+        tier, browser_runs = self.remembered(site, pattern)
+
+        # Each tier's request is paced on its own: an escalated page is a
+        # second request to the same site and waits for its own token
+        if tier == 'browser' and browser_runs < RETRY_HTTP_EVERY:
+            self.stats['skipped_http'] += 1
+        else:
+            rows = self.fetch_http(site, url, limit)
+            if len(rows) >= self.min_products:
+                self.remember(site, pattern, 'http')
+                self.stats['http'] += 1
+                return rows, 'http'
+            self.stats['escalated'] += 1
+            browser_runs = 0
+
+        try:
+            rows = self.fetch_browser(site, url, limit)
+        except Exception as e:
+            print(f"[!] {site}: browser error: {str(e)[:60]}")
+            rows = []
+        if len(rows) >= self.min_products:
+            self.remember(site, pattern, 'browser', browser_runs + 1)
+            self.stats['browser'] += 1
+            return rows, 'browser'
+        self.stats['failed'] += 1
+        return rows, None
+
+    def scrape(self, site, url, limit=None):
+        """Products for a search page, through whichever tier serves it"""
+        rows, tier = self.fetch(site, url, limit)
+        source = SITES[site]['source']
+        scraped_at = stamp()
+        products = []
+        for row in rows:
+            if not row.get('name'):
+                continue
+            extra = {field: row[field] for field in row
+                     if field not in ('name', 'price', 'image', 'url') and row[field]}
+            products.append(Product(source=source, name=row['name'], price=row.get('price') or 'N/A',
+                                    image=row.get('image') or '', url=row.get('url') or '',
+                                    scraped_at=scraped_at, **extra))
+        print(f"[{source}] {len(products)} products via {tier or 'no tier'}")
+        return products
+
+    # ==================== Report ====================
+    def report(self):
+        s = self.stats
+        pages = s['http'] + s['browser'] + s['failed']
+        if not pages:
+            return
+        print(f"\n{'=' * 40}")
+        print(f"[*] Tiered fetch: {pages} page(s)")
+        for tier in TIERS + ('failed',):
+            print(f"    - {tier:<8} {s[tier]:4d}  ({s[tier] / pages:.0%})")
+        print(f"    HTTP found nothing on {s['escalated']} page(s), skipped on {s['skipped_http']} "
+              f"known browser-only page(s)")
+        print(f"{'=' * 40}")
+
+    def close(self):
+        self.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP-first scraper that opens Chrome only when it has to")
+    parser.add_argument('query', nargs='?', default="t-shirts")
+    parser.add_argument('--sites', default='asos,ebay,etsy,shein,zara',
+                        help=f"comma-separated, from: {', '.join(SEARCH_URLS)}")
+    parser.add_argument('--max-items', type=int, default=20)
+    parser.add_argument('--tiers', action='store_true', help="print the remembered tier per URL pattern and exit")
+    args = parser.parse_args()
+
+    fetcher = TieredFetcher()
+    if args.tiers:
+        for site, pattern, tier, runs, updated in fetcher.db.execute("SELECT * FROM tiers ORDER BY site, pattern"):
+            print(f"  {site:<12} {tier:<8} {pattern}  ({updated[:16]})")
+        fetcher.close()
+        return
+
+    sink = JsonlSink(stream_path('clothes_data'))
+    try:
+        for site in args.sites.split(','):
+            sink.extend(fetcher.scrape(site, search_url(site, args.query), args.max_items))
+    finally:
+        fetcher.report()
+        fetcher.close()
+    sink.close()
+    print(f"[+] {len(sink)} products written to {sink.path}")
+
+
+if __name__ == "__main__":
+    main()